@@ -0,0 +1,150 @@
+"""
+Pick the handlers for a mix of updates through the dispatch index and
+through the loop over every handler of every group it replaced, check both
+pick the same ones, and report the time per update of each.
+
+    python3 -m benchmarks.dispatch --updates 2000
+
+Run it from the repository root. The bot config is read as usual, see
+tg_bot/replay.py; point DATABASE_URL at a scratch database, nothing is sent
+to Telegram.
+"""
+
+import argparse
+import random
+import time
+
+from telegram import Update
+
+from tg_bot import dispatcher
+from tg_bot.replay import BOT_USERNAME, FakeBotApi, _user
+
+# Callback data of the inline keyboards the modules send, and one nobody handles.
+CALLBACK_DATA = ("help_back", "help_module(notes)", "stngs_back", "rm_warn(1)", "zzz")
+TEXTS = ("hello there", "lol", "#note", "what's up @someone", "!ban", "http://x.com")
+
+
+def update_mix(count, commands, seed=0):
+    """70% text, 15% commands, 10% callback queries and 5% edits."""
+    rand = random.Random(seed)
+    chat = {"id": -1001000000000, "type": "supergroup", "title": "Chat"}
+
+    def message(update_id, text, entities=()):
+        return {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": chat,
+            "from": _user(10000 + rand.randrange(100)),
+            "text": text,
+            "entities": list(entities),
+        }
+
+    for update_id in range(1, count + 1):
+        kind = rand.random()
+        if kind < 0.7:
+            yield {
+                "update_id": update_id,
+                "message": message(update_id, rand.choice(TEXTS)),
+            }
+        elif kind < 0.85:
+            command = "/" + rand.choice(commands + ["nosuch"])
+            command += rand.choice(("", "@" + BOT_USERNAME, "@otherbot"))
+            entity = {"type": "bot_command", "offset": 0, "length": len(command)}
+            yield {
+                "update_id": update_id,
+                "message": message(update_id, command + " arg", [entity]),
+            }
+        elif kind < 0.95:
+            yield {
+                "update_id": update_id,
+                "callback_query": {
+                    "id": str(update_id),
+                    "from": _user(10000),
+                    "chat_instance": "1",
+                    "data": rand.choice(CALLBACK_DATA),
+                    "message": message(update_id, "menu"),
+                },
+            }
+        else:
+            yield {
+                "update_id": update_id,
+                "edited_message": message(update_id, "edited"),
+            }
+
+
+def _first_matches(groups, update):
+    matched = []
+    for handlers in groups:
+        for handler in handlers:
+            check = handler.check_update(update)
+            if check is not None and check is not False:
+                matched.append(handler)
+                break
+    return matched
+
+
+def old_dispatch(update):
+    return _first_matches(
+        (dispatcher.handlers[group] for group in dispatcher.groups), update
+    )
+
+
+def new_dispatch(update):
+    from tg_bot.modules.helper_funcs.dispatch_index import DISPATCH_INDEX
+
+    return _first_matches(
+        (
+            [handler for handler, _ in handlers]
+            for _, handlers in DISPATCH_INDEX.candidates(dispatcher, update)
+        ),
+        update,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.dispatch")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    dispatcher.bot._request = FakeBotApi()
+    # Loads every module, like the real start up.
+    from tg_bot.__main__ import setup_dispatcher
+
+    setup_dispatcher()
+
+    commands = sorted(
+        {
+            command
+            for handlers in dispatcher.handlers.values()
+            for handler in handlers
+            for command in getattr(handler, "command", ())
+        }
+    )
+    updates = [
+        Update.de_json(update, dispatcher.bot)
+        for update in update_mix(args.updates, commands)
+    ]
+
+    for update in updates:
+        if old_dispatch(update) != new_dispatch(update):
+            raise SystemExit(f"Different handlers for {update.to_dict()}")
+    print(
+        "Same handlers for {} updates; {} handlers in {} groups.".format(
+            len(updates),
+            sum(len(handlers) for handlers in dispatcher.handlers.values()),
+            len(dispatcher.groups),
+        )
+    )
+
+    for _ in range(args.rounds):
+        for dispatch in (old_dispatch, new_dispatch):
+            started = time.perf_counter()
+            for update in updates:
+                dispatch(update)
+            per_update = (time.perf_counter() - started) / len(updates)
+            print(f"{dispatch.__name__}: {per_update * 1e6:.1f}us/update")
+
+
+if __name__ == "__main__":
+    main()
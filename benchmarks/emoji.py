@@ -0,0 +1,55 @@
+"""
+Time the emoji checks behind the emoji and bigemoji locks on 4096 character
+messages, the longest Telegram allows: comparing every character with every
+emoji as they used to, and with contains_emoji.
+
+    python3 -m benchmarks.emoji
+
+Run it from the repository root, with the bot config set as usual; nothing
+is read from the database or sent to Telegram.
+"""
+
+import argparse
+import time
+
+from tg_bot.modules.helper_funcs.filters import EMOJIS, contains_emoji
+
+LENGTH = 4096
+MESSAGES = {
+    "ascii text, no emoji": ("lorem ipsum dolor sit amet " * 200)[:LENGTH],
+    "emoji in last position": ("lorem ipsum dolor sit amet " * 200)[: LENGTH - 1]
+    + "\U0001f600",
+    "CJK text, no emoji": ("你好世界" * 1024)[:LENGTH],
+}
+
+
+def old_has_emoji(text):
+    for emoji in EMOJIS:
+        for letter in text:
+            if letter == emoji:
+                return True
+    return False
+
+
+def per_call(check, text, seconds):
+    calls = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        check(text)
+        calls += 1
+    return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.emoji")
+    parser.add_argument("--seconds", type=float, default=2.0, help="per measurement")
+    args = parser.parse_args()
+
+    for name, text in MESSAGES.items():
+        old = per_call(old_has_emoji, text, args.seconds)
+        new = per_call(contains_emoji, text, args.seconds)
+        print(f"{name}: {old * 1000:.1f}ms -> {new * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Messages per second reply_filter can check against a chat's filters, with
+one regex per trigger as it used to and with the chat's TriggerMatcher: for
+a message no filter matches, the common case, and for one only the last
+filter in priority order matches, the worst case for both.
+
+    python3 -m benchmarks.triggers --filters 10 100 1000
+
+Run it from the repository root, with the bot config set as usual; nothing
+is read from the database or sent to Telegram.
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+
+from tg_bot.modules.helper_funcs.triggers import TriggerMatcher
+
+# 220 characters which none of the random triggers match.
+MESSAGE = "lorem ipsum dolor sit amet consectetur adipiscing elit " * 4
+
+
+def loop_match(triggers, text):
+    for keyword in triggers:
+        pattern = (
+            r"( |^|[^\w])"
+            + re.escape(keyword).replace(r"\*", "(.*)").replace(r"\\(.*)", "*")
+            + r"( |$|[^\w])"
+        )
+        if re.search(pattern, text, flags=re.IGNORECASE):
+            return keyword
+    return None
+
+
+def rate(match, text, seconds):
+    count = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        for _ in range(10):
+            match(text)
+        count += 10
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.triggers")
+    parser.add_argument("--filters", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=2.0, help="per measurement")
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    for count in args.filters:
+        triggers = sorted(
+            {"".join(rand.choices(string.ascii_lowercase, k=8)) for _ in range(count)},
+            key=lambda x: (-len(x), x),
+        )
+        matcher = TriggerMatcher(triggers)
+        messages = {
+            "no match": MESSAGE,
+            "last filter matches": MESSAGE + triggers[-1],
+        }
+        for case, text in messages.items():
+            assert matcher.match(text) == loop_match(triggers, text)
+            old = rate(lambda text: loop_match(triggers, text), text, args.seconds)
+            new = rate(matcher.match, text, args.seconds)
+            print(f"{count} filters, {case}: {old:.0f} -> {new:.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+The tests run the bot's code against a throwaway config: an in-memory SQLite
+database, no cache snapshot, and the replay's stand-in for the Bot API, so
+nothing is sent to Telegram.
+"""
+
+import os
+
+os.environ.update(
+    ENV="1",
+    TOKEN="123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi",
+    OWNER_ID="1",
+    DATABASE_URL="sqlite://",
+    CACHE_SNAPSHOT="",
+)
+
+from tg_bot import dispatcher  # noqa: E402
+from tg_bot.replay import FakeBotApi  # noqa: E402
+
+dispatcher.bot._request = FakeBotApi()
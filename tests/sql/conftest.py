@@ -0,0 +1,89 @@
+"""
+Every test here runs once per backend: SQLite in memory, SQLite in WAL mode,
+and postgres when TEST_DATABASE_URL points at a scratch database. The tables
+of that database are dropped and created again, so never point it at a bot's.
+"""
+
+import os
+
+import pytest
+
+from tg_bot.modules.sql import BASE, SESSION, make_engine
+from tg_bot.modules.sql import (
+    antiflood_sql,
+    cust_filters_sql,
+    global_bans_sql,
+    global_kicks_sql,
+    locks_sql,
+    log_channel_sql,
+    notes_sql,
+    users_sql,
+    welcome_sql,
+)
+from tg_bot.modules.sql.chat_cache import CHAT_CACHES
+
+# The module level caches, emptied before every test.
+CACHES = (
+    (antiflood_sql, "CHAT_FLOOD"),
+    (cust_filters_sql, "FILTER_CACHE"),
+    (cust_filters_sql, "FILTER_LOADING"),
+    (global_bans_sql, "GBANNED_LIST"),
+    (global_bans_sql, "GBANSTAT_LIST"),
+    (global_kicks_sql, "GKICK_LIST"),
+    (locks_sql, "CHAT_LOCKS"),
+    (locks_sql, "CHAT_RESTR"),
+    (log_channel_sql, "CHANNELS"),
+    (notes_sql, "NOTE_CACHE"),
+    (notes_sql, "NOTE_LOADING"),
+    (users_sql, "PENDING_USERS"),
+    (users_sql, "PENDING_CHATS"),
+    (users_sql, "PENDING_MEMBERS"),
+    (users_sql, "SEEN_USERS"),
+    (users_sql, "SEEN_CHATS"),
+    (users_sql, "SEEN_MEMBERS"),
+    (welcome_sql, "BLACKLIST"),
+    (welcome_sql, "WELCOME_CONFIGS"),
+)
+
+
+def _bind(engine):
+    BASE.metadata.bind = engine
+    SESSION.remove()
+    SESSION.configure(bind=engine)
+
+
+@pytest.fixture(scope="session", params=["sqlite-memory", "sqlite-wal", "postgres"])
+def backend(request, tmp_path_factory):
+    if request.param == "postgres":
+        url = os.environ.get("TEST_DATABASE_URL")
+        if not url:
+            pytest.skip("TEST_DATABASE_URL is not set")
+        pytest.importorskip("psycopg2")
+    elif request.param == "sqlite-wal":
+        url = "sqlite:///{}".format(tmp_path_factory.mktemp("sql") / "bot.db")
+    else:
+        url = "sqlite://"
+
+    engine = make_engine(url)
+    BASE.metadata.drop_all(engine)
+    BASE.metadata.create_all(engine)
+    previous = SESSION.session_factory.kw["bind"]
+    _bind(engine)
+    yield engine
+    _bind(previous)
+    BASE.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def empty_database(backend):
+    SESSION.remove()
+    with backend.begin() as conn:
+        for table in reversed(BASE.metadata.sorted_tables):
+            conn.execute(table.delete())
+    for cache in CHAT_CACHES:
+        cache.invalidate(*list(cache._chats))
+    for module, name in CACHES:
+        getattr(module, name, {}).clear()
+    yield
+    SESSION.remove()
@@ -0,0 +1,19 @@
+from tg_bot.modules.sql import antiarabic_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+
+
+def test_setting():
+    assert not sql.chat_antiarabic(CHAT)
+    sql.set_chat_setting(CHAT, True)
+    assert sql.chat_antiarabic(CHAT)
+    assert sql.chat_antiarabic(str(CHAT))
+    sql.set_chat_setting(CHAT, False)
+    assert not sql.chat_antiarabic(CHAT)
+
+
+def test_migrate():
+    sql.set_chat_setting(CHAT, True)
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.chat_antiarabic(NEW_CHAT)
+    assert not sql.chat_antiarabic(CHAT)
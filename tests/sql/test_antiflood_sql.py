@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from tg_bot.modules.sql import antiflood_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+
+
+def reload():
+    sql.CHAT_FLOOD.clear()
+    sql.__load_flood_settings()
+
+
+def test_defaults():
+    assert sql.get_flood_limit(CHAT) == sql.DEF_LIMIT
+    assert sql.get_flood_time(CHAT) == sql.DEF_TIME
+    assert not sql.update_flood(CHAT, 1)
+
+
+def test_set_flood():
+    sql.set_flood(CHAT, 5)
+    assert (sql.get_flood_limit(CHAT), sql.get_flood_time(CHAT)) == (5, sql.DEF_TIME)
+
+    sql.set_flood(CHAT, 5, 30)
+    sql.set_flood(CHAT, 3)
+    reload()
+    assert (sql.get_flood_limit(CHAT), sql.get_flood_time(CHAT)) == (3, 30)
+
+
+def test_failed_write_keeps_cache(monkeypatch):
+    sql.set_flood(CHAT, 5)
+
+    def commit():
+        raise OperationalError("COMMIT", {}, Exception("database is gone"))
+
+    monkeypatch.setattr(sql.SESSION, "commit", commit)
+    with pytest.raises(OperationalError):
+        sql.set_flood(CHAT, 3, 30)
+    assert (sql.get_flood_limit(CHAT), sql.get_flood_time(CHAT)) == (5, sql.DEF_TIME)
+
+
+def test_update_flood():
+    sql.set_flood(CHAT, 2)
+    assert [sql.update_flood(CHAT, 1) for _ in range(3)] == [False, False, True]
+    assert not sql.update_flood(CHAT, 2)
+
+    sql.set_flood(CHAT, 0)
+    assert not any(sql.update_flood(CHAT, 1) for _ in range(3))
+
+
+def test_strength():
+    assert sql.get_flood_strength(CHAT) == (3, False)
+    sql.set_flood_strength(CHAT, True)
+    assert sql.get_flood_strength(CHAT) is True
+    sql.set_flood_strength(CHAT, False)
+    assert sql.get_flood_strength(CHAT) is False
+
+
+def test_migrate():
+    sql.set_flood(CHAT, 5, 30)
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_flood_limit(NEW_CHAT) == 5
+    reload()
+    assert (sql.get_flood_limit(NEW_CHAT), sql.get_flood_time(NEW_CHAT)) == (5, 30)
+    assert sql.get_flood_limit(CHAT) == sql.DEF_LIMIT
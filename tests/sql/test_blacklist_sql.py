@@ -0,0 +1,27 @@
+from tg_bot.modules.sql import blacklist_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+
+
+def test_add_and_remove():
+    assert sql.get_chat_blacklist(CHAT) == set()
+    sql.add_to_blacklist(CHAT, "spam")
+    sql.add_to_blacklist(CHAT, "spam")
+    sql.add_to_blacklist(CHAT, "eggs")
+    sql.add_to_blacklist(NEW_CHAT, "spam")
+    assert sql.get_chat_blacklist(CHAT) == {"spam", "eggs"}
+    assert sql.num_blacklist_filters() == 3
+    assert sql.num_blacklist_chat_filters(CHAT) == 2
+    assert sql.num_blacklist_filter_chats() == 2
+
+    assert sql.rm_from_blacklist(CHAT, "spam")
+    assert not sql.rm_from_blacklist(CHAT, "spam")
+    assert sql.get_chat_blacklist(CHAT) == {"eggs"}
+
+
+def test_migrate():
+    sql.add_to_blacklist(CHAT, "spam")
+    assert sql.get_chat_blacklist(NEW_CHAT) == set()
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_chat_blacklist(NEW_CHAT) == {"spam"}
+    assert sql.get_chat_blacklist(CHAT) == set()
@@ -0,0 +1,56 @@
+from tg_bot.modules.sql import cust_filters_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+BUTTONS = [("First", "https://example.com/1", False), ("Second", "t.me/x", True)]
+
+
+def test_add_filter():
+    assert sql.get_chat_triggers(CHAT) == []
+    sql.add_filter(CHAT, "hi", "hello", buttons=BUTTONS)
+    sql.add_filter(CHAT, "bye *", "see ya", is_sticker=True)
+    sql.add_filter(NEW_CHAT, "hi", "hey")
+
+    assert sql.get_chat_triggers(CHAT) == ["bye *", "hi"]
+    assert sql.get_chat_matcher(CHAT).match("oh, bye now") == "bye *"
+    assert [filt.keyword for filt in sql.get_chat_filters(CHAT)] == ["bye *", "hi"]
+    assert sql.get_filter(CHAT, "bye *").is_sticker
+    assert len(sql.get_all_filters()) == 3
+    assert sql.num_filters() == 3
+    assert sql.num_chats() == 2
+
+    reply = sql.get_filter_reply(CHAT, "hi")
+    assert reply.reply == "hello"
+    assert [
+        [button.text for button in row] for row in reply.keyboard.inline_keyboard
+    ] == [["First", "Second"]]
+    assert sql.get_filter_reply(CHAT, "nope") is None
+
+
+def test_replace_filter():
+    sql.add_filter(CHAT, "hi", "hello", buttons=BUTTONS)
+    sql.get_filter_reply(CHAT, "hi")
+    sql.add_filter(CHAT, "hi", "hello again", buttons=BUTTONS[1:])
+
+    reply = sql.get_filter_reply(CHAT, "hi")
+    assert reply.reply == "hello again"
+    assert [button.name for button in sql.get_buttons(CHAT, "hi")] == ["Second"]
+
+
+def test_remove_filter():
+    sql.add_filter(CHAT, "hi", "hello", buttons=BUTTONS)
+    sql.get_filter_reply(CHAT, "hi")
+    assert sql.remove_filter(CHAT, "hi")
+    assert not sql.remove_filter(CHAT, "hi")
+    assert sql.get_chat_triggers(CHAT) == []
+    assert sql.get_filter_reply(CHAT, "hi") is None
+    assert sql.get_buttons(CHAT, "hi") == []
+
+
+def test_migrate():
+    sql.add_filter(CHAT, "hi", "hello", buttons=BUTTONS)
+    sql.get_filter_reply(CHAT, "hi")
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_chat_triggers(NEW_CHAT) == ["hi"]
+    assert sql.get_chat_triggers(CHAT) == []
+    assert sql.get_filter_reply(CHAT, "hi") is None
+    assert len(sql.get_buttons(NEW_CHAT, "hi")) == 2
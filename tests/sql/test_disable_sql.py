@@ -0,0 +1,27 @@
+from tg_bot.modules.sql import disable_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+
+
+def test_disable_and_enable():
+    assert not sql.is_command_disabled(CHAT, "rules")
+    assert sql.disable_command(CHAT, "rules")
+    assert not sql.disable_command(CHAT, "rules")
+    sql.disable_command(CHAT, "notes")
+    sql.disable_command(NEW_CHAT, "rules")
+    assert sql.is_command_disabled(CHAT, "rules")
+    assert sql.get_all_disabled(CHAT) == {"rules", "notes"}
+    assert sql.num_chats() == 2
+    assert sql.num_disabled() == 3
+
+    assert sql.enable_command(CHAT, "rules")
+    assert not sql.enable_command(CHAT, "rules")
+    assert not sql.is_command_disabled(CHAT, "rules")
+
+
+def test_migrate():
+    sql.disable_command(CHAT, "rules")
+    assert not sql.is_command_disabled(NEW_CHAT, "rules")
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.is_command_disabled(NEW_CHAT, "rules")
+    assert not sql.is_command_disabled(CHAT, "rules")
@@ -0,0 +1,29 @@
+from tg_bot.modules.sql import github_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+
+
+def test_repos():
+    assert sql.get_repo(CHAT, "bot") is None
+    sql.add_repo_to_db(CHAT, "bot", "owner/bot", 0)
+    sql.add_repo_to_db(CHAT, "bot", "owner/bot2", 1)
+    sql.add_repo_to_db(CHAT, "app", "owner/app", 0)
+    assert sql.get_repo(CHAT, "bot") == ("bot", "owner/bot2", 1)
+
+    sql.CHAT_REPOS.invalidate(CHAT)
+    assert sql.get_all_repos(CHAT) == [
+        ("app", "owner/app", 0),
+        ("bot", "owner/bot2", 1),
+    ]
+
+    assert sql.rm_repo(CHAT, "bot")
+    assert not sql.rm_repo(CHAT, "bot")
+    assert sql.get_all_repos(CHAT) == [("app", "owner/app", 0)]
+
+
+def test_migrate():
+    sql.add_repo_to_db(CHAT, "bot", "owner/bot", 0)
+    assert sql.get_all_repos(CHAT)
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_all_repos(CHAT) == []
+    assert sql.get_repo(NEW_CHAT, "bot") == ("bot", "owner/bot", 0)
@@ -0,0 +1,35 @@
+from tg_bot.modules.sql import global_bans_sql as sql
+
+USER = 1000000001
+CHAT = -1001000000001
+
+
+def test_gban():
+    assert not sql.is_user_gbanned(USER)
+    sql.gban_user(USER, "spammer", "spam")
+    assert sql.is_user_gbanned(USER)
+    assert sql.num_gbanned_users() == 1
+    assert sql.get_gbanned_user(USER).reason == "spam"
+
+    assert sql.update_gban_reason(USER, "spammer", "more spam") == "spam"
+    assert sql.update_gban_reason(USER + 1, "nobody") is None
+    assert sql.get_gban_list() == [
+        {"user_id": USER, "name": "spammer", "reason": "more spam"}
+    ]
+
+    sql.ungban_user(USER)
+    assert not sql.is_user_gbanned(USER)
+    assert sql.get_gbanned_user(USER) is None
+
+
+def test_chat_setting():
+    assert sql.does_chat_gban(CHAT)
+    sql.disable_gbans(CHAT)
+    assert not sql.does_chat_gban(CHAT)
+
+    sql.GBANSTAT_LIST.clear()
+    sql.__load_gban_stat_list()
+    assert not sql.does_chat_gban(CHAT)
+
+    sql.enable_gbans(CHAT)
+    assert sql.does_chat_gban(CHAT)
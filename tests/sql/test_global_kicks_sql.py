@@ -0,0 +1,20 @@
+from tg_bot.modules.sql import global_kicks_sql as sql
+
+USER = 1000000001
+
+
+def test_gkicks():
+    assert sql.get_times(USER) == 0
+    sql.gkick_user(USER, "kicked", 1)
+    sql.gkick_user(USER, "kicked", 2)
+    assert sql.get_times(USER) == 3
+    assert USER in sql.GKICK_LIST
+
+    sql.gkick_setvalue(USER, "kicked", 10)
+    assert sql.get_times(USER) == 10
+    sql.gkick_setvalue(USER + 1, "other", 4)
+    assert sql.get_times(USER + 1) == 4
+
+    sql.gkick_reset(USER)
+    assert sql.get_times(USER) == 0
+    assert USER not in sql.GKICK_LIST
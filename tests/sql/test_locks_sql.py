@@ -0,0 +1,61 @@
+from tg_bot.modules.sql import locks_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+
+
+def reload():
+    sql.CHAT_LOCKS.clear()
+    sql.CHAT_RESTR.clear()
+    sql.__load_chat_locks()
+
+
+def test_locks():
+    assert not sql.is_locked(CHAT, "sticker")
+    sql.update_lock(CHAT, "sticker", True)
+    sql.update_lock(CHAT, "url", True)
+    reload()
+    assert sql.is_locked(CHAT, "sticker")
+    assert sql.is_locked(CHAT, "url")
+    assert not sql.is_locked(CHAT, "gif")
+    assert sql.get_lock_mask(CHAT) == sql.LOCK_BITS["sticker"] | sql.LOCK_BITS["url"]
+    assert sql.get_locks(CHAT).sticker
+
+    sql.update_lock(CHAT, "sticker", False)
+    sql.update_lock(CHAT, "url", False)
+    assert sql.get_lock_mask(CHAT) == 0
+    assert CHAT not in sql.CHAT_LOCKS
+
+
+def test_restrictions():
+    sql.update_restriction(CHAT, "media", True)
+    assert sql.is_restr_locked(CHAT, "media")
+    assert not sql.is_restr_locked(CHAT, "all")
+
+    sql.update_restriction(CHAT, "all", True)
+    reload()
+    assert sql.is_restr_locked(CHAT, "all")
+    assert sql.get_restr(CHAT).preview
+
+    sql.update_restriction(CHAT, "all", False)
+    assert sql.get_restr_mask(CHAT) == 0
+
+
+def test_init_reset():
+    sql.update_lock(CHAT, "sticker", True)
+    sql.init_permissions(CHAT, reset=True)
+    assert not sql.get_locks(CHAT).sticker
+    sql.update_restriction(CHAT, "media", True)
+    sql.init_restrictions(CHAT, reset=True)
+    assert not sql.get_restr(CHAT).media
+
+
+def test_migrate():
+    sql.update_lock(CHAT, "sticker", True)
+    sql.update_restriction(CHAT, "media", True)
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    for _ in range(2):
+        assert sql.is_locked(NEW_CHAT, "sticker")
+        assert sql.is_restr_locked(NEW_CHAT, "media")
+        assert not sql.is_locked(CHAT, "sticker")
+        assert sql.get_locks(CHAT) is None
+        reload()
@@ -0,0 +1,33 @@
+from tg_bot.modules.sql import log_channel_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+CHANNEL = "-1001000000100"
+
+
+def reload():
+    sql.CHANNELS.clear()
+    sql.__load_log_channels()
+
+
+def test_log_channel():
+    assert sql.get_chat_log_channel(CHAT) is None
+    sql.set_chat_log_channel(CHAT, CHANNEL)
+    sql.set_chat_log_channel(NEW_CHAT, "-1001000000200")
+    sql.set_chat_log_channel(NEW_CHAT, CHANNEL)
+    reload()
+    assert sql.get_chat_log_channel(CHAT) == CHANNEL
+    assert sql.get_chat_log_channel(NEW_CHAT) == CHANNEL
+    assert sql.num_logchannels() == 2
+
+    assert sql.stop_chat_logging(CHAT) == CHANNEL
+    assert sql.stop_chat_logging(CHAT) is None
+    assert sql.get_chat_log_channel(CHAT) is None
+
+
+def test_migrate():
+    sql.set_chat_log_channel(CHAT, CHANNEL)
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_chat_log_channel(NEW_CHAT) == CHANNEL
+    reload()
+    assert sql.get_chat_log_channel(NEW_CHAT) == CHANNEL
+    assert sql.get_chat_log_channel(CHAT) is None
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import Column, MetaData, Table, inspect
+
+from tg_bot.modules.helper_funcs.msg_types import Types
+from tg_bot.modules.sql import SESSION, migrate_primary_key
+from tg_bot.modules.sql import cust_filters_sql, notes_sql, welcome_sql
+
+CHAT = -1001000000001
+BUTTONS = [("First", "https://example.com/1", False), ("Second", "t.me/x", True)]
+
+# The button tables, and the columns of their primary key before it was id alone.
+OLD_KEYS = (
+    (cust_filters_sql.Buttons.__table__, ("id", "chat_id", "keyword")),
+    (notes_sql.Buttons.__table__, ("id", "chat_id", "note_name")),
+    (welcome_sql.WelcomeButtons.__table__, ("id", "chat_id")),
+    (welcome_sql.GoodbyeButtons.__table__, ("id", "chat_id")),
+)
+
+
+@pytest.fixture
+def old_button_tables(backend):
+    if backend.dialect.name != "postgresql":
+        pytest.skip("only postgres has tables from before the single column keys")
+    SESSION.remove()
+    old = MetaData()
+    for table, key in OLD_KEYS:
+        Table(
+            table.name,
+            old,
+            *(
+                Column(
+                    column.name,
+                    column.type,
+                    primary_key=column.name in key,
+                    autoincrement=column.name == "id",
+                    nullable=column.nullable,
+                )
+                for column in table.columns
+            ),
+        )
+        table.drop(backend)
+    old.create_all(backend)
+    yield old
+    for table, _ in OLD_KEYS:
+        table.drop(backend)
+        table.create(backend)
+
+
+def test_migrate_button_keys(backend, old_button_tables):
+    with backend.begin() as conn:
+        conn.execute(
+            old_button_tables.tables["note_urls"].insert(),
+            chat_id=str(CHAT),
+            note_name="rules",
+            name="Old",
+            url="https://example.com/old",
+            same_line=False,
+        )
+
+    for _ in range(2):
+        for table, _ in OLD_KEYS:
+            migrate_primary_key(table, backend)
+
+    inspector = inspect(backend)
+    for table, _ in OLD_KEYS:
+        assert inspector.get_pk_constraint(table.name)["constrained_columns"] == ["id"]
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= indexes
+
+    assert [button.name for button in notes_sql.get_buttons(CHAT, "rules")] == ["Old"]
+    notes_sql.add_note_to_db(CHAT, "faq", "read it", Types.BUTTON_TEXT, BUTTONS)
+    assert len(notes_sql.get_buttons(CHAT, "faq")) == 2
+    cust_filters_sql.add_filter(CHAT, "hi", "hello", buttons=BUTTONS)
+    assert len(cust_filters_sql.get_buttons(CHAT, "hi")) == 2
+    welcome_sql.set_custom_welcome(CHAT, None, "hi", Types.TEXT, BUTTONS)
+    welcome_sql.set_custom_gdbye(CHAT, None, "bye", Types.TEXT, BUTTONS)
+    assert len(welcome_sql.get_welc_buttons(CHAT)) == 2
+    assert len(welcome_sql.get_gdbye_buttons(CHAT)) == 2
@@ -0,0 +1,70 @@
+from tg_bot.modules.helper_funcs.msg_types import Types
+from tg_bot.modules.sql import notes_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+BUTTONS = [("First", "https://example.com/1", False), ("Second", "t.me/x", True)]
+
+
+def test_add_note():
+    assert sql.get_note_names(CHAT) == ()
+    sql.add_note_to_db(CHAT, "rules", "be nice", Types.BUTTON_TEXT, buttons=BUTTONS)
+    sql.add_note_to_db(CHAT, "faq", "", Types.PHOTO, file="file-id")
+    sql.add_note_to_db(NEW_CHAT, "rules", "be nice", Types.TEXT)
+
+    assert sql.get_note_names(CHAT) == ("faq", "rules")
+    assert sql.get_note_name_by_id(CHAT, 2) == "rules"
+    assert sql.get_note_name_by_id(CHAT, 3) is None
+    assert sql.get_note(CHAT, "faq").file == "file-id"
+    assert [note.name for note in sql.get_all_chat_notes(CHAT)] == ["faq", "rules"]
+    assert sql.num_notes() == 3
+    assert sql.num_chats() == 2
+
+    note = sql.get_cached_note(CHAT, "rules")
+    assert (note.value, note.msgtype) == ("be nice", Types.BUTTON_TEXT)
+    assert note.buttons == [sql.NoteButton(*button) for button in BUTTONS]
+    assert sql.get_cached_note(CHAT, "nope") is None
+
+
+def test_replace_note():
+    sql.add_note_to_db(CHAT, "rules", "be nice", Types.BUTTON_TEXT, buttons=BUTTONS)
+    sql.get_cached_note(CHAT, "rules")
+    sql.add_note_to_db(CHAT, "rules", "be nicer", Types.TEXT)
+
+    note = sql.get_cached_note(CHAT, "rules")
+    assert (note.value, note.buttons) == ("be nicer", [])
+    assert sql.get_buttons(CHAT, "rules") == []
+
+
+def test_rm_note():
+    sql.add_note_to_db(CHAT, "rules", "be nice", Types.BUTTON_TEXT, buttons=BUTTONS)
+    sql.get_cached_note(CHAT, "rules")
+    assert sql.rm_note(CHAT, "rules")
+    assert not sql.rm_note(CHAT, "rules")
+    assert sql.get_note_names(CHAT) == ()
+    assert sql.get_cached_note(CHAT, "rules") is None
+    assert sql.get_buttons(CHAT, "rules") == []
+
+
+def test_migrate():
+    sql.add_note_to_db(CHAT, "rules", "be nice", Types.BUTTON_TEXT, buttons=BUTTONS)
+    sql.get_cached_note(CHAT, "rules")
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_note_names(NEW_CHAT) == ("rules",)
+    assert sql.get_note_names(CHAT) == ()
+    assert sql.get_cached_note(CHAT, "rules") is None
+    assert len(sql.get_cached_note(NEW_CHAT, "rules").buttons) == 2
+
+
+def test_write_during_load_isnt_cached(monkeypatch):
+    sql.add_note_to_db(CHAT, "rules", "be nice", Types.TEXT)
+    get_buttons = sql.get_buttons
+
+    def write_during_load(chat_id, note_name):
+        monkeypatch.setattr(sql, "get_buttons", get_buttons)
+        sql.add_note_to_db(CHAT, "rules", "be nicer", Types.TEXT)
+        return get_buttons(chat_id, note_name)
+
+    monkeypatch.setattr(sql, "get_buttons", write_during_load)
+    assert sql.get_cached_note(CHAT, "rules").value == "be nice"
+    assert not sql.NOTE_CACHE and not sql.NOTE_LOADING
+    assert sql.get_cached_note(CHAT, "rules").value == "be nicer"
@@ -0,0 +1,27 @@
+from tg_bot.modules.sql import reporting_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+USER = 1000000001
+
+
+def test_chat_setting():
+    assert not sql.chat_should_report(CHAT)
+    sql.set_chat_setting(CHAT, True)
+    assert sql.chat_should_report(CHAT)
+    sql.set_chat_setting(CHAT, False)
+    assert not sql.chat_should_report(CHAT)
+
+
+def test_user_setting():
+    assert sql.user_should_report(USER)
+    sql.set_user_setting(USER, False)
+    assert not sql.user_should_report(USER)
+    sql.set_user_setting(USER, True)
+    assert sql.user_should_report(USER)
+
+
+def test_migrate():
+    sql.set_chat_setting(CHAT, True)
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.chat_should_report(NEW_CHAT)
+    assert not sql.chat_should_report(CHAT)
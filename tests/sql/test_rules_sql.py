@@ -0,0 +1,18 @@
+from tg_bot.modules.sql import rules_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+
+
+def test_rules():
+    assert sql.get_rules(CHAT) == ""
+    sql.set_rules(CHAT, "be nice")
+    sql.set_rules(CHAT, "be *very* nice")
+    assert sql.get_rules(CHAT) == "be *very* nice"
+    assert sql.num_chats() == 1
+
+
+def test_migrate():
+    sql.set_rules(CHAT, "be nice")
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_rules(NEW_CHAT) == "be nice"
+    assert sql.get_rules(CHAT) == ""
@@ -0,0 +1,23 @@
+from tg_bot.modules.sql import userinfo_sql as sql
+
+USER = 1000000001
+
+
+def test_me_info():
+    assert sql.get_user_me_info(USER) is None
+    sql.set_user_me_info(USER, "hi")
+    sql.set_user_me_info(USER, "hello ✨")
+    assert sql.get_user_me_info(USER) == "hello ✨"
+    assert sql.clear_user_info(USER)
+    assert not sql.clear_user_info(USER)
+    assert sql.get_user_me_info(USER) is None
+
+
+def test_bio():
+    assert sql.get_user_bio(USER) is None
+    sql.set_user_bio(USER, "a bio")
+    sql.set_user_bio(USER, "another bio")
+    assert sql.get_user_bio(USER) == "another bio"
+    assert sql.clear_user_bio(USER)
+    assert not sql.clear_user_bio(USER)
+    assert sql.get_user_bio(USER) is None
@@ -0,0 +1,111 @@
+from sqlalchemy.exc import OperationalError
+
+from tg_bot import dispatcher
+from tg_bot.modules.sql import users_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+USER = 1000000001
+
+
+def members(chat_id):
+    return sorted(member.user for member in sql.get_chat_members(chat_id))
+
+
+def test_update_user():
+    sql.update_user(USER, "someone")
+    sql.update_user(USER, "SomeOne", CHAT, "Chat")
+    sql.update_user(USER + 1, "other", CHAT, "Renamed chat")
+    sql.update_user(USER + 1, "other", NEW_CHAT, "Other chat")
+
+    assert [user.user_id for user in sql.get_userid_by_name("someone")] == [USER]
+    assert sql.get_chat_name(CHAT) == "Renamed chat"
+    assert members(CHAT) == [USER, USER + 1]
+    assert sql.get_user_num_chats(USER + 1) == 2
+    assert sorted(chat.chat_id for chat in sql.get_all_chats()) == sorted(
+        [str(CHAT), str(NEW_CHAT)]
+    )
+    assert (sql.num_users(), sql.num_chats()) == (2, 2)
+
+
+def test_queue_update_user():
+    # Holding the lock keeps the flush thread from taking the queued rows.
+    with sql.INSERTION_LOCK:
+        sql.queue_update_user(USER, "someone", CHAT, "Chat")
+        sql.queue_update_user(USER + 1, "other", CHAT, "Chat")
+        assert sql.num_users() == 0
+        assert sql.flush_users()
+    assert members(CHAT) == [USER, USER + 1]
+
+    with sql.INSERTION_LOCK:
+        sql.queue_update_user(USER, "someone", CHAT, "Chat")
+        assert not sql.PENDING_USERS and not sql.PENDING_MEMBERS
+        sql.queue_update_user(USER, "renamed", CHAT, "Chat")
+        assert sql.flush_users()
+    assert sql.get_userid_by_name("renamed")[0].user_id == USER
+
+
+def test_refused_rows_are_dropped():
+    with sql.INSERTION_LOCK:
+        sql.queue_update_user(USER, "someone", CHAT, "Chat")
+        # A member of a chat which isn't in the database.
+        sql.PENDING_MEMBERS[(str(NEW_CHAT), USER)] = None
+        assert sql.flush_users()
+        assert not sql.PENDING_MEMBERS
+    assert members(CHAT) == [USER]
+    assert members(NEW_CHAT) == []
+
+
+def test_unreachable_database_keeps_rows(monkeypatch):
+    def unreachable(*args):
+        raise OperationalError("SELECT", {}, Exception("connection refused"))
+
+    with sql.INSERTION_LOCK:
+        sql.queue_update_user(USER, "someone", CHAT, "Chat")
+        monkeypatch.setattr(sql, "_write_users", unreachable)
+        assert not sql.flush_users()
+        assert sql.PENDING_USERS == {USER: "someone"}
+        sql.queue_update_user(USER, "renamed")
+        monkeypatch.undo()
+        assert sql.flush_users()
+    assert members(CHAT) == [USER]
+    assert sql.get_userid_by_name("renamed")[0].user_id == USER
+
+
+def test_pending_rows_are_bounded(monkeypatch):
+    monkeypatch.setattr(sql, "PENDING_LIMIT", 2)
+    with sql.INSERTION_LOCK:
+        for user_id in range(USER, USER + 3):
+            sql.queue_update_user(user_id, "someone")
+        assert list(sql.PENDING_USERS) == [USER + 1, USER + 2]
+        assert sql.flush_users()
+    assert sql.num_users() == 2
+
+
+def test_ensure_bot_in_db():
+    sql.ensure_bot_in_db()
+    assert (
+        sql.get_userid_by_name(dispatcher.bot.username)[0].user_id == dispatcher.bot.id
+    )
+
+
+def test_migrate():
+    sql.update_user(USER, "someone", CHAT, "Chat")
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert members(NEW_CHAT) == [USER]
+    assert members(CHAT) == []
+    assert sql.get_chat_name(NEW_CHAT) == "Chat"
+
+
+def test_rem_chat():
+    sql.update_user(USER, "someone", CHAT, "Chat")
+    sql.rem_chat(CHAT)
+    assert members(CHAT) == []
+    assert sql.num_chats() == 0
+    assert sql.num_users() == 1
+
+
+def test_del_user():
+    sql.update_user(USER, "someone", CHAT, "Chat")
+    assert sql.del_user(USER)
+    assert sql.num_users() == 0
+    assert sql.get_user_num_chats(USER) == 0
@@ -0,0 +1,61 @@
+from tg_bot.modules.sql import warns_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+USER = 1000000001
+
+
+def test_warns():
+    assert sql.get_warns(USER, CHAT) is None
+    assert sql.warn_user(USER, CHAT, "spam") == (1, ["spam"])
+    assert sql.warn_user(USER, CHAT) == (2, ["spam"])
+    assert sql.warn_user(USER, CHAT, "more spam") == (3, ["spam", "more spam"])
+    sql.warn_user(USER, NEW_CHAT)
+    assert sql.get_warns(USER, CHAT) == (3, ["spam", "more spam"])
+    assert sql.num_warns() == 4
+    assert sql.num_warn_chats() == 2
+
+    assert sql.remove_warn(USER, CHAT)
+    assert sql.get_warns(USER, CHAT)[0] == 2
+    sql.reset_warns(USER, CHAT)
+    assert sql.get_warns(USER, CHAT) == (0, [])
+    assert not sql.remove_warn(USER, CHAT)
+
+
+def test_filters():
+    assert sql.get_chat_warn_triggers(CHAT) == []
+    sql.add_warn_filter(CHAT, "spam", "no spam")
+    sql.add_warn_filter(CHAT, "spam", "no spam!")
+    sql.add_warn_filter(CHAT, "ad", "no ads")
+    sql.add_warn_filter(NEW_CHAT, "ad", "no ads")
+    assert sql.get_chat_warn_triggers(CHAT) == ["spam", "ad"]
+    assert sql.get_warn_filter(CHAT, "spam").reply == "no spam!"
+    assert len(sql.get_chat_warn_filters(CHAT)) == 2
+    assert sql.num_warn_filters() == 3
+    assert sql.num_warn_chat_filters(CHAT) == 2
+    assert sql.num_warn_filter_chats() == 2
+
+    assert sql.remove_warn_filter(CHAT, "spam")
+    assert not sql.remove_warn_filter(CHAT, "spam")
+    assert sql.get_chat_warn_triggers(CHAT) == ["ad"]
+
+
+def test_settings():
+    assert sql.get_warn_setting(CHAT) == (3, False)
+    sql.set_warn_limit(CHAT, 5)
+    sql.set_warn_strength(CHAT, True)
+    assert sql.get_warn_setting(CHAT) == (5, True)
+    sql.set_warn_strength(NEW_CHAT, True)
+    assert sql.get_warn_setting(NEW_CHAT) == (3, True)
+
+
+def test_migrate():
+    sql.warn_user(USER, CHAT, "spam")
+    sql.add_warn_filter(CHAT, "spam", "no spam")
+    sql.set_warn_limit(CHAT, 5)
+    assert sql.get_chat_warn_triggers(NEW_CHAT) == []
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_warns(USER, NEW_CHAT) == (1, ["spam"])
+    assert sql.get_chat_warn_triggers(NEW_CHAT) == ["spam"]
+    assert sql.get_warn_setting(NEW_CHAT) == (5, False)
+    assert sql.get_warns(USER, CHAT) is None
+    assert sql.get_chat_warn_triggers(CHAT) == []
@@ -0,0 +1,79 @@
+from tg_bot.modules.helper_funcs.msg_types import Types
+from tg_bot.modules.sql import welcome_sql as sql
+
+CHAT, NEW_CHAT = -1001000000001, -1001000000002
+BUTTONS = [("First", "https://example.com/1", False), ("Second", "t.me/x", True)]
+
+
+def test_defaults():
+    assert sql.get_welc_pref(CHAT) == (True, sql.DEFAULT_WELCOME, "", Types.TEXT)
+    assert sql.get_gdbye_pref(CHAT) == (True, sql.DEFAULT_GOODBYE, "", Types.TEXT)
+    assert sql.get_welc_buttons(CHAT) == []
+    assert not sql.get_clean_pref(CHAT)
+    assert not sql.get_del_pref(CHAT)
+    assert not sql.welcome_mutes(CHAT)
+    assert sql.get_cas_status(CHAT)
+    assert not sql.get_cas_autoban(CHAT)
+    assert not sql.getDefenseStatus(CHAT)
+    assert sql.getKickTime(CHAT) == 90
+
+
+def test_custom_welcome():
+    sql.get_welc_pref(CHAT)
+    sql.set_custom_welcome(CHAT, "file-id", "hi {first}", Types.PHOTO, BUTTONS)
+    sql.set_welc_preference(CHAT, False)
+    assert sql.get_welc_pref(CHAT) == (False, "hi {first}", "file-id", Types.PHOTO)
+    assert sql.get_custom_welcome(CHAT) == "hi {first}"
+    assert sql.get_welc_buttons(CHAT) == [sql.WelcomeButton(*b) for b in BUTTONS]
+
+    sql.set_custom_welcome(CHAT, None, "hi again", Types.TEXT)
+    assert sql.get_welc_buttons(CHAT) == []
+
+
+def test_custom_goodbye():
+    sql.set_custom_gdbye(CHAT, None, "bye {first}", Types.TEXT, BUTTONS[1:])
+    sql.set_gdbye_preference(CHAT, False)
+    assert sql.get_gdbye_pref(CHAT)[:2] == (False, "bye {first}")
+    assert sql.get_custom_gdbye(CHAT) == "bye {first}"
+    assert sql.get_gdbye_buttons(CHAT) == [sql.WelcomeButton(*BUTTONS[1])]
+    assert sql.get_welc_buttons(CHAT) == []
+
+
+def test_settings():
+    sql.get_welc_pref(CHAT)
+    sql.set_clean_welcome(CHAT, 1234)
+    sql.set_del_joined(CHAT, True)
+    sql.set_welcome_mutes(CHAT, "soft")
+    sql.set_cas_autoban(CHAT, True)
+    sql.set_cas_status(CHAT, False)
+    sql.setDefenseStatus(CHAT, True)
+    sql.setKickTime(CHAT, "30")
+    for _ in range(2):
+        assert sql.get_clean_pref(CHAT) == 1234
+        assert sql.get_del_pref(CHAT)
+        assert sql.welcome_mutes(CHAT) == "soft"
+        assert not sql.get_cas_status(CHAT)
+        assert sql.get_cas_autoban(CHAT)
+        assert sql.getDefenseStatus(CHAT)
+        assert sql.getKickTime(CHAT) == 30
+        sql.WELCOME_CONFIGS.clear()
+
+
+def test_blacklist_chat():
+    assert not sql.isBanned(str(CHAT))
+    sql.blacklistChat(str(CHAT))
+    assert sql.isBanned(str(CHAT))
+    sql.unblacklistChat(str(CHAT))
+    assert not sql.isBanned(str(CHAT))
+
+
+def test_migrate():
+    sql.set_custom_welcome(CHAT, None, "hi {first}", Types.TEXT, BUTTONS)
+    sql.set_custom_gdbye(CHAT, None, "bye {first}", Types.TEXT, BUTTONS)
+    sql.get_welc_pref(NEW_CHAT)
+    sql.migrate_chat(CHAT, NEW_CHAT)
+    assert sql.get_custom_welcome(NEW_CHAT) == "hi {first}"
+    assert len(sql.get_welc_buttons(NEW_CHAT)) == 2
+    assert len(sql.get_gdbye_buttons(NEW_CHAT)) == 2
+    assert sql.get_custom_welcome(CHAT) == sql.DEFAULT_WELCOME
+    assert sql.get_welc_buttons(CHAT) == []
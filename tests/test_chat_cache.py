@@ -0,0 +1,85 @@
+from unittest import mock
+
+import pytest
+
+from tg_bot.modules.sql import chat_cache
+from tg_bot.modules.sql.chat_cache import ChatCache
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    monkeypatch.setattr(chat_cache, "CHAT_CACHES", [])
+    return []
+
+
+def counting_cache(loads, during_load=None, **kwargs):
+    def load(chat_id):
+        loads.append(chat_id)
+        if during_load:
+            during_load(chat_id)
+        return f"value of {chat_id}"
+
+    return ChatCache("test", load, **kwargs)
+
+
+def test_loads_once(loads):
+    cache = counting_cache(loads)
+    assert cache.get(-100) == "value of -100"
+    assert cache.get("-100") == "value of -100"
+    assert loads == ["-100"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_invalidate_reloads(loads):
+    cache = counting_cache(loads)
+    cache.get(-100)
+    cache.invalidate(-100)
+    cache.get(-100)
+    assert loads == ["-100", "-100"]
+
+
+def test_write_during_load_isnt_cached(loads):
+    cache = counting_cache(loads, during_load=lambda chat_id: cache.invalidate(chat_id))
+    cache.get(-100)
+    assert len(cache) == 0
+
+
+def test_write_to_another_chat_during_load(loads):
+    cache = counting_cache(loads, during_load=lambda chat_id: cache.invalidate(-200))
+    cache.get(-100)
+    cache.get(-100)
+    assert loads == ["-100"]
+
+
+def test_failed_load(loads):
+    def fail(chat_id):
+        raise RuntimeError("db down")
+
+    cache = counting_cache(loads, during_load=fail)
+    with pytest.raises(RuntimeError):
+        cache.get(-100)
+    assert len(cache) == 0
+    assert not cache._loading
+
+
+def test_least_recently_used_go_first(loads):
+    cache = counting_cache(loads, size=2)
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+    loads.clear()
+    cache.get(1)
+    cache.get(2)
+    assert loads == ["2"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_idle_chats_go(loads):
+    cache = counting_cache(loads, idle=60)
+    with mock.patch("time.monotonic", return_value=1000.0):
+        cache.get(1)
+    with mock.patch("time.monotonic", return_value=1061.0):
+        cache.get(2)
+    assert len(cache) == 1
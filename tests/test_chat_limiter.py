@@ -0,0 +1,41 @@
+import threading
+from unittest import mock
+
+from tg_bot.modules.helper_funcs.chat_limiter import ChatLimiter
+
+
+def test_burst_then_rate():
+    limiter = ChatLimiter(burst=3, rate=1, shards=4)
+    with mock.patch("time.monotonic", return_value=100.0):
+        assert [limiter.allow(-100) for _ in range(5)] == [True] * 3 + [False] * 2
+        # other chats have their own bucket
+        assert limiter.allow(-101)
+    with mock.patch("time.monotonic", return_value=101.0):
+        assert limiter.allow(-100)
+        assert not limiter.allow(-100)
+    assert limiter.total_dropped == 3
+    assert limiter.dropped() == [(-100, 3)]
+
+
+def test_sweep_forgets_refilled_chats():
+    limiter = ChatLimiter(burst=2, rate=1, shards=4)
+    with mock.patch("time.monotonic", return_value=100.0):
+        limiter.allow(-100)
+    assert len(limiter) == 1
+    limiter.sweep(now=103.0)
+    assert len(limiter) == 0
+
+
+def test_dropped_counted_across_shards():
+    limiter = ChatLimiter(burst=1, rate=0.001, shards=8)
+    threads = [
+        threading.Thread(
+            target=lambda chat_id=chat_id: [limiter.allow(chat_id) for _ in range(501)]
+        )
+        for chat_id in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert limiter.total_dropped == 16 * 500
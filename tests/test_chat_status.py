@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from tg_bot.modules.helper_funcs import chat_status
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(chat_status, "ADMIN_CACHE", chat_status.OrderedDict())
+    monkeypatch.setattr(chat_status, "ADMIN_REFRESH_LOCKS", {})
+
+
+def chat(chat_id, calls):
+    def get_administrators():
+        calls.append(chat_id)
+        return [SimpleNamespace(user=SimpleNamespace(id=1), status="creator")]
+
+    return SimpleNamespace(id=chat_id, get_administrators=get_administrators)
+
+
+def test_admins_are_cached():
+    calls = []
+    assert list(chat_status.get_chat_admins(chat(-100, calls))) == [1]
+    chat_status.get_chat_admins(chat(-100, calls))
+    assert calls == [-100]
+    assert not chat_status.ADMIN_REFRESH_LOCKS
+
+    chat_status.invalidate_admin_cache(-100)
+    chat_status.get_chat_admins(chat(-100, calls))
+    assert calls == [-100, -100]
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(chat_status, "ADMIN_CACHE_SIZE", 3)
+    calls = []
+    for chat_id in range(10):
+        chat_status.get_chat_admins(chat(chat_id, calls))
+    assert list(chat_status.ADMIN_CACHE) == [7, 8, 9]
+
+
+def test_expired_chats_are_dropped():
+    calls = []
+    with mock.patch("time.monotonic", return_value=1000.0):
+        chat_status.get_chat_admins(chat(1, calls))
+    later = 1000.0 + chat_status.ADMIN_CACHE_TIME + 1
+    with mock.patch("time.monotonic", return_value=later):
+        chat_status.get_chat_admins(chat(2, calls))
+    assert list(chat_status.ADMIN_CACHE) == [2]
+
+
+def test_failed_refresh_forgets_its_lock():
+    def fail():
+        raise RuntimeError("telegram is down")
+
+    with pytest.raises(RuntimeError):
+        chat_status.get_chat_admins(SimpleNamespace(id=-100, get_administrators=fail))
+    assert not chat_status.ADMIN_REFRESH_LOCKS
+
+
+def test_private_chats_make_no_requests():
+    def fail(*args):
+        raise AssertionError("no request expected")
+
+    private = SimpleNamespace(
+        id=1, type="private", get_administrators=fail, get_member=fail
+    )
+    assert chat_status.get_admin_member(private, 1) is None
+    assert chat_status.is_user_admin(private, 1)
+    assert not chat_status.ADMIN_CACHE
@@ -0,0 +1,110 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, CommandHandler, MessageHandler, Filters
+
+from tg_bot import dispatcher
+from tg_bot.modules.helper_funcs.dispatch_index import DispatchIndex, _literal_prefix
+
+
+@pytest.mark.parametrize(
+    "pattern, prefix",
+    [
+        ("help_", "help_"),
+        (r"rm_warn\(", "rm_warn"),
+        ("stngs_(back|next)", "stngs_"),
+        ("help_[|]", "help_"),
+        ("ab*", "a"),
+        ("^help_", ""),
+        ("help_|stngs_", ""),
+        (r"help_\|x|stngs_", ""),
+        (re.compile("help_"), "help_"),
+        (re.compile("help_", re.IGNORECASE), ""),
+    ],
+)
+def test_literal_prefix(pattern, prefix):
+    assert _literal_prefix(pattern) == prefix
+
+
+def noop(update, context):
+    pass
+
+
+def fake_dispatcher(*groups):
+    return SimpleNamespace(
+        groups=list(range(len(groups))),
+        handlers=dict(enumerate(groups)),
+        bot=dispatcher.bot,
+    )
+
+
+def candidates(index, disp, update):
+    return [
+        [handler for handler, _ in handlers]
+        for _, handlers in index.candidates(disp, update)
+    ]
+
+
+def message_update(text, command=False):
+    entities = (
+        [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        if command
+        else []
+    )
+    return Update.de_json(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": -100, "type": "supergroup", "title": "Chat"},
+                "text": text,
+                "entities": entities,
+            },
+        },
+        dispatcher.bot,
+    )
+
+
+def callback_update(data):
+    return Update.de_json(
+        {
+            "update_id": 1,
+            "callback_query": {
+                "id": "1",
+                "from": {"id": 1, "is_bot": False, "first_name": "User"},
+                "chat_instance": "1",
+                "data": data,
+            },
+        },
+        dispatcher.bot,
+    )
+
+
+def test_alternation_keeps_every_branch():
+    either = CallbackQueryHandler(noop, pattern="help_|stngs_")
+    help_only = CallbackQueryHandler(noop, pattern="help_")
+    disp = fake_dispatcher([help_only, either])
+    index = DispatchIndex()
+
+    assert candidates(index, disp, callback_update("stngs_back")) == [[either]]
+    assert candidates(index, disp, callback_update("help_back")) == [
+        [help_only, either]
+    ]
+
+
+def test_commands_and_messages():
+    start = CommandHandler("start", noop)
+    text = MessageHandler(Filters.text, noop)
+    button = CallbackQueryHandler(noop, pattern="help_")
+    disp = fake_dispatcher([start, text, button], [text])
+    index = DispatchIndex()
+
+    assert candidates(index, disp, message_update("/start", True)) == [
+        [start, text],
+        [text],
+    ]
+    assert candidates(index, disp, message_update("/other", True)) == [[text], [text]]
+    assert candidates(index, disp, message_update("hello")) == [[text], [text]]
@@ -0,0 +1,35 @@
+import pytest
+
+from tg_bot.modules.helper_funcs.filters import contains_emoji, is_single_emoji
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("hello", False),
+        ("", False),
+        ("你好世界", False),
+        ("1 2 3 #", False),
+        ("hi \U0001f600", True),
+        ("\U0001f44d\U0001f3fd", True),
+        ("flag \U0001f1e9\U0001f1ea", True),
+        ("keycap 1️⃣", True),
+        ("a" * 4095 + "\U0001f600", True),
+    ],
+)
+def test_contains_emoji(text, expected):
+    assert contains_emoji(text) is expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("\U0001f600", True),
+        ("\U0001f44d\U0001f3fd", True),
+        ("❤️", True),
+        ("\U0001f600\U0001f600", False),
+        ("a", False),
+    ],
+)
+def test_is_single_emoji(text, expected):
+    assert is_single_emoji(text) is expected
@@ -0,0 +1,61 @@
+from queue import Queue
+from types import SimpleNamespace
+
+import pytest
+
+from tg_bot.modules.helper_funcs import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    return metrics.REGISTRY
+
+
+def test_metric_needs_samples(registry):
+    with pytest.raises(TypeError):
+        metrics.Metric("tg_bot_test", "Not a metric.")
+
+
+def test_counter_and_histogram(registry):
+    counter = metrics.Counter("tg_bot_test_total", "Test.", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    histogram = metrics.Histogram("tg_bot_test_seconds", "Test.", buckets=(0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(5)
+
+    assert metrics.render().splitlines() == [
+        "# HELP tg_bot_test_total Test.",
+        "# TYPE tg_bot_test_total counter",
+        'tg_bot_test_total{kind="a"} 3',
+        "# HELP tg_bot_test_seconds Test.",
+        "# TYPE tg_bot_test_seconds histogram",
+        'tg_bot_test_seconds_bucket{le="0.1"} 1',
+        'tg_bot_test_seconds_bucket{le="1"} 1',
+        'tg_bot_test_seconds_bucket{le="+Inf"} 2',
+        "tg_bot_test_seconds_count 2",
+        "tg_bot_test_seconds_sum 5.05",
+    ]
+
+
+def test_system_metrics_types(registry):
+    metrics._system_gauges(SimpleNamespace(update_queue=Queue()))
+    kinds = {metric.name: metric.kind for metric in registry}
+
+    assert kinds["tg_bot_update_queue_depth"] == "gauge"
+    assert kinds["tg_bot_limiter_chats"] == "gauge"
+    assert kinds["tg_bot_db_pool_checked_out"] == "gauge"
+    assert kinds["tg_bot_chat_cache_chats"] == "gauge"
+    for name in (
+        "tg_bot_limiter_dropped_total",
+        "tg_bot_db_pool_checkouts_total",
+        "tg_bot_db_pool_connects_total",
+        "tg_bot_db_pool_timeouts_total",
+        "tg_bot_chat_cache_hits_total",
+        "tg_bot_chat_cache_misses_total",
+        "tg_bot_chat_cache_evictions_total",
+    ):
+        assert kinds[name] == "counter"
+    # every one of them can be read
+    assert "tg_bot_db_pool_checkouts_total{engine=" in metrics.render()
@@ -0,0 +1,99 @@
+import random
+import re
+
+import pytest
+
+from tg_bot.modules.helper_funcs.triggers import TriggerMatcher
+
+
+def by_priority(triggers):
+    # The order cust_filters_sql keeps a chat's triggers in.
+    return sorted(set(triggers), key=lambda x: (-len(x), x))
+
+
+def loop_match(triggers, text):
+    """What reply_filter did before TriggerMatcher: one regex per trigger."""
+    for keyword in triggers:
+        pattern = (
+            r"( |^|[^\w])"
+            + re.escape(keyword).replace(r"\*", "(.*)").replace(r"\\(.*)", "*")
+            + r"( |$|[^\w])"
+        )
+        try:
+            if re.search(pattern, text, flags=re.IGNORECASE):
+                return keyword
+        except re.error:
+            # This used to raise on every message; the matcher skips it.
+            continue
+    return None
+
+
+@pytest.mark.parametrize(
+    "triggers, text, expected",
+    [
+        (["hi"], "hi there", "hi"),
+        (["hi"], "oh, HI!", "hi"),
+        (["hi"], "this", None),
+        (["hi"], "hi_there", None),
+        (["hi"], "high", None),
+        (["hi there", "hi"], "well hi there", "hi there"),
+        (["hi there", "hi"], "well hi", "hi"),
+        (["abc", "b"], "b abc", "abc"),
+        (["hit", "hi"], "hit", "hit"),
+        (["hi there", "hi"], "HI there", "hi there"),
+        (["hi", "hit"], "hit", "hit"),
+        (["abc", "xyz", "Hi"], "hi xyz abc", "abc"),
+        (["abcde", "*bot"], "robot abcde", "abcde"),
+        (["fix*me"], "please fix it for me", "fix*me"),
+        (["fix*me"], "please fix it", None),
+        (["*bot"], "robot", "*bot"),
+        (["2\\*2"], "is 2*2 four", "2\\*2"),
+        (["c++"], "I like c++ a lot", "c++"),
+        (["a.b"], "axb", None),
+        ([], "anything", None),
+        (["hi"], "", None),
+    ],
+)
+def test_matches(triggers, text, expected):
+    triggers = by_priority(triggers)
+    assert TriggerMatcher(triggers).match(text) == expected
+    assert loop_match(triggers, text) == expected
+
+
+def test_first_trigger_in_order_wins():
+    # Both match; whichever comes first in the chat's order is the one replied.
+    assert TriggerMatcher(["late", "early"]).match("early or late") == "late"
+    assert TriggerMatcher(["early", "late"]).match("early or late") == "early"
+    # A shorter trigger inside a longer one which both match.
+    assert TriggerMatcher(["hi", "hi there"]).match("hi there") == "hi"
+    assert TriggerMatcher(["hi", "hit"]).match("hit") == "hit"
+
+
+def test_malformed_trigger_is_skipped():
+    matcher = TriggerMatcher(["a\\\\*\\\\*", "ok"])
+    assert matcher.match("ok then") == "ok"
+
+
+@pytest.mark.parametrize(
+    "trigger_chars, text_chars",
+    [
+        ("abcde*\\ .!", "abcde.!"),
+        # Literal triggers only, in mixed case, which all go in the trie.
+        ("abAB .!-", "abAB.!-"),
+    ],
+)
+def test_same_as_the_loop(trigger_chars, text_chars):
+    rand = random.Random(0)
+    words = [
+        "".join(rand.choice(trigger_chars) for _ in range(rand.randint(1, 5)))
+        for _ in range(3000)
+    ]
+    for _ in range(200):
+        triggers = by_priority(rand.sample(words, 20))
+        matcher = TriggerMatcher(triggers)
+        for _ in range(50):
+            text = " ".join(
+                "".join(rand.choice(text_chars) for _ in range(rand.randint(1, 6)))
+                for _ in range(5)
+            )
+            assert matcher.match(text) == loop_match(triggers, text), (triggers, text)
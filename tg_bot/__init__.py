@@ -53,6 +53,11 @@ if ENV:
     CERT_PATH = os.environ.get("CERT_PATH")
 
     DB_URI = os.environ.get("DATABASE_URL")
+    DB_REPLICA_URI = os.environ.get("DATABASE_REPLICA_URL")
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
     LOAD = os.environ.get("LOAD", "").split()
     NO_LOAD = os.environ.get("NO_LOAD", "translation").split()
     DEL_CMDS = bool(os.environ.get("DEL_CMDS", False))
@@ -63,6 +68,14 @@ if ENV:
         "CAACAgEAAxkBAAEB0r1gErzeIbolC_dIrDPLKAPqSU1duAACLwADnjOcH-wxu-ehy6NRHgQ",
     )
     ALLOW_EXCL = os.environ.get("ALLOW_EXCL", False)
+    UPDATE_LOG = os.environ.get("UPDATE_LOG")
+    METRICS_PORT = int(os.environ.get("METRICS_PORT", 0)) or None
+    CACHE_SNAPSHOT = os.environ.get("CACHE_SNAPSHOT")
+    CHAT_CACHE_SIZE = int(os.environ.get("CHAT_CACHE_SIZE", 5000))
+    CHAT_CACHE_IDLE = int(os.environ.get("CHAT_CACHE_IDLE", 6 * 60 * 60))
+    HTTP_USER_AGENT = os.environ.get("HTTP_USER_AGENT")
+    CHAT_BURST = int(os.environ.get("CHAT_BURST", 10))
+    CHAT_RATE = float(os.environ.get("CHAT_RATE", 5))
 
 else:
     from tg_bot.config import Development as Config
@@ -97,6 +110,11 @@ else:
     CERT_PATH = Config.CERT_PATH
 
     DB_URI = Config.SQLALCHEMY_DATABASE_URI
+    DB_REPLICA_URI = Config.SQLALCHEMY_REPLICA_URI
+    DB_POOL_SIZE = Config.DB_POOL_SIZE
+    DB_MAX_OVERFLOW = Config.DB_MAX_OVERFLOW
+    DB_POOL_RECYCLE = Config.DB_POOL_RECYCLE
+    DB_POOL_TIMEOUT = Config.DB_POOL_TIMEOUT
     LOAD = Config.LOAD
     NO_LOAD = Config.NO_LOAD
     DEL_CMDS = Config.DEL_CMDS
@@ -104,6 +122,14 @@ else:
     WORKERS = Config.WORKERS
     BAN_STICKER = Config.BAN_STICKER
     ALLOW_EXCL = Config.ALLOW_EXCL
+    UPDATE_LOG = Config.UPDATE_LOG
+    METRICS_PORT = Config.METRICS_PORT
+    CACHE_SNAPSHOT = Config.CACHE_SNAPSHOT
+    CHAT_CACHE_SIZE = Config.CHAT_CACHE_SIZE
+    CHAT_CACHE_IDLE = Config.CHAT_CACHE_IDLE
+    HTTP_USER_AGENT = Config.HTTP_USER_AGENT
+    CHAT_BURST = Config.CHAT_BURST
+    CHAT_RATE = Config.CHAT_RATE
 
 
 updater = tg.Updater(TOKEN, workers=WORKERS)
@@ -28,14 +28,19 @@ from tg_bot import (
     URL,
     LOGGER,
     ALLOW_EXCL,
+    UPDATE_LOG,
+    METRICS_PORT,
 )
 
 # Needed to dynamically load modules
 # NOTE: Module order is not guaranteed, specify that in the config file!
 from tg_bot.modules import ALL_MODULES
+from tg_bot.modules.helper_funcs.dispatch_index import add_handler, remove_handler
 from tg_bot.modules.helper_funcs.process_update import process_update
 from tg_bot.modules.helper_funcs.chat_status import is_user_admin
 from tg_bot.modules.helper_funcs.misc import paginate_modules
+from tg_bot.modules.helper_funcs.update_log import start_update_log
+from tg_bot.modules.helper_funcs.metrics import start_metrics
 
 PM_START_TEXT = """
 Hi {}, my name is *{}*!
@@ -536,7 +541,7 @@ This will trigger blacklist on `a*bc` only.
     update.effective_message.reply_text(rstring, parse_mode=ParseMode.MARKDOWN)
 
 
-def main():
+def setup_dispatcher():
     start_handler = CommandHandler("start", start, run_async=True)
 
     help_handler = CommandHandler("help", get_help, run_async=True)
@@ -567,19 +572,41 @@ def main():
 
     # add antiflood processor
     Dispatcher.process_update = process_update
+    # keep the dispatch index in sync with handlers added at runtime
+    Dispatcher.add_handler = add_handler
+    Dispatcher.remove_handler = remove_handler
+
+    if UPDATE_LOG:
+        LOGGER.info("Recording updates to %s", UPDATE_LOG)
+        start_update_log(dispatcher, UPDATE_LOG)
+
+    # last, so every handler and patched method gets instrumented
+    if METRICS_PORT:
+        start_metrics(dispatcher, METRICS_PORT)
+
+
+def main():
+    setup_dispatcher()
 
     if WEBHOOK:
         LOGGER.info("Using webhooks.")
         updater.start_webhook(listen="127.0.0.1", port=PORT, url_path=TOKEN)
 
+        # chat_member updates keep the admin cache fresh, but aren't sent by default.
         if CERT_PATH:
-            updater.bot.set_webhook(url=URL + TOKEN, certificate=open(CERT_PATH, "rb"))
+            updater.bot.set_webhook(
+                url=URL + TOKEN,
+                certificate=open(CERT_PATH, "rb"),
+                allowed_updates=Update.ALL_TYPES,
+            )
         else:
-            updater.bot.set_webhook(url=URL + TOKEN)
+            updater.bot.set_webhook(url=URL + TOKEN, allowed_updates=Update.ALL_TYPES)
 
     else:
         LOGGER.info("Using long polling.")
-        updater.start_polling(timeout=15, read_latency=4)
+        updater.start_polling(
+            timeout=15, read_latency=4, allowed_updates=Update.ALL_TYPES
+        )
 
     updater.idle()
 
@@ -5,7 +5,7 @@ from typing import Optional
 from telegram import Message, Chat, Update, User, ChatPermissions
 from telegram import ParseMode
 from telegram.error import BadRequest
-from telegram.ext import CommandHandler, Filters
+from telegram.ext import ChatMemberHandler, CommandHandler, Filters
 from telegram.utils.helpers import escape_markdown, mention_html
 
 from tg_bot import dispatcher, CallbackContext, SUDO_USERS, LOGGER
@@ -15,6 +15,8 @@ from tg_bot.modules.helper_funcs.chat_status import (
     can_promote,
     user_admin,
     can_pin,
+    get_admin_member,
+    invalidate_admin_cache,
 )
 from tg_bot.modules.helper_funcs.extraction import extract_user_and_text, extract_user
 from tg_bot.modules.helper_funcs.perms import check_perms
@@ -50,7 +52,7 @@ def promote(update: Update, context: CallbackContext, check="restrict") -> str:
         return ""
 
     # set same perms as bot - bot can't assign higher perms than itself!
-    bot_member = chat.get_member(bot.id)
+    bot_member = get_admin_member(chat, bot.id)
 
     bot.promoteChatMember(
         chat_id,
@@ -67,6 +69,7 @@ def promote(update: Update, context: CallbackContext, check="restrict") -> str:
         can_pin_messages=bot_member.can_pin_messages,
         can_manage_voice_chats=bot_member.can_manage_voice_chats,
     )
+    invalidate_admin_cache(chat.id)
 
     text = ""
     if title:
@@ -167,6 +170,7 @@ def demote(update: Update, context: CallbackContext) -> str:
             can_promote_members=False,
             can_manage_voice_chats=False,
         )
+        invalidate_admin_cache(chat.id)
 
         message.reply_text(
             "Successfully demoted {}!".format(
@@ -347,6 +351,16 @@ def adminlist(update: Update, context: CallbackContext):
     msg.reply_text(text + members, parse_mode=ParseMode.MARKDOWN)
 
 
+def update_admin_cache(update: Update, context: CallbackContext):
+    member_update = update.chat_member or update.my_chat_member
+    statuses = ("administrator", "creator")
+    if (
+        member_update.old_chat_member.status in statuses
+        or member_update.new_chat_member.status in statuses
+    ):
+        invalidate_admin_cache(member_update.chat.id)
+
+
 def __chat_settings__(chat_id, user_id):
     return "You are *admin*: `{}`".format(
         dispatcher.bot.get_chat_member(chat_id, user_id).status
@@ -401,6 +415,10 @@ ADMINLIST_HANDLER = DisableAbleCommandHandler(
     ["adminlist", "staff"], adminlist, filters=Filters.chat_type.groups, run_async=True
 )
 
+ADMIN_CACHE_HANDLER = ChatMemberHandler(
+    update_admin_cache, ChatMemberHandler.ANY_CHAT_MEMBER
+)
+
 dispatcher.add_handler(PIN_HANDLER)
 dispatcher.add_handler(UNPIN_HANDLER)
 dispatcher.add_handler(UNPINALL_HANDLER)
@@ -408,3 +426,4 @@ dispatcher.add_handler(INVITE_HANDLER)
 dispatcher.add_handler(PROMOTE_HANDLER)
 dispatcher.add_handler(DEMOTE_HANDLER)
 dispatcher.add_handler(ADMINLIST_HANDLER)
+dispatcher.add_handler(ADMIN_CACHE_HANDLER)
@@ -22,7 +22,6 @@
 
 from typing import Optional
 from bs4 import BeautifulSoup
-from requests import get
 from yaml import load, Loader
 
 from telegram import Update, Message, ParseMode
@@ -30,10 +29,21 @@ from telegram import Update, Message, ParseMode
 from tg_bot import dispatcher, CallbackContext
 from tg_bot.modules.disable import DisableAbleCommandHandler
 from tg_bot.modules.github import getphh
+from tg_bot.modules.helper_funcs.device_catalogue import CATALOGUE
+from tg_bot.modules.helper_funcs.http_client import get, get_json
 
 
 GITHUB = "https://github.com"
-DEVICES_DATA = "https://raw.githubusercontent.com/androidtrackers/certified-android-devices/master/by_device.json"
+MIUI_DATA = "https://raw.githubusercontent.com/XiaomiFirmwareUpdater/miui-updates-tracker/master/data/latest.yml"
+
+# How long to cache each upstream, in seconds.
+FIRMWARE_TTL = 60 * 60
+MAGISK_TTL = 30 * 60
+RECOVERY_TTL = 60 * 60
+
+
+def load_yaml(content):
+    return load(content, Loader=Loader)
 
 
 def phh(update: Update, context: CallbackContext):
@@ -56,7 +66,7 @@ def magisk(update: Update, unused_context: CallbackContext):
         "Beta": "master/beta",
         "Canary": "master/canary",
     }.items():
-        data = get(url + branch + ".json").json()
+        data = get_json(url + branch + ".json", MAGISK_TTL)
         notes = (
             "https://topjohnwu.github.io/Magisk/releases/"
             + data["magisk"]["versionCode"]
@@ -89,21 +99,19 @@ def device(update: Update, context: CallbackContext):
         return
 
     device = " ".join(args)
-    db = get(DEVICES_DATA).json()
-    try:
-        reply = f"Search results for {device}:\n\n"
-        brand = db[device][0]["brand"]
-        name = db[device][0]["name"]
-        model = db[device][0]["model"]
-        codename = device
+    codenames = [device] if CATALOGUE.get(device) else CATALOGUE.search(device)
+    if not codenames:
+        msg.reply_text(f"Couldn't find info about {device}!")
+        return
+
+    reply = f"Search results for {device}:\n\n"
+    for codename in codenames:
+        entry = CATALOGUE.get(codename)[0]
         reply += (
-            f"<b>{brand} {name}</b>\n"
-            f"Model: <code>{model}</code>\n"
+            f"<b>{entry['brand']} {entry['name']}</b>\n"
+            f"Model: <code>{entry['model']}</code>\n"
             f"Codename: <code>{codename}</code>\n\n"
         )
-    except KeyError:
-        msg.reply_text(f"Couldn't find info about {device}!")
-        return
 
     msg.reply_text(reply, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
 
@@ -122,9 +130,7 @@ def getfw(update: Update, context: CallbackContext):
             return
 
         codename = args[1]
-        URL = "https://raw.githubusercontent.com/XiaomiFirmwareUpdater/miui-updates-tracker/master/data/latest.yml"
-
-        yaml_data = load(get(URL).content, Loader=Loader)
+        yaml_data = get(MIUI_DATA, FIRMWARE_TTL).parse(load_yaml)
         data = [i for i in yaml_data if codename in i["codename"]]
 
         if not data:
@@ -163,10 +169,12 @@ def getfw(update: Update, context: CallbackContext):
         temp, csc = args[1], args[2]
         model = f"sm-{temp}" if not temp.lower().startswith("sm-") else temp
         fota = get(
-            f"http://fota-cloud-dn.ospserver.net/firmware/{csc.upper()}/{model.upper()}/version.xml"
+            f"http://fota-cloud-dn.ospserver.net/firmware/{csc.upper()}/{model.upper()}/version.xml",
+            FIRMWARE_TTL,
         )
         test = get(
-            f"http://fota-cloud-dn.ospserver.net/firmware/{csc.upper()}/{model.upper()}/version.test.xml"
+            f"http://fota-cloud-dn.ospserver.net/firmware/{csc.upper()}/{model.upper()}/version.test.xml",
+            FIRMWARE_TTL,
         )
         if test.status_code != 200:
             msg.reply_text("Provide both valid model and CSC!")
@@ -244,19 +252,14 @@ def shrp(update: Update, context: CallbackContext):
 
     device = " ".join(args)
     sf = f"https://sourceforge.net/projects/shrp/files/{device}/"
-    url = get(sf)
+    url = get(sf, RECOVERY_TTL)
     if url.status_code == 404:
         msg.reply_text(f"Couldn't find a SHRP folder for {device}!")
         return
 
     reply = f"<b>Official SHRP Releases for {device}:</b>\n\n"
-    db = get(DEVICES_DATA).json()
-    try:
-        brand = db[device][0]["brand"]
-        name = db[device][0]["name"]
-        reply += f"<b>{brand} {name}</b>\n"
-    except KeyError:
-        pass
+    if entries := CATALOGUE.get(device):
+        reply += f"<b>{entries[0]['brand']} {entries[0]['name']}</b>\n"
 
     reply += f"<a href='{sf}'>Downloads</a>"
     msg.reply_text(
@@ -275,19 +278,14 @@ def twrp(update: Update, context: CallbackContext):
         return
 
     device = " ".join(args)
-    url = get(f"https://eu.dl.twrp.me/{device}/")
+    url = get(f"https://eu.dl.twrp.me/{device}/", RECOVERY_TTL)
     if url.status_code == 404:
         msg.reply_text(f"Couldn't find a TWRP folder for {device}!")
         return
 
     reply = f"<b>The latest Official TWRP release for {device}:</b>\n\n"
-    db = get(DEVICES_DATA).json()
-    try:
-        brand = db[device][0]["brand"]
-        name = db[device][0]["name"]
-        reply += f"<b>{brand} {name}</b>\n"
-    except KeyError:
-        pass
+    if entries := CATALOGUE.get(device):
+        reply += f"<b>{entries[0]['brand']} {entries[0]['name']}</b>\n"
 
     page = BeautifulSoup(url.content, "lxml")
     date = page.find("em").text.strip()
@@ -318,7 +316,8 @@ Nice commands are here to help you there!
  - /magisk - Gets the latest Magisk for Stable/Beta/Canary branch.
  - /phh `<count>`- Gets the phhusson's phh treble releases.\
  A higher count means an older release; latest (0) if count is not given.
- - /device `<codename>` - Gets basic information of an Android device for the given codename.
+ - /device `<codename>` - Gets basic information of an Android device for the given codename.\
+ If there is no such codename, lists the devices whose codename, brand, name or model starts with it.
  - /twrp `<codename>` - Gets the latest TWRP for an Android device for the given codename.
  - /shrp `<codename>` - Gets the latest SHRP for an Android device for the given codename.
  - /getfw `<S/M>` - Gets firmware info & download links for Samsung (S) or MIUI (M) devices.
@@ -33,7 +33,6 @@ def check_flood(update: Update, context: CallbackContext) -> str:
 
     # ignore admins
     if is_user_admin(chat, user.id):
-        sql.update_flood(chat.id, None)
         return ""
 
     should_ban = sql.update_flood(chat.id, user.id)
@@ -115,18 +114,29 @@ def set_flood(update: Update, context: CallbackContext) -> str:
                     "Anti-flood has to be either 0 (disabled) or least 1"
                 )
                 return ""
-            sql.set_flood(chat.id, amount)
+            seconds = None
+            if len(args) >= 2:
+                if not args[1].isdigit() or int(args[1]) < 1:
+                    message.reply_text("The time has to be a number of seconds.")
+                    return ""
+                seconds = int(args[1])
+
+            sql.set_flood(chat.id, amount, seconds)
+            seconds = sql.get_flood_time(chat.id)
             message.reply_text(
-                "Anti-flood has been updated and set to {}".format(amount)
+                "Anti-flood has been updated and set to {} messages in {} seconds".format(
+                    amount, seconds
+                )
             )
             return (
                 "<b>{}:</b>"
                 "\n#SETFLOOD"
                 "\n<b>Admin:</b> {}"
-                "\nSet anti-flood to <code>{}</code>.".format(
+                "\nSet anti-flood to <code>{}</code> messages in <code>{}</code> seconds.".format(
                     html.escape(chat.title),
                     mention_html(user.id, user.first_name),
                     amount,
+                    seconds,
                 )
             )
 
@@ -136,8 +146,8 @@ def set_flood(update: Update, context: CallbackContext) -> str:
             )
     else:
         message.reply_text(
-            "Give me an argument! Set a number to enforce against consecutive spams.\n"
-            "i.e `/setflood 5`: to control consecutive of messages.",
+            "Give me an argument! Set a number to enforce against spams.\n"
+            "i.e `/setflood 5 10`: no more than 5 messages in 10 seconds.",
             parse_mode=ParseMode.MARKDOWN,
         )
     return ""
@@ -148,6 +158,7 @@ def flood(update: Update, context: CallbackContext):
     chat = update.effective_chat  # type: Optional[Chat]
     msg = update.effective_message  # type: Optional[Message]
     limit = sql.get_flood_limit(chat.id)
+    seconds = sql.get_flood_time(chat.id)
     if limit == 0:
         update.effective_message.reply_text(
             "I'm not currently enforcing flood control!"
@@ -157,14 +168,14 @@ def flood(update: Update, context: CallbackContext):
         if soft_flood:
             msg.reply_text(
                 "I'm currently kicking users out if they send more than {} "
-                "consecutive messages. They will able to join again!".format(
-                    limit, parse_mode=ParseMode.MARKDOWN
+                "messages in {} seconds. They will able to join again!".format(
+                    limit, seconds
                 )
             )
         else:
             msg.reply_text(
                 "I'm currently banning users if they send more than {} "
-                "consecutive messages.".format(limit, parse_mode=ParseMode.MARKDOWN)
+                "messages in {} seconds.".format(limit, seconds)
             )
 
 
@@ -232,26 +243,29 @@ def __migrate__(old_chat_id, new_chat_id):
 
 def __chat_settings__(chat_id, user_id):
     limit = sql.get_flood_limit(chat_id)
+    seconds = sql.get_flood_time(chat_id)
     soft_flood = sql.get_flood_strength(chat_id)
     if limit == 0:
         return "*Not* currently enforcing flood control."
     if soft_flood:
-        return "Anti-flood is set to `{}` messages and *KICK* if exceeded.".format(
-            limit
+        return "Anti-flood is set to `{}` messages in `{}` seconds and *KICK* if exceeded.".format(
+            limit, seconds
         )
-    return "Anti-flood is set to `{}` messages and *BAN* if exceeded.".format(limit)
+    return "Anti-flood is set to `{}` messages in `{}` seconds and *BAN* if exceeded.".format(
+        limit, seconds
+    )
 
 
 __help__ = """
 You know how sometimes, people join, send 100 messages, and ruin your chat? With antiflood, that happens no more!
 
-Antiflood allows you to take action on users that send more than x messages in a row. Exceeding the set flood \
-will result in banning or kicking the user.
+Antiflood allows you to take action on users that send more than x messages in y seconds (10 by default). \
+Exceeding the set flood will result in banning or kicking the user.
 
  - /flood: Get the current flood control setting
 
 *Admin only:*
- - /setflood <int/'no'/'off'>: enables or disables flood control
+ - /setflood <int/'no'/'off'> \\[seconds]: enables or disables flood control. Without seconds, the current window (10 by default) is kept
  - /strongflood <on/yes/off/no>: If set to on, exceeding the flood limit will result in a ban. Else, will just kick.
 """
 
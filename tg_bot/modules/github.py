@@ -364,6 +364,11 @@ This module will help you to fetch GitHub releases.
 
 __mod_name__ = "GitHub"
 
+
+def __migrate__(old_chat_id, new_chat_id):
+    sql.migrate_chat(old_chat_id, new_chat_id)
+
+
 RELEASE_HANDLER = DisableAbleCommandHandler(
     "git", getRelease, run_async=True, admin_ok=True
 )
@@ -3,7 +3,7 @@ from io import BytesIO
 from typing import Optional
 
 from telegram import Message, Update, User, Chat, ParseMode
-from telegram.error import BadRequest, TelegramError
+from telegram.error import BadRequest
 from telegram.ext import CommandHandler, MessageHandler, Filters
 from telegram.utils.helpers import mention_html
 
@@ -18,6 +18,7 @@ from tg_bot import (
 )
 from tg_bot.modules.helper_funcs.chat_status import user_admin, is_user_admin
 from tg_bot.modules.helper_funcs.extraction import extract_user, extract_user_and_text
+from tg_bot.modules.helper_funcs.fanout import discard_progress, fan_out
 from tg_bot.modules.helper_funcs.filters import CustomFilters
 from tg_bot.modules.helper_funcs.misc import send_to_list
 from tg_bot.modules.sql.users_sql import get_all_chats
@@ -176,8 +177,7 @@ def gban(update: Update, context: CallbackContext):
     starting = "Initiating global ban for {}...".format(
         mention_html(user_chat.id, user_chat.first_name or "Deleted Account")
     )
-    keyboard = []
-    # message.reply_text(starting, reply_markup=keyboard, parse_mode=ParseMode.HTML)
+    status = message.reply_text(starting, parse_mode=ParseMode.HTML)
 
     banner = update.effective_user  # type: Optional[User]
     send_to_list(
@@ -200,28 +200,28 @@ def gban(update: Update, context: CallbackContext):
 
     sql.gban_user(user_id, user_chat.username or user_chat.first_name, reason)
 
-    chats = get_all_chats()
-    for chat in chats:
-        chat_id = chat.chat_id
-
-        # Check if this group has disabled gbans
-        if not sql.does_chat_gban(chat_id):
-            continue
-
-        try:
-            bot.ban_chat_member(chat_id, user_id)
-        except BadRequest as excp:
-            if excp.message not in GBAN_ERRORS:
-                message.reply_text("Could not gban due to: {}".format(excp.message))
-                send_to_list(
-                    bot,
-                    SUDO_USERS + SUPPORT_USERS,
-                    "Could not gban due to: {}".format(excp.message),
-                )
-                sql.ungban_user(user_id)
-                return
-        except TelegramError:
-            pass
+    # Check if the groups have disabled gbans
+    chats = [
+        chat.chat_id for chat in get_all_chats() if sql.does_chat_gban(chat.chat_id)
+    ]
+    discard_progress(("ungban", user_id))
+    result = fan_out(
+        chats,
+        lambda chat_id: bot.ban_chat_member(chat_id, user_id),
+        GBAN_ERRORS,
+        key=("gban", user_id),
+        status=status,
+        status_text=starting,
+    )
+    if result.fatal:
+        message.reply_text("Could not gban due to: {}".format(result.fatal))
+        send_to_list(
+            bot,
+            SUDO_USERS + SUPPORT_USERS,
+            "Could not gban due to: {}".format(result.fatal),
+        )
+        sql.ungban_user(user_id)
+        return
 
     send_to_list(
         bot,
@@ -231,7 +231,7 @@ def gban(update: Update, context: CallbackContext):
         ),
         html=True,
     )
-    message.reply_text("Person has been gbanned.")
+    message.reply_text("Person has been gbanned." + result.summary())
 
 
 def ungban(update: Update, context: CallbackContext):
@@ -254,7 +254,10 @@ def ungban(update: Update, context: CallbackContext):
 
     banner = update.effective_user  # type: Optional[User]
 
-    # message.reply_text("{}, will be unbanned globally.".format(user_chat.first_name or "Deleted Account"))
+    starting = "{}, will be unbanned globally.".format(
+        mention_html(user_chat.id, user_chat.first_name or "Deleted Account")
+    )
+    status = message.reply_text(starting, parse_mode=ParseMode.HTML)
 
     send_to_list(
         bot,
@@ -272,28 +275,29 @@ def ungban(update: Update, context: CallbackContext):
         html=True,
     )
 
-    chats = get_all_chats()
-    for chat in chats:
-        chat_id = chat.chat_id
-
-        # Check if this group has disabled gbans
-        if not sql.does_chat_gban(chat_id):
-            continue
-
-        try:
-            member = bot.get_chat_member(chat_id, user_id)
-            if member.status == "kicked":
-                bot.unban_chat_member(chat_id, user_id)
-
-        except BadRequest as excp:
-            if excp.message not in UNGBAN_ERRORS:
-                message.reply_text("Could not un-gban due to: {}".format(excp.message))
-                bot.send_message(
-                    OWNER_ID, "Could not un-gban due to: {}".format(excp.message)
-                )
-                return
-        except TelegramError:
-            pass
+    def unban(chat_id):
+        member = bot.get_chat_member(chat_id, user_id)
+        if member.status == "kicked":
+            bot.unban_chat_member(chat_id, user_id)
+
+    # Check if the groups have disabled gbans
+    chats = [
+        chat.chat_id for chat in get_all_chats() if sql.does_chat_gban(chat.chat_id)
+    ]
+    discard_progress(("gban", user_id))
+    result = fan_out(
+        chats,
+        unban,
+        UNGBAN_ERRORS,
+        key=("ungban", user_id),
+        calls=2,
+        status=status,
+        status_text=starting,
+    )
+    if result.fatal:
+        message.reply_text("Could not un-gban due to: {}".format(result.fatal))
+        bot.send_message(OWNER_ID, "Could not un-gban due to: {}".format(result.fatal))
+        return
 
     sql.ungban_user(user_id)
 
@@ -306,7 +310,7 @@ def ungban(update: Update, context: CallbackContext):
         html=True,
     )
 
-    message.reply_text("Person has been un-gbanned.")
+    message.reply_text("Person has been un-gbanned." + result.summary())
 
 
 def gbanlist(update: Update, context: CallbackContext):
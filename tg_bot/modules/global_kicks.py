@@ -8,6 +8,7 @@ from telegram.utils.helpers import mention_html
 
 from tg_bot import dispatcher, CallbackContext, OWNER_ID, SUDO_USERS, SUPPORT_USERS
 from tg_bot.modules.helper_funcs.extraction import extract_user, extract_user_and_text
+from tg_bot.modules.helper_funcs.fanout import fan_out
 from tg_bot.modules.helper_funcs.filters import CustomFilters
 from tg_bot.modules.helper_funcs.misc import send_to_list
 from tg_bot.modules.sql.users_sql import get_all_chats
@@ -84,30 +85,35 @@ def gkick(update: Update, context: CallbackContext):
         ),
         html=True,
     )
-    message.reply_text("Globally kicking user @{}".format(user_chat.username))
+    status_text = "Globally kicking user @{}".format(user_chat.username)
+    status = message.reply_text(status_text)
     sql.gkick_user(user_id, user_chat.username, 1)
-    for chat in chats:
-        try:
-            member = bot.get_chat_member(chat.chat_id, user_id)
-            if member.can_send_messages is False:
-                bot.unban_chat_member(
-                    chat.chat_id, user_id
-                )  # Unban_member = kick (and not ban)
-                bot.restrict_chat_member(
-                    chat.chat_id,
-                    user_id,
-                    permissions=ChatPermissions(can_send_messages=False),
-                )
-            else:
-                bot.unban_chat_member(chat.chat_id, user_id)
-        except BadRequest as excp:
-            if excp.message not in GKICK_ERRORS:
-                message.reply_text(
-                    "User cannot be Globally kicked because: {}".format(excp.message)
-                )
-                return
-        except TelegramError:
-            pass
+
+    def kick(chat_id):
+        member = bot.get_chat_member(chat_id, user_id)
+        if member.can_send_messages is False:
+            bot.unban_chat_member(chat_id, user_id)  # Unban_member = kick (and not ban)
+            bot.restrict_chat_member(
+                chat_id,
+                user_id,
+                permissions=ChatPermissions(can_send_messages=False),
+            )
+        else:
+            bot.unban_chat_member(chat_id, user_id)
+
+    result = fan_out(
+        [chat.chat_id for chat in chats],
+        kick,
+        GKICK_ERRORS,
+        key=("gkick", user_id),
+        calls=3,
+        status=status,
+        status_text=html.escape(status_text),
+    )
+    if result.fatal:
+        message.reply_text(
+            "User cannot be Globally kicked because: {}".format(result.fatal)
+        )
 
 
 def __user_info__(user_id):
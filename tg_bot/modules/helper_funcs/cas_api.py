@@ -1,22 +1,91 @@
 import json
 import datetime
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
 import requests
 
+from tg_bot import LOGGER
+
 VERSION = "1.3.3"
 CAS_QUERY_URL = "https://api.cas.chat/check?user_id="
+CAS_EXPORT_URL = "https://api.cas.chat/export.csv"
 DL_DIR = "./csvExports"
+EXPORT_FILE = os.path.join(DL_DIR, "export.csv")
+
+# (connect, read) timeouts for the CAS api, in seconds.
+TIMEOUT = (3, 5)
+# How long to trust a verdict of the api, in seconds.
+BANNED_TTL = 6 * 60 * 60
+NOT_BANNED_TTL = 30 * 60
+CACHE_SIZE = 10000
+# How often to download the full list of banned users, in seconds.
+EXPORT_INTERVAL = 60 * 60
+
+_session = requests.Session()
+_cache_lock = threading.Lock()
+# user_id -> (expiry, userdata), least recently used first
+_cache = OrderedDict()
+
+# Sorted ids of every CAS banned user, or None until an export is loaded.
+BANNED_IDS = None  # type: array
+_export_thread = None
 
 
 def get_user_data(user_id):
-    with requests.request("GET", CAS_QUERY_URL + str(user_id)) as userdata_raw:
-        return json.loads(userdata_raw.text)
+    """The api's answer for user_id, cached. Errors count as not banned, uncached."""
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        return {"ok": False}
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(user_id)
+        if cached and cached[0] > now:
+            _cache.move_to_end(user_id)
+            return cached[1]
+
+    try:
+        with _session.get(CAS_QUERY_URL + str(user_id), timeout=TIMEOUT) as resp:
+            userdata = json.loads(resp.text)
+    except (requests.RequestException, ValueError):
+        LOGGER.warning("Could not reach the CAS api to check %s", user_id)
+        return {"ok": False}
+
+    ttl = BANNED_TTL if isbanned(userdata) else NOT_BANNED_TTL
+    with _cache_lock:
+        _cache[user_id] = (now + ttl, userdata)
+        _cache.move_to_end(user_id)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return userdata
 
 
 def isbanned(userdata):
     return userdata["ok"]
 
 
+def in_export(user_id) -> bool:
+    banned = BANNED_IDS
+    index = bisect_left(banned, user_id)
+    return index < len(banned) and banned[index] == user_id
+
+
 def banchecker(user_id):
+    """
+    Whether user_id is CAS banned. Answered from the bulk export once it is
+    loaded, so joins don't wait on the api.
+    """
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        return False
+    if BANNED_IDS is not None:
+        return in_export(user_id)
     return isbanned(get_user_data(user_id))
 
 
@@ -42,3 +111,49 @@ def timeadded(user_id):
         )
     except:
         return None
+
+
+def load_export(path=EXPORT_FILE):
+    """Load a CAS export, one user id per line, into BANNED_IDS."""
+    global BANNED_IDS
+    with open(path) as export:
+        ids = {int(line) for line in map(str.strip, export) if line.isdigit()}
+    BANNED_IDS = array("q", sorted(ids))
+    LOGGER.info("Loaded %s CAS banned users from %s", len(BANNED_IDS), path)
+
+
+def download_export():
+    os.makedirs(DL_DIR, exist_ok=True)
+    with _session.get(CAS_EXPORT_URL, timeout=TIMEOUT, stream=True) as resp:
+        resp.raise_for_status()
+        with open(EXPORT_FILE + ".part", "wb") as export:
+            for chunk in resp.iter_content(64 * 1024):
+                export.write(chunk)
+    os.replace(EXPORT_FILE + ".part", EXPORT_FILE)
+    load_export()
+
+
+def __export_loop():
+    if os.path.exists(EXPORT_FILE):
+        try:
+            load_export()
+        except (OSError, ValueError):
+            LOGGER.exception("Could not load the saved CAS export.")
+
+    while True:
+        try:
+            download_export()
+        except (requests.RequestException, OSError, ValueError):
+            LOGGER.warning("Could not download the CAS export, using the api.")
+        time.sleep(EXPORT_INTERVAL)
+
+
+def start_export_download():
+    """
+    Keep BANNED_IDS up to date from a background thread. Called by the
+    welcome module, so merely importing this one makes no requests.
+    """
+    global _export_thread
+    if _export_thread is None:
+        _export_thread = threading.Thread(target=__export_loop, daemon=True)
+        _export_thread.start()
@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import List, Tuple
+
+from tg_bot import CHAT_BURST, CHAT_RATE
+
+# Every chat may send CHAT_BURST updates at once, then CHAT_RATE a second.
+LIMITER_SHARDS = 16
+# How often to forget chats whose bucket has refilled, in seconds.
+SWEEP_INTERVAL = 60
+
+
+class ChatLimiter:
+    """
+    A token bucket per chat, spread over shards with their own lock so
+    updates from different chats rarely wait on each other.
+
+    A bucket is [tokens, last update time, updates dropped]. Once a chat has
+    been quiet for burst / rate seconds its bucket is full again, which is the
+    same as not having one, so the sweep can forget it.
+    """
+
+    def __init__(
+        self,
+        burst: int = CHAT_BURST,
+        rate: float = CHAT_RATE,
+        shards: int = LIMITER_SHARDS,
+    ):
+        self.burst = burst
+        self.rate = rate
+        self.idle = burst / rate
+        self._buckets = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        # updates dropped since start, per shard and counted under its lock
+        self._dropped = [0] * shards
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL
+
+    def allow(self, chat_id: int) -> bool:
+        now = time.monotonic()
+        if now > self._next_sweep:
+            self._next_sweep = now + SWEEP_INTERVAL
+            self.sweep(now)
+
+        shard = chat_id % len(self._buckets)
+        buckets = self._buckets[shard]
+        with self._locks[shard]:
+            bucket = buckets.get(chat_id)
+            if bucket is None:
+                buckets[chat_id] = [self.burst - 1, now, 0]
+                return True
+
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return True
+
+            bucket[0] = tokens
+            bucket[2] += 1
+            self._dropped[shard] += 1
+            return False
+
+    @property
+    def total_dropped(self) -> int:
+        return sum(self._dropped)
+
+    def sweep(self, now: float = None):
+        now = now or time.monotonic()
+        for buckets, lock in zip(self._buckets, self._locks):
+            with lock:
+                idle = [
+                    chat_id
+                    for chat_id, bucket in buckets.items()
+                    if now - bucket[1] > self.idle
+                ]
+                for chat_id in idle:
+                    del buckets[chat_id]
+
+    def dropped(self, limit: int = 10) -> List[Tuple[int, int]]:
+        """The chats with the most dropped updates, among recently active ones."""
+        counts = []
+        for buckets, lock in zip(self._buckets, self._locks):
+            with lock:
+                counts.extend(
+                    (chat_id, bucket[2])
+                    for chat_id, bucket in buckets.items()
+                    if bucket[2]
+                )
+        return sorted(counts, key=lambda item: -item[1])[:limit]
+
+    def __len__(self):
+        return sum(len(buckets) for buckets in self._buckets)
+
+
+CHAT_LIMITER = ChatLimiter()
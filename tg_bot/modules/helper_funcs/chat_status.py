@@ -1,13 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
-from typing import Optional
+from typing import Dict, Optional
 
 from telegram import User, Chat, ChatMember, Update
 
 from tg_bot import CallbackContext, DEL_CMDS, SUDO_USERS, WHITELIST_USERS
 
+# How long a chat's admin list is trusted before asking telegram again.
+ADMIN_CACHE_TIME = 10 * 60
+# How many chats' admin lists to keep, the ones refreshed longest ago go first.
+ADMIN_CACHE_SIZE = 5000
+
+# chat_id -> (expiry, {user_id: ChatMember}), soonest to expire first
+ADMIN_CACHE = OrderedDict()
+ADMIN_CACHE_LOCK = threading.Lock()
+# chat_id -> lock of chats being refreshed, so concurrent misses share one request
+ADMIN_REFRESH_LOCKS = {}
+
+
+def get_chat_admins(chat: Chat) -> Dict[int, ChatMember]:
+    cached = ADMIN_CACHE.get(chat.id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    with ADMIN_CACHE_LOCK:
+        refresh_lock = ADMIN_REFRESH_LOCKS.setdefault(chat.id, threading.Lock())
+
+    try:
+        with refresh_lock:
+            # Someone else may have refreshed it while we were waiting.
+            cached = ADMIN_CACHE.get(chat.id)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+
+            admins = {admin.user.id: admin for admin in chat.get_administrators()}
+            _cache_admins(chat.id, admins)
+            return admins
+    finally:
+        with ADMIN_CACHE_LOCK:
+            if ADMIN_REFRESH_LOCKS.get(chat.id) is refresh_lock:
+                del ADMIN_REFRESH_LOCKS[chat.id]
+
+
+def _cache_admins(chat_id: int, admins: Dict[int, ChatMember]):
+    now = time.monotonic()
+    with ADMIN_CACHE_LOCK:
+        ADMIN_CACHE[chat_id] = (now + ADMIN_CACHE_TIME, admins)
+        ADMIN_CACHE.move_to_end(chat_id)
+        while ADMIN_CACHE and (
+            len(ADMIN_CACHE) > ADMIN_CACHE_SIZE
+            or next(iter(ADMIN_CACHE.values()))[0] <= now
+        ):
+            ADMIN_CACHE.popitem(last=False)
+
+
+def invalidate_admin_cache(chat_id: int):
+    with ADMIN_CACHE_LOCK:
+        ADMIN_CACHE.pop(chat_id, None)
+
+
+def get_admin_member(chat: Chat, user_id: int) -> Optional[ChatMember]:
+    """
+    Get the ChatMember of an admin from the cached admin list.
+
+    :return: None if the user is not an admin of the chat, or if it's a private
+        chat - those have no admins, callers allow everything there instead.
+    """
+    if chat.type == "private":
+        return None
+    return get_chat_admins(chat).get(user_id)
+
 
 def can_delete(chat: Chat, bot_id: int) -> bool:
-    return chat.get_member(bot_id).can_delete_messages
+    bot_member = get_admin_member(chat, bot_id)
+    return bool(bot_member and bot_member.can_delete_messages)
 
 
 def is_user_ban_protected(chat: Chat, user_id: int, member: ChatMember = None) -> bool:
@@ -20,7 +88,7 @@ def is_user_ban_protected(chat: Chat, user_id: int, member: ChatMember = None) -
         return True
 
     if not member:
-        member = chat.get_member(user_id)
+        return get_admin_member(chat, user_id) is not None
     return member.status in ("administrator", "creator")
 
 
@@ -33,7 +101,7 @@ def is_user_admin(chat: Chat, user_id: int, member: ChatMember = None) -> bool:
         return True
 
     if not member:
-        member = chat.get_member(user_id)
+        return get_admin_member(chat, user_id) is not None
     return member.status in ("administrator", "creator")
 
 
@@ -42,7 +110,7 @@ def is_bot_admin(chat: Chat, bot_id: int, bot_member: ChatMember = None) -> bool
         return True
 
     if not bot_member:
-        bot_member = chat.get_member(bot_id)
+        return get_admin_member(chat, bot_id) is not None
     return bot_member.status in ("administrator", "creator")
 
 
@@ -69,7 +137,8 @@ def can_pin(func):
     @wraps(func)
     def pin_rights(update: Update, context: CallbackContext, *args, **kwargs):
         bot = context.bot
-        if update.effective_chat.get_member(bot.id).can_pin_messages:
+        bot_member = get_admin_member(update.effective_chat, bot.id)
+        if bot_member and bot_member.can_pin_messages:
             return func(update, context, *args, **kwargs)
         update.effective_message.reply_text(
             "I can't pin messages here! " "Make sure I'm admin and can pin messages."
@@ -82,7 +151,8 @@ def can_promote(func):
     @wraps(func)
     def promote_rights(update: Update, context: CallbackContext, *args, **kwargs):
         bot = context.bot
-        if update.effective_chat.get_member(bot.id).can_promote_members:
+        bot_member = get_admin_member(update.effective_chat, bot.id)
+        if bot_member and bot_member.can_promote_members:
             return func(update, context, *args, **kwargs)
         update.effective_message.reply_text(
             "I can't promote/demote people here! "
@@ -96,7 +166,8 @@ def can_restrict(func):
     @wraps(func)
     def promote_rights(update: Update, context: CallbackContext, *args, **kwargs):
         bot = context.bot
-        if update.effective_chat.get_member(bot.id).can_restrict_members:
+        bot_member = get_admin_member(update.effective_chat, bot.id)
+        if bot_member and bot_member.can_restrict_members:
             return func(update, context, *args, **kwargs)
         update.effective_message.reply_text(
             "I can't restrict people here! "
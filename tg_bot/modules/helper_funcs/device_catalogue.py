@@ -0,0 +1,95 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from requests import RequestException
+
+from tg_bot import LOGGER
+from tg_bot.modules.helper_funcs.http_client import get_json
+
+DEVICES_DATA = "https://raw.githubusercontent.com/androidtrackers/certified-android-devices/master/by_device.json"
+# How long the downloaded catalogue is good for, and how often to check
+# whether it has expired, in seconds.
+DEVICES_TTL = 6 * 60 * 60
+REFRESH_INTERVAL = 60 * 60
+SEARCH_LIMIT = 10
+
+
+class DeviceCatalogue:
+    """
+    The certified android devices, by codename, with a sorted index of
+    search keys for prefix search.
+
+    Every codename, brand, model and "brand name" is indexed lowercased,
+    once from each word on, so "s10" finds the "Galaxy S10" as well.
+    """
+
+    def __init__(self):
+        self.devices = {}  # type: Dict[str, List[dict]]
+        # sorted (search key, codename)
+        self._keys = []
+        self._source = None
+        self._lock = threading.Lock()
+
+    def load(self, devices: Dict[str, List[dict]]):
+        if devices is self._source:
+            return
+
+        keys = set()
+        for codename, entries in devices.items():
+            keys.add((codename.lower(), codename))
+            for entry in entries:
+                brand = entry.get("brand") or ""
+                name = entry.get("name") or ""
+                for text in (f"{brand} {name}", entry.get("model") or ""):
+                    words = text.lower().split()
+                    for i in range(len(words)):
+                        keys.add((" ".join(words[i:]), codename))
+
+        with self._lock:
+            self._keys = sorted(keys)
+            self.devices = devices
+            self._source = devices
+        LOGGER.info("Indexed %s android devices.", len(devices))
+
+    def refresh(self):
+        self.load(get_json(DEVICES_DATA, DEVICES_TTL))
+
+    def get(self, codename: str) -> Optional[List[dict]]:
+        if not self.devices:
+            self.refresh()
+        return self.devices.get(codename) or self.devices.get(codename.lower())
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[str]:
+        """Codenames of the devices with a search key starting with query."""
+        if not self.devices:
+            self.refresh()
+
+        query = " ".join(query.lower().split())
+        keys = self._keys
+        found = []
+        index = bisect_left(keys, (query, ""))
+        while index < len(keys) and keys[index][0].startswith(query):
+            codename = keys[index][1]
+            if codename not in found:
+                found.append(codename)
+                if len(found) == limit:
+                    break
+            index += 1
+        return found
+
+
+CATALOGUE = DeviceCatalogue()
+
+
+def __refresh_loop():
+    while True:
+        try:
+            CATALOGUE.refresh()
+        except (RequestException, ValueError):
+            LOGGER.warning("Could not refresh the android device catalogue.")
+        time.sleep(REFRESH_INTERVAL)
+
+
+threading.Thread(target=__refresh_loop, daemon=True).start()
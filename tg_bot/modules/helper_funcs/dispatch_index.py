@@ -0,0 +1,209 @@
+import re
+import threading
+from typing import List, Optional, Tuple
+
+from telegram import MessageEntity, Update
+from telegram.ext import (
+    CallbackQueryHandler,
+    ChatMemberHandler,
+    CommandHandler,
+    Handler,
+    MessageHandler,
+    PrefixHandler,
+)
+from telegram.ext.dispatcher import Dispatcher
+
+# Characters which end the literal start of a regex.
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+MESSAGE = "message"
+CHANNEL_POST = "channel_post"
+CALLBACK_QUERY = "callback_query"
+CHAT_MEMBER = "chat_member"
+OTHER = "other"
+
+# (group, [(handler, callback data prefix)]) for each group with candidates
+Candidates = List[Tuple[int, List[Tuple[Handler, Optional[str]]]]]
+
+
+def _has_alternation(pattern: str) -> bool:
+    """Whether pattern has a `|` outside of any group or character set."""
+    depth = 0
+    in_set = escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_set:
+            in_set = char != "]"
+        elif char == "[":
+            in_set = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def _literal_prefix(pattern) -> str:
+    """The text every callback data matching `pattern` must start with."""
+    if isinstance(pattern, re.Pattern):
+        if pattern.flags & re.IGNORECASE:
+            return ""
+        pattern = pattern.pattern
+    # Each alternative may start differently.
+    if _has_alternation(pattern):
+        return ""
+    prefix = ""
+    for char in pattern:
+        if char in _REGEX_META:
+            # A quantifier makes the char before it optional.
+            if char in "*?{":
+                prefix = prefix[:-1]
+            break
+        prefix += char
+    return prefix
+
+
+def _handler_kinds(handler: Handler):
+    """The update kinds handler can match, and the commands it answers to."""
+    if isinstance(handler, CommandHandler) and not isinstance(handler, PrefixHandler):
+        # CommandHandler only looks at message and edited_message.
+        return {MESSAGE}, handler.command
+    if isinstance(handler, MessageHandler):
+        return {MESSAGE, CHANNEL_POST}, None
+    if isinstance(handler, CallbackQueryHandler):
+        return {CALLBACK_QUERY}, None
+    if isinstance(handler, ChatMemberHandler):
+        return {CHAT_MEMBER}, None
+    return {MESSAGE, CHANNEL_POST, CALLBACK_QUERY, CHAT_MEMBER, OTHER}, None
+
+
+def update_kind(update: Update) -> str:
+    if update.message or update.edited_message:
+        return MESSAGE
+    if update.channel_post or update.edited_channel_post:
+        return CHANNEL_POST
+    if update.callback_query:
+        return CALLBACK_QUERY
+    if update.chat_member or update.my_chat_member:
+        return CHAT_MEMBER
+    return OTHER
+
+
+class DispatchIndex:
+    """
+    The handlers of each group which can possibly match an update, so
+    process_update doesn't have to call check_update on all of them.
+
+    Candidate lists are built per (update kind, command) on first use and
+    keep the dispatcher's handler order. Any other command than the ones
+    registered, or a message without one, shares the None entry, which
+    holds no CommandHandlers at all. Callback query handlers carry the
+    literal start of their pattern, checked against the callback data.
+    """
+
+    def __init__(self):
+        # (update kind, command) -> Candidates
+        self._candidates = {}
+        self._commands = None
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._candidates = {}
+            self._commands = None
+
+    def _build(self, dispatcher: Dispatcher, kind: str, command: Optional[str]):
+        candidates = []
+        for group in dispatcher.groups:
+            handlers = []
+            for handler in dispatcher.handlers[group]:
+                kinds, commands = _handler_kinds(handler)
+                if kind not in kinds:
+                    continue
+                if commands is not None and command not in commands:
+                    continue
+                prefix = None
+                if isinstance(handler, CallbackQueryHandler) and isinstance(
+                    handler.pattern, (str, re.Pattern)
+                ):
+                    prefix = _literal_prefix(handler.pattern)
+                handlers.append((handler, prefix))
+            if handlers:
+                candidates.append((group, handlers))
+        return candidates
+
+    def _command(self, dispatcher: Dispatcher, update: Update) -> Optional[str]:
+        # Mirrors the parsing done by CommandHandler.check_update.
+        message = update.effective_message
+        if not (
+            message.entities
+            and message.entities[0].type == MessageEntity.BOT_COMMAND
+            and message.entities[0].offset == 0
+            and message.text
+        ):
+            return None
+
+        command_parts = message.text[1 : message.entities[0].length].split("@")
+        command = command_parts[0].lower()
+        if (
+            len(command_parts) > 1
+            and command_parts[1].lower() != dispatcher.bot.username.lower()
+        ):
+            return None
+
+        if self._commands is None:
+            self._commands = {
+                name
+                for handlers in dispatcher.handlers.values()
+                for handler in handlers
+                if isinstance(handler, CommandHandler)
+                and not isinstance(handler, PrefixHandler)
+                for name in handler.command
+            }
+        return command if command in self._commands else None
+
+    def candidates(self, dispatcher: Dispatcher, update: Update) -> Candidates:
+        kind = update_kind(update)
+        command = self._command(dispatcher, update) if kind == MESSAGE else None
+        key = (kind, command)
+        if (found := self._candidates.get(key)) is None:
+            with self._lock:
+                if (found := self._candidates.get(key)) is None:
+                    found = self._candidates[key] = self._build(
+                        dispatcher, kind, command
+                    )
+
+        if kind != CALLBACK_QUERY:
+            return found
+
+        data = update.callback_query.data
+        matching = []
+        for group, handlers in found:
+            handlers = [
+                (handler, prefix)
+                for handler, prefix in handlers
+                if not prefix or (isinstance(data, str) and data.startswith(prefix))
+            ]
+            if handlers:
+                matching.append((group, handlers))
+        return matching
+
+
+DISPATCH_INDEX = DispatchIndex()
+_add_handler = Dispatcher.add_handler
+_remove_handler = Dispatcher.remove_handler
+
+
+def add_handler(self, handler, *args, **kwargs):
+    _add_handler(self, handler, *args, **kwargs)
+    DISPATCH_INDEX.clear()
+
+
+def remove_handler(self, handler, *args, **kwargs):
+    _remove_handler(self, handler, *args, **kwargs)
+    DISPATCH_INDEX.clear()
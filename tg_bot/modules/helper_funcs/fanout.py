@@ -0,0 +1,185 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Optional
+
+from telegram import Message, ParseMode
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+# Telegram allows about 30 api calls a second per bot, across all chats.
+GLOBAL_RATE = 30
+FANOUT_WORKERS = 8
+# How often to edit the status message, in seconds.
+PROGRESS_INTERVAL = 5
+# How long an interrupted fan out can be resumed for, in seconds. After that
+# the next fan out with its key starts over.
+RESUME_WINDOW = 30 * 60
+
+# key -> (expiry, chat ids already handled by an interrupted fan out)
+INTERRUPTED = {}
+INTERRUPTED_LOCK = threading.Lock()
+
+
+class RateLimiter:
+    """Hand out evenly spaced api call slots, shared by every thread."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, calls: int = 1):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + calls * self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds: float):
+        # Used on RetryAfter; nobody gets a slot until telegram lets us again.
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+LIMITER = RateLimiter(GLOBAL_RATE)
+
+
+class FanOutResult:
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        # how many of those done were done by an earlier, interrupted run
+        self.resumed = 0
+        # error message -> chat ids it happened in
+        self.errors = {}
+        # the unexpected error which stopped the fan out, if any
+        self.fatal = None
+
+    def summary(self) -> str:
+        if not self.errors:
+            return ""
+        return "\nSkipped {} chats:\n{}".format(
+            sum(len(chats) for chats in self.errors.values()),
+            "\n".join(
+                " - {}: {}".format(error, len(chats))
+                for error, chats in sorted(
+                    self.errors.items(), key=lambda item: -len(item[1])
+                )
+            ),
+        )
+
+
+def discard_progress(key):
+    with INTERRUPTED_LOCK:
+        INTERRUPTED.pop(key, None)
+
+
+def _resume(key) -> set:
+    with INTERRUPTED_LOCK:
+        expires, done = INTERRUPTED.pop(key, (0, set()))
+    return done if expires > time.monotonic() else set()
+
+
+def _interrupted(key, done: set):
+    now = time.monotonic()
+    with INTERRUPTED_LOCK:
+        for stale in [k for k, (expires, _) in INTERRUPTED.items() if expires <= now]:
+            del INTERRUPTED[stale]
+        INTERRUPTED[key] = (now + RESUME_WINDOW, done)
+
+
+def _report(status: Message, status_text: str, result: FanOutResult, started: float):
+    text = "{}\nProgress: {}/{} chats".format(status_text, result.done, result.total)
+    elapsed = time.monotonic() - started
+    if result.resumed < result.done < result.total:
+        text += ", about {}s left".format(
+            int((result.total - result.done) * elapsed / (result.done - result.resumed))
+        )
+    try:
+        status.edit_text(text, parse_mode=ParseMode.HTML)
+    except TelegramError:
+        pass
+
+
+def fan_out(
+    chat_ids: Iterable[str],
+    action: Callable[[str], None],
+    ignored_errors: Optional[Iterable[str]],
+    key=None,
+    calls: int = 1,
+    status: Message = None,
+    status_text: str = "",
+) -> FanOutResult:
+    """
+    Run action(chat_id) for every chat, FANOUT_WORKERS at a time, within the
+    global api rate limit.
+
+    A BadRequest whose message is in ignored_errors (or any other TelegramError)
+    only skips that chat; any other BadRequest stops the fan out and is stored
+    in result.fatal. With ignored_errors=None every error only skips its chat.
+    An interrupted fan out remembers its progress under `key` for
+    RESUME_WINDOW seconds, and the next fan out with the same key in that time
+    skips the chats already handled.
+
+    :param calls: how many api calls action makes per chat.
+    :param status: message to edit with the progress, prefixed by status_text.
+    """
+    chat_ids = list(chat_ids)
+    done = _resume(key) if key is not None else set()
+    result = FanOutResult(len(chat_ids))
+    result.done = result.resumed = len(done.intersection(chat_ids))
+
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def run(chat_id):
+        while not stop.is_set():
+            LIMITER.wait(calls)
+            error = None
+            try:
+                action(chat_id)
+            except RetryAfter as excp:
+                LIMITER.pause(excp.retry_after)
+                continue
+            except BadRequest as excp:
+                if ignored_errors is not None and excp.message not in ignored_errors:
+                    with lock:
+                        result.fatal = result.fatal or excp.message
+                    stop.set()
+                    return
+                error = excp.message
+            except TelegramError as excp:
+                error = excp.message
+
+            with lock:
+                done.add(chat_id)
+                result.done += 1
+                if error:
+                    result.errors.setdefault(error, []).append(chat_id)
+            return
+
+    pool = ThreadPoolExecutor(FANOUT_WORKERS)
+    started = last_report = time.monotonic()
+    try:
+        futures = [
+            pool.submit(run, chat_id) for chat_id in chat_ids if chat_id not in done
+        ]
+        for future in as_completed(futures):
+            future.result()
+            if status and time.monotonic() - last_report > PROGRESS_INTERVAL:
+                _report(status, status_text, result, started)
+                last_report = time.monotonic()
+    except BaseException:
+        stop.set()
+        if key is not None:
+            _interrupted(key, done)
+        raise
+    finally:
+        pool.shutdown()
+
+    if result.fatal and key is not None:
+        _interrupted(key, done)
+    elif status:
+        _report(status, status_text, result, started)
+    return result
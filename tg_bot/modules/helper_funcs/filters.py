@@ -1,9 +1,51 @@
+import re
+
 from telegram import Message
 from telegram.ext import MessageFilter
 from emoji import UNICODE_EMOJI
 
 from tg_bot import SUPPORT_USERS, SUDO_USERS
 
+# Newer emoji releases key UNICODE_EMOJI by language.
+EMOJIS = frozenset(UNICODE_EMOJI.get("en", UNICODE_EMOJI))
+
+
+def _emoji_lengths() -> dict:
+    """The first character of each emoji -> their lengths, longest first."""
+    lengths = {}
+    for emoji in EMOJIS:
+        lengths.setdefault(emoji[0], set()).add(len(emoji))
+    return {char: tuple(sorted(found, reverse=True)) for char, found in lengths.items()}
+
+
+EMOJI_LENGTHS = _emoji_lengths()
+# Every emoji has a non-ascii character; keycaps (eg 1️⃣) are the only ones
+# starting with an ascii one. So only these positions need a closer look.
+_ascii_starts = "".join(char for char in EMOJI_LENGTHS if char.isascii())
+EMOJI_START = re.compile(
+    r"[^\x00-\x7f]"
+    + (
+        r"|[{}](?=[^\x00-\x7f])".format(re.escape(_ascii_starts))
+        if _ascii_starts
+        else ""
+    )
+)
+
+
+def contains_emoji(text: str) -> bool:
+    for start in EMOJI_START.finditer(text):
+        index = start.start()
+        lengths = EMOJI_LENGTHS.get(start.group())
+        if lengths and any(
+            text[index : index + length] in EMOJIS for length in lengths
+        ):
+            return True
+    return False
+
+
+def is_single_emoji(text: str) -> bool:
+    return text in EMOJIS or text.replace("\ufe0f", "") in EMOJIS
+
 
 class CustomFilters:
     class _Supporters(MessageFilter):
@@ -44,23 +86,13 @@ class CustomFilters:
 
     class _HasEmoji(MessageFilter):
         def filter(self, message: Message):
-            text = message.text or ""
-            for emoji in UNICODE_EMOJI:
-                for letter in text:
-                    if letter == emoji:
-                        return True
-            return False
+            return bool(message.text and contains_emoji(message.text))
 
     has_emoji = _HasEmoji()
 
     class _IsEmoji(MessageFilter):
         def filter(self, message: Message):
-            if message.text and len(message.text) == 1:
-                for emoji in UNICODE_EMOJI:
-                    for letter in message.text:
-                        if letter == emoji:
-                            return True
-            return False
+            return bool(message.text and is_single_emoji(message.text))
 
     is_emoji = _IsEmoji()
 
@@ -1,8 +1,14 @@
-import urllib.request as url
 import json
 
+from requests import RequestException
+
+from tg_bot.modules.helper_funcs.http_client import get
+
 VERSION = "1.0.2"
-APIURL = "http://api.github.com/repos/"
+APIURL = "https://api.github.com/repos/"
+# How long to trust the releases of a repo before revalidating them, in
+# seconds. A revalidation answered with 304 doesn't count against the rate limit.
+RELEASES_TTL = 5 * 60
 
 
 def vercheck() -> str:
@@ -14,12 +20,41 @@ def vercheck() -> str:
 
 def getData(repoURL):
     try:
-        with url.urlopen(APIURL + repoURL + "/releases") as data_raw:
-            return json.loads(data_raw.read().decode())
-    except:
+        resp = get(APIURL + repoURL + "/releases", RELEASES_TTL)
+        if resp.status_code != 200:
+            return None
+        return resp.parse(parseReleases)
+    except (RequestException, KeyError, TypeError, ValueError):
         return None
 
 
+def parseReleases(content):
+    # Only what the getters below read; the rest of the api's answer is
+    # mostly urls, and is parsed once per download instead of once per call.
+    return [
+        {
+            # null for releases of deleted users
+            "author": {
+                "login": (release["author"] or {}).get("login"),
+                "html_url": (release["author"] or {}).get("html_url"),
+            },
+            "name": release["name"],
+            "published_at": release["published_at"],
+            "body": release["body"],
+            "assets": [
+                {
+                    "name": asset["name"],
+                    "browser_download_url": asset["browser_download_url"],
+                    "download_count": asset["download_count"],
+                    "size": asset["size"],
+                }
+                for asset in release["assets"]
+            ],
+        }
+        for release in json.loads(content)
+    ]
+
+
 def getReleaseData(repoData, index):
     return repoData[index] if index < len(repoData) else None
 
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tg_bot import HTTP_USER_AGENT, LOGGER, dispatcher
+
+CACHE_DIR = "./httpCache"
+# How many responses to keep in memory, least recently used go first.
+CACHE_SIZE = 256
+# How many responses, and bytes of them, to keep on disk. The oldest go first.
+DISK_CACHE_ENTRIES = 1024
+DISK_CACHE_BYTES = 64 * 1024 * 1024
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+
+# (connect, read) timeouts in seconds, per host.
+DEFAULT_TIMEOUT = (3, 10)
+TIMEOUTS = {
+    "raw.githubusercontent.com": (3, 20),
+    "api.urbandictionary.com": (3, 5),
+    "nominatim.openstreetmap.org": (3, 5),
+}
+# How long to keep serving a stale response after the upstream failed, in
+# seconds, before trying it again.
+ERROR_TTL = 60
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+_cache_lock = threading.Lock()
+# url -> CachedResponse
+_cache = OrderedDict()
+# url -> lock held while fetching it, so concurrent lookups make one request
+_fetching = {}
+
+
+class CachedResponse:
+    """
+    A response body with what is needed to revalidate it. Parsed forms of
+    the body are kept in `parsed`, keyed by parser, so a big json or yaml
+    document is only parsed once per download.
+    """
+
+    __slots__ = (
+        "url",
+        "status_code",
+        "content",
+        "etag",
+        "last_modified",
+        "expires",
+        "parsed",
+    )
+
+    def __init__(
+        self, url, status_code, content, etag=None, last_modified=None, expires=0.0
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+        self.parsed = {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", "replace")
+
+    def json(self):
+        return self.parse(json.loads)
+
+    def parse(self, parser: Callable):
+        if parser not in self.parsed:
+            self.parsed[parser] = parser(self.content)
+        return self.parsed[parser]
+
+
+def user_agent() -> str:
+    if HTTP_USER_AGENT:
+        return HTTP_USER_AGENT
+    try:
+        return f"tg_bot (https://t.me/{dispatcher.bot.username})"
+    except Exception:
+        # the username isn't known until telegram has been reached
+        return "tg_bot"
+
+
+def timeout_for(url: str):
+    return TIMEOUTS.get(urlsplit(url).hostname, DEFAULT_TIMEOUT)
+
+
+def _cache_path(url: str) -> str:
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode()).hexdigest())
+
+
+def _load(url: str) -> Optional[CachedResponse]:
+    path = _cache_path(url)
+    try:
+        with open(path + ".json") as meta_file:
+            meta = json.load(meta_file)
+        with open(path, "rb") as body:
+            content = body.read()
+    except (OSError, ValueError):
+        return None
+    # Wall clock on disk, monotonic in memory.
+    expires = time.monotonic() + meta["expires"] - time.time()
+    return CachedResponse(
+        url, 200, content, meta.get("etag"), meta.get("last_modified"), expires
+    )
+
+
+def _save(cached: CachedResponse):
+    path = _cache_path(cached.url)
+    meta = {
+        "url": cached.url,
+        "etag": cached.etag,
+        "last_modified": cached.last_modified,
+        "expires": time.time() + cached.expires - time.monotonic(),
+    }
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path + ".part", "wb") as body:
+            body.write(cached.content)
+        os.replace(path + ".part", path)
+        with open(path + ".json", "w") as meta_file:
+            json.dump(meta, meta_file)
+        _prune_disk()
+    except OSError:
+        LOGGER.warning("Could not write the http cache for %s", cached.url)
+
+
+def _prune_disk():
+    """Delete the oldest responses on disk until they fit the limits."""
+    # sha1 of the url -> (last written, bytes)
+    entries = {}
+    with os.scandir(CACHE_DIR) as files:
+        for entry in files:
+            key = entry.name.split(".", 1)[0]
+            stat = entry.stat()
+            written, size = entries.get(key, (0, 0))
+            entries[key] = (max(written, stat.st_mtime), size + stat.st_size)
+
+    count = len(entries)
+    total = sum(size for _, size in entries.values())
+    for key, (_, size) in sorted(entries.items(), key=lambda item: item[1][0]):
+        if count <= DISK_CACHE_ENTRIES and total <= DISK_CACHE_BYTES:
+            break
+        for suffix in ("", ".json", ".part"):
+            try:
+                os.remove(os.path.join(CACHE_DIR, key + suffix))
+            except FileNotFoundError:
+                pass
+        count -= 1
+        total -= size
+
+
+def _remember(cached: CachedResponse):
+    with _cache_lock:
+        _cache[cached.url] = cached
+        _cache.move_to_end(cached.url)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def get(url: str, ttl: float = 0, params: dict = None) -> CachedResponse:
+    """
+    GET url through the shared session. With a ttl the response is kept in
+    memory, and on disk if it was a 200, for that many seconds. Once it is
+    stale it is revalidated with If-None-Match/If-Modified-Since, and served
+    stale if the upstream can't be reached.
+
+    Raises requests.RequestException when there is nothing cached to fall
+    back on.
+    """
+    if params:
+        url = requests.Request("GET", url, params=params).prepare().url
+
+    with _cache_lock:
+        cached = _cache.get(url)
+        if cached and cached.expires > time.monotonic():
+            _cache.move_to_end(url)
+            return cached
+        lock = _fetching.setdefault(url, threading.Lock())
+
+    with lock:
+        try:
+            return _fetch(url, ttl)
+        finally:
+            with _cache_lock:
+                _fetching.pop(url, None)
+
+
+def _fetch(url: str, ttl: float) -> CachedResponse:
+    # Whoever held the lock before us may have just fetched it.
+    with _cache_lock:
+        cached = _cache.get(url)
+    if cached is None and ttl:
+        cached = _load(url)
+    now = time.monotonic()
+    if cached and cached.expires > now:
+        _remember(cached)
+        return cached
+
+    headers = {"User-Agent": user_agent()}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    try:
+        resp = _session.get(url, headers=headers, timeout=timeout_for(url))
+    except requests.RequestException:
+        if cached is None:
+            raise
+        LOGGER.warning("Could not reach %s, using the cached response.", url)
+        cached.expires = now + min(ttl, ERROR_TTL)
+        return cached
+
+    # Rate limits and server errors shouldn't replace a good response.
+    if resp.status_code in (403, 429) or resp.status_code >= 500:
+        if cached and cached.status_code == 200:
+            LOGGER.warning(
+                "%s answered %s, using the cached response.", url, resp.status_code
+            )
+            cached.expires = now + min(ttl, ERROR_TTL)
+            return cached
+    if resp.status_code == 304 and cached:
+        cached.expires = now + ttl
+    else:
+        cached = CachedResponse(
+            url,
+            resp.status_code,
+            resp.content,
+            resp.headers.get("ETag"),
+            resp.headers.get("Last-Modified"),
+            now + ttl,
+        )
+
+    if ttl and cached.status_code not in (403, 429) and cached.status_code < 500:
+        _remember(cached)
+        if cached.status_code == 200:
+            _save(cached)
+    return cached
+
+
+def get_json(url: str, ttl: float = 0, params: dict = None):
+    return get(url, ttl, params).json()
@@ -0,0 +1,347 @@
+import abc
+import functools
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, List, Tuple
+
+from sqlalchemy import event
+from telegram import Bot, Update
+from telegram.error import TelegramError
+from telegram.ext import Dispatcher, DispatcherHandlerStop
+
+from tg_bot import LOGGER
+
+# Upper bounds of the latency buckets, in seconds.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = (
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        pass
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    """
+    Counted with inc(), or for counts kept elsewhere read when scraped, like
+    a Gauge, from collect() returning [(label values, value)].
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=(), collect: Callable = None):
+        super().__init__(name, help_text, labels)
+        self.collect = collect
+        # label values -> count
+        self._values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        if self.collect:
+            values = self.collect()
+        else:
+            with self._lock:
+                values = sorted(self._values.items())
+        return [
+            f"{self.name}{_labels(self.labels, key)} {value}" for key, value in values
+        ]
+
+
+class Gauge(Metric):
+    """Read when scraped, from collect() returning [(label values, value)]."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), collect: Callable = None):
+        super().__init__(name, help_text, labels)
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labels, key)} {value}"
+            for key, value in self.collect()
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets=BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        # label values -> [count per bucket..., count, sum]
+        self._values = {}
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(label_values)
+            if counts is None:
+                counts = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(counts)) for key, counts in self._values.items())
+        lines = []
+        names = self.labels + ("le",)
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _labels(names, key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(names, key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {counts[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {counts[-2]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {counts[-1]}")
+        return lines
+
+
+REGISTRY = []  # type: List[Metric]
+
+HANDLER_SECONDS = Histogram(
+    "tg_bot_handler_seconds",
+    "Time spent in handler callbacks.",
+    ("module", "handler"),
+)
+HANDLER_ERRORS = Counter(
+    "tg_bot_handler_errors_total",
+    "Exceptions raised by handler callbacks.",
+    ("module", "handler"),
+)
+SQL_SECONDS = Histogram(
+    "tg_bot_sql_seconds", "Time spent in SQL statements.", ("engine", "statement")
+)
+API_SECONDS = Histogram(
+    "tg_bot_api_seconds", "Time spent in Bot API calls.", ("method",)
+)
+API_ERRORS = Counter(
+    "tg_bot_api_errors_total", "Failed Bot API calls.", ("method", "error")
+)
+UPDATE_LAG = Histogram(
+    "tg_bot_update_lag_seconds",
+    "Time from a message being sent to the bot processing it.",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+ASYNC_SCHEDULED = Counter(
+    "tg_bot_async_scheduled_total", "Callbacks handed to the run_async pool."
+)
+ASYNC_DONE = Counter(
+    "tg_bot_async_done_total", "Callbacks the run_async pool has finished."
+)
+
+
+def _timed_callback(callback: Callable) -> Callable:
+    module = callback.__module__.rsplit(".", 1)[-1]
+    name = getattr(callback, "__qualname__", repr(callback))
+
+    @functools.wraps(callback)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return callback(*args, **kwargs)
+        except DispatcherHandlerStop:
+            raise
+        except Exception:
+            HANDLER_ERRORS.inc(module, name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, module, name)
+
+    timed.metrics_timed = True
+    return timed
+
+
+def instrument_handlers(dispatcher: Dispatcher):
+    for handlers in dispatcher.handlers.values():
+        for handler in handlers:
+            callback = getattr(handler, "callback", None)
+            if callback and not getattr(callback, "metrics_timed", False):
+                handler.callback = _timed_callback(callback)
+
+
+def instrument_engine(engine, name: str):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        SQL_SECONDS.observe(time.perf_counter() - started, name, kind)
+
+
+def instrument_api():
+    post = Bot._post
+
+    @functools.wraps(post)
+    def timed_post(self, endpoint, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return post(self, endpoint, *args, **kwargs)
+        except TelegramError as excp:
+            # RetryAfter is how a 429 surfaces
+            API_ERRORS.inc(endpoint, type(excp).__name__)
+            raise
+        finally:
+            API_SECONDS.observe(time.perf_counter() - started, endpoint)
+
+    Bot._post = timed_post
+
+
+def instrument_dispatcher():
+    process_update = Dispatcher.process_update
+    run_async = Dispatcher.run_async
+
+    def observed_process_update(dispatcher, update):
+        if isinstance(update, Update) and update.effective_message:
+            message = update.effective_message
+            sent = message.edit_date or message.date
+            if sent:
+                UPDATE_LAG.observe(max(time.time() - sent.timestamp(), 0))
+        process_update(dispatcher, update)
+
+    def counted_run_async(dispatcher, func, *args, **kwargs):
+        @functools.wraps(func)
+        def run(*a, **kw):
+            try:
+                return func(*a, **kw)
+            finally:
+                ASYNC_DONE.inc()
+
+        ASYNC_SCHEDULED.inc()
+        return run_async(dispatcher, run, *args, **kwargs)
+
+    Dispatcher.process_update = observed_process_update
+    Dispatcher.run_async = counted_run_async
+
+
+def _system_gauges(dispatcher: Dispatcher):
+    from tg_bot.modules.helper_funcs.chat_limiter import CHAT_LIMITER
+    from tg_bot.modules.sql import pool_status
+    from tg_bot.modules.sql.chat_cache import CHAT_CACHES
+
+    Gauge(
+        "tg_bot_update_queue_depth",
+        "Updates waiting for the dispatcher thread.",
+        collect=lambda: [((), dispatcher.update_queue.qsize())],
+    )
+    Counter(
+        "tg_bot_limiter_dropped_total",
+        "Updates dropped by the per chat limiter.",
+        collect=lambda: [((), CHAT_LIMITER.total_dropped)],
+    )
+    Gauge(
+        "tg_bot_limiter_chats",
+        "Chats the limiter currently tracks.",
+        collect=lambda: [((), len(CHAT_LIMITER))],
+    )
+
+    def pool_stat(key):
+        return lambda: [((name,), pool[key]) for name, pool in pool_status().items()]
+
+    def cache_stat(key):
+        return lambda: [((cache.name,), cache.stats()[key]) for cache in CHAT_CACHES]
+
+    for key in ("checked_out", "overflow"):
+        Gauge(
+            f"tg_bot_db_pool_{key}",
+            f"Database pool connections {key.replace('_', ' ')}.",
+            ("engine",),
+            collect=pool_stat(key),
+        )
+    for key in ("checkouts", "connects", "timeouts"):
+        Counter(
+            f"tg_bot_db_pool_{key}_total",
+            f"Database pool {key}.",
+            ("engine",),
+            collect=pool_stat(key),
+        )
+    Gauge(
+        "tg_bot_chat_cache_chats",
+        "Chats held by each chat cache.",
+        ("cache",),
+        collect=cache_stat("chats"),
+    )
+    for key in ("hits", "misses", "evictions"):
+        Counter(
+            f"tg_bot_chat_cache_{key}_total",
+            f"Chat cache {key}.",
+            ("cache",),
+            collect=cache_stat(key),
+        )
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics(dispatcher: Dispatcher, port: int, host: str = "127.0.0.1"):
+    """Instrument handlers, SQL, the Bot API and the dispatcher, and serve /metrics."""
+    from tg_bot.modules.sql import ENGINE, READ_ENGINE
+
+    instrument_handlers(dispatcher)
+    instrument_engine(ENGINE, "primary")
+    if READ_ENGINE is not ENGINE:
+        instrument_engine(READ_ENGINE, "replica")
+    instrument_api()
+    instrument_dispatcher()
+    _system_gauges(dispatcher)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    LOGGER.info("Serving metrics on http://%s:%s/metrics", host, port)
+    return server
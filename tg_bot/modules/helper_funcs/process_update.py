@@ -18,15 +18,12 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
-import datetime
-
 from telegram import TelegramError, Update
 from telegram.ext.dispatcher import Dispatcher, DispatcherHandlerStop
 from telegram.utils.helpers import DEFAULT_FALSE
 
-
-CHATS_COUNT = {}
-CHATS_TIME = {}
+from tg_bot.modules.helper_funcs.chat_limiter import CHAT_LIMITER
+from tg_bot.modules.helper_funcs.dispatch_index import DISPATCH_INDEX
 
 
 def process_update(dispatcher: Dispatcher, update: Update):
@@ -39,32 +36,21 @@ def process_update(dispatcher: Dispatcher, update: Update):
             )
         return
 
-    now = datetime.datetime.utcnow()
     chat = update.effective_chat
 
     if not hasattr(chat, "id"):
         return
 
-    count = CHATS_COUNT.get(chat.id, 0)
-    time = CHATS_TIME.get(chat.id, now)
-    if now > time + datetime.timedelta(0, 2):
-        del CHATS_COUNT[chat.id]
-        del CHATS_TIME[chat.id]
-    else:
-        count += 1
-        CHATS_COUNT[chat.id] = count
-        CHATS_TIME[chat.id] = now
-
-    if count > 10:
+    if not CHAT_LIMITER.allow(chat.id):
         return
 
     context = None
     handled = False
     sync_modes = []
 
-    for group in dispatcher.groups:
+    for _, handlers in DISPATCH_INDEX.candidates(dispatcher, update):
         try:
-            for handler in dispatcher.handlers[group]:
+            for handler, _ in handlers:
                 check = handler.check_update(update)
                 if check is not None and check is not False:
                     if not context and dispatcher.use_context:
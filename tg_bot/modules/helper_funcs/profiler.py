@@ -0,0 +1,123 @@
+import inspect
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from telegram.ext import Dispatcher
+
+# Seconds between two samples of every thread.
+INTERVAL = 0.005
+# Samples whose innermost frame is one of these are threads waiting for work.
+IDLE_MODULES = ("threading", "queue", "selectors")
+
+
+class Profile:
+    """Collapsed stacks sampled from the dispatcher and its workers."""
+
+    def __init__(self):
+        # "handler;module:function;..." -> samples
+        self.stacks = Counter()  # type: Counter
+        self.samples = 0
+        self.busy = 0
+        self.seconds = 0.0
+
+    def collapsed(self) -> str:
+        """The stacks in the format flamegraph.pl and speedscope read."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def top(self, limit: int = 15) -> List[Tuple[str, int, int]]:
+        """The hottest functions, as (function, self samples, total samples)."""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames[1:]):
+                total[frame] += count
+        return [(frame, count, total[frame]) for frame, count in own.most_common(limit)]
+
+    def handlers(self) -> Counter:
+        found = Counter()
+        for stack, count in self.stacks.items():
+            found[stack.split(";", 1)[0]] += count
+        return found
+
+
+def _handler_names(dispatcher: Dispatcher) -> Dict[object, str]:
+    """The code object of every handler callback, and its name."""
+    names = {}
+    for handlers in dispatcher.handlers.values():
+        for handler in handlers:
+            callback = getattr(handler, "callback", None)
+            code = (
+                getattr(inspect.unwrap(callback), "__code__", None)
+                if callback
+                else None
+            )
+            if code is not None:
+                module = callback.__module__.rsplit(".", 1)[-1]
+                names[code] = f"{module}.{code.co_name}"
+    return names
+
+
+def _is_worker(thread: threading.Thread) -> bool:
+    return thread.name.startswith("Bot:") and (
+        ":worker:" in thread.name or thread.name.endswith(":dispatcher")
+    )
+
+
+def _label(code, labels: Dict[object, str]) -> str:
+    label = labels.get(code)
+    if label is None:
+        module = code.co_filename.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+        label = labels[code] = f"{module}:{code.co_name}"
+    return label
+
+
+def sample(
+    dispatcher: Dispatcher, seconds: float, interval: float = INTERVAL
+) -> Profile:
+    """
+    Sample the stacks of the dispatcher and worker threads for `seconds`.
+
+    Each stack is rooted at the handler callback it is running, or at
+    "(dispatcher)" for work outside of any handler. Idle threads are skipped.
+    """
+    profile = Profile()
+    handlers = _handler_names(dispatcher)
+    labels = {}  # type: Dict[object, str]
+    me = threading.get_ident()
+
+    started = time.monotonic()
+    deadline = started + seconds
+    while time.monotonic() < deadline:
+        threads = {
+            thread.ident: thread
+            for thread in threading.enumerate()
+            if thread.ident != me and _is_worker(thread)
+        }
+        for ident, frame in sys._current_frames().items():
+            if ident not in threads:
+                continue
+            profile.samples += 1
+            stack = []
+            handler = None
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_label(code, labels))
+                if code in handlers:
+                    handler = handlers[code]
+                frame = frame.f_back
+            if handler is None and stack[0].split(":", 1)[0] in IDLE_MODULES:
+                continue
+            profile.busy += 1
+            stack.append(handler or "(dispatcher)")
+            profile.stacks[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+
+    profile.seconds = time.monotonic() - started
+    return profile
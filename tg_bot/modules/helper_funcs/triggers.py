@@ -0,0 +1,152 @@
+import re
+from typing import List, Optional
+
+# Splits a trigger regex body into atoms: an escape sequence, the `*`
+# wildcard, a bare quantifier, or a single character.
+_ATOM_REGEX = re.compile(r"\\.|\(\?:\.\*\)|\*|.", flags=re.DOTALL)
+
+
+def trigger_body(trigger: str) -> str:
+    """
+    Build the regex body for a filter/blacklist/warnfilter trigger.
+
+    `*` acts as a wildcard and `\\*` as a literal asterisk. See /regexhelp.
+    """
+    return (
+        re.escape(trigger)
+        .replace(r"\*", "(.*)")
+        .replace(r"\\(.*)", "*")
+        .replace("(.*)", "(?:.*)")
+    )
+
+
+def trigger_pattern(trigger: str) -> str:
+    return r"( |^|[^\w])" + trigger_body(trigger) + r"( |$|[^\w])"
+
+
+_WORD = re.compile(r"\w")
+
+
+def _trie_regex(node: dict) -> str:
+    # The empty group marks the end of a trigger, see TriggerMatcher._groups.
+    branches = [
+        re.escape(char) + _trie_regex(child) for char, child in node.items() if char
+    ]
+    if None in node:
+        branches.append("()")
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:{})".format("|".join(branches))
+
+
+class TriggerMatcher:
+    """
+    Match a text against many triggers at once.
+
+    The result is the same as looping over the triggers in the given order and
+    returning the first one whose trigger_pattern matches. Literal triggers
+    are folded into a prefix trie compiled as a single regex, so the text is
+    scanned once no matter how many of them a chat has. Each place the trie
+    hits gives the longest trigger there, and any shorter one ending inside
+    it also matches when a non-word character follows it in that trigger;
+    which of those comes first is worked out up front, see _first. Triggers
+    with wildcards are checked one by one, only up to the best hit.
+    """
+
+    __slots__ = (
+        "triggers",
+        "_patterns",
+        "_combined",
+        "_groups",
+        "_first",
+        "_irregular",
+    )
+
+    def __init__(self, triggers: List[str]):
+        self.triggers = []
+        self._patterns = []
+        # Triggers the trie can't express, checked one by one.
+        self._irregular = []
+        trie = {}
+        literals = {}
+        for trigger in triggers:
+            try:
+                pattern = re.compile(trigger_pattern(trigger), flags=re.IGNORECASE)
+            except re.error:
+                # Malformed triggers (eg two escaped asterisks) can never match.
+                continue
+
+            index = len(self.triggers)
+            self.triggers.append(trigger)
+            self._patterns.append(pattern)
+
+            # Wildcards and quantifiers can overlap with other triggers in
+            # ways the trie can't tell apart, so only literal triggers go in,
+            # lowercased as the matching is case insensitive.
+            atoms = _ATOM_REGEX.findall(trigger_body(trigger))
+            literal = [atom[-1].lower() for atom in atoms]
+            if (
+                not atoms
+                or any(atom in ("*", "(?:.*)") for atom in atoms)
+                or any(len(char) != 1 for char in literal)
+            ):
+                self._irregular.append(index)
+                continue
+
+            node = trie
+            for char in literal:
+                node = node.setdefault(char, {})
+            node.setdefault(None, index)
+            literals.setdefault(node[None], literal)
+
+        self._combined = None
+        # capture group number -> index in self.triggers
+        self._groups = {}
+        # index of a trie trigger -> the first trigger which matches wherever
+        # it does: itself, or a shorter one ending inside it at a word boundary
+        self._first = {}
+        if trie:
+            # (?<!\w) and (?!\w) are the zero-width forms of the boundaries
+            # used by trigger_pattern.
+            self._combined = re.compile(
+                r"(?<!\w)" + _trie_regex(trie) + r"(?!\w)", flags=re.IGNORECASE
+            )
+            self._number_groups(trie)
+            for index, literal in literals.items():
+                first = index
+                node = trie
+                for char in literal:
+                    if None in node and not _WORD.match(char):
+                        first = min(first, node[None])
+                    node = node[char]
+                self._first[index] = first
+
+    def _number_groups(self, node: dict):
+        # Visit the trie in the same order _trie_regex emits the groups.
+        for atom, child in node.items():
+            if atom:
+                self._number_groups(child)
+        if None in node:
+            self._groups[len(self._groups) + 1] = node[None]
+
+    def match(self, text: str) -> Optional[str]:
+        if not text:
+            return None
+
+        best = None
+        if self._combined:
+            pos = 0
+            while found := self._combined.search(text, pos):
+                hit = self._first[self._groups[found.lastindex]]
+                if best is None or hit < best:
+                    best = hit
+                    if best == 0:
+                        break
+                pos = found.start() + 1
+
+        for i in self._irregular:
+            if best is not None and i > best:
+                break
+            if self._patterns[i].search(text):
+                return self.triggers[i]
+        return None if best is None else self.triggers[best]
@@ -0,0 +1,43 @@
+import atexit
+import gzip
+import json
+import threading
+from typing import Iterator
+
+from telegram import Update
+from telegram.ext import CallbackContext, Dispatcher, TypeHandler
+
+# Runs before every other group, and never stops the update.
+UPDATE_LOG_GROUP = -1000
+
+
+class UpdateLog:
+    """Append every update the bot receives to a gzipped JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def record(self, update: Update, _: CallbackContext):
+        line = json.dumps(update.to_dict(), separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def start_update_log(dispatcher: Dispatcher, path: str) -> UpdateLog:
+    log = UpdateLog(path)
+    dispatcher.add_handler(TypeHandler(Update, log.record), UPDATE_LOG_GROUP)
+    return log
+
+
+def read_updates(path: str) -> Iterator[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as updates:
+        for line in updates:
+            if line.strip():
+                yield json.loads(line)
@@ -306,10 +306,14 @@ def del_lockables(update: Update, context: CallbackContext):
     if int(user.id) in {777000, 1087968824}:  # 777000 is the telegram notification service bot ID.
         return  # Group channel notifications are sent via this bot. This adds exception to this userid
 
+    # Only the filters of the locked types need to run.
+    if not (locked := sql.get_lock_mask(chat.id)):
+        return
+
     for lockable, filter in LOCK_TYPES.items():
         if (
-            filter(update)
-            and sql.is_locked(chat.id, lockable)
+            locked & sql.LOCK_BITS[lockable]
+            and filter(update)
             and can_delete(chat, bot.id)
         ):
             if lockable == "bots":
@@ -349,12 +353,12 @@ def rest_handler(update: Update, context: CallbackContext):
     ):  # 777000 is the telegram notification service bot ID.
         return  # Group channel notifications are sent via this bot. This adds exception to this userid
 
+    if not (restricted := sql.get_restr_mask(chat.id)):
+        return
+
     for restriction, filter in RESTRICTION_TYPES.items():
-        if (
-            filter(update)
-            and sql.is_restr_locked(chat.id, restriction)
-            and can_delete(chat, bot.id)
-        ):
+        bits = sql.RESTR_BITS[restriction]
+        if restricted & bits == bits and filter(update) and can_delete(chat, bot.id):
             try:
                 msg.delete()
             except BadRequest as excp:
@@ -2,6 +2,7 @@ import html
 import random
 from typing import Optional
 
+from requests import RequestException
 from telegram import Message, Chat, Update, MessageEntity, ParseMode, Location
 from telegram.ext import CommandHandler, Filters
 from telegram.utils.helpers import escape_markdown, mention_html
@@ -18,8 +19,11 @@ from tg_bot.__main__ import STATS, USER_INFO, GDPR
 from tg_bot.modules.disable import DisableAbleCommandHandler
 from tg_bot.modules.helper_funcs.extraction import extract_user
 from tg_bot.modules.helper_funcs.filters import CustomFilters
+from tg_bot.modules.helper_funcs.http_client import get_json
 
-from geopy.geocoders import Nominatim
+GEOCODE_URL = "https://nominatim.openstreetmap.org/search"
+# How long to cache a geocoded place, in seconds.
+GEOCODE_TTL = 7 * 24 * 60 * 60
 
 RUN_STRINGS = (
     "Where do you think you're going?",
@@ -616,12 +620,15 @@ def gps(update: Update, context: CallbackContext):
         )
         return
     try:
-        geolocator = Nominatim(user_agent="hades")
         location = " ".join(args)
-        geoloc = geolocator.geocode(location)
+        geoloc = get_json(
+            GEOCODE_URL,
+            GEOCODE_TTL,
+            params={"q": location, "format": "json", "limit": 1},
+        )
         chat_id = update.effective_chat.id
-        lon = geoloc.longitude
-        lat = geoloc.latitude
+        lon = float(geoloc[0]["lon"])
+        lat = float(geoloc[0]["lat"])
         the_loc = Location(lon, lat)
         gm = "https://www.google.com/maps/search/{},{}".format(lat, lon)
         bot.send_location(chat_id, location=the_loc)
@@ -630,8 +637,12 @@ def gps(update: Update, context: CallbackContext):
             parse_mode=ParseMode.MARKDOWN,
             disable_web_page_preview=True,
         )
-    except AttributeError:
+    except IndexError:
         update.message.reply_text("I can't find that")
+    except (RequestException, ValueError):
+        update.message.reply_text(
+            "The location service isn't answering, try again later."
+        )
 
 
 __help__ = """
@@ -39,7 +39,7 @@ from tg_bot import dispatcher, CallbackContext, LOGGER
 from tg_bot.modules.disable import DisableAbleCommandHandler
 from tg_bot.modules.log_channel import loggable
 from tg_bot.modules.helper_funcs.chat_status import user_admin
-from tg_bot.modules.helper_funcs.misc import build_keyboard, revert_buttons
+from tg_bot.modules.helper_funcs.misc import revert_buttons
 from tg_bot.modules.helper_funcs.upstream.msg_types import parse_note_type
 
 WARNING = """
@@ -69,21 +69,17 @@ def get(bot, update, notename, show_none=True, no_format=False):
 
     # Seperate process to get a note for given ID.
     if notename.isdecimal():
-        if check := sql.get_note(chat.id, notename):
+        if note := sql.get_cached_note(chat.id, notename):
             msg.reply_text(WARNING.format(notename))
-            note = check
-        else:
-            note_list = sql.get_all_chat_notes(chat.id)
-            if note_list[int(notename) - 1]:
-                note = note_list[int(notename) - 1]
+        elif name := sql.get_note_name_by_id(chat.id, int(notename)):
+            note = sql.get_cached_note(chat.id, name)
     else:
-        note = sql.get_note(chat.id, notename)
+        note = sql.get_cached_note(chat.id, notename)
 
     if note:
         # If a replied msg, reply to that msg.
         reply = msg.reply_to_message or msg
         text = note.value
-        keyb = []
 
         if note.md_ver == 1:
             parseMode = ParseMode.MARKDOWN
@@ -92,14 +88,12 @@ def get(bot, update, notename, show_none=True, no_format=False):
         else:
             parseMode = ""
 
-        buttons = sql.get_buttons(chat.id, note.name)
         if no_format:
             parseMode = None
-            text += revert_buttons(buttons)
+            text += revert_buttons(note.buttons)
+            keyboard = InlineKeyboardMarkup([])
         else:
-            keyb = build_keyboard(buttons)
-
-        keyboard = InlineKeyboardMarkup(keyb)
+            keyboard = note.keyboard
 
         try:
             if note.msgtype in (sql.Types.BUTTON_TEXT, sql.Types.TEXT):
@@ -222,12 +216,8 @@ def clear(update: Update, context: CallbackContext):
         if check:
             msg.reply_text(WARNING.format(notename))
         # Search notename for given noteid.
-        else:
-            note_list = sql.get_all_chat_notes(chat.id)
-            if note_list[int(notename) - 1]:
-                notename = note_list[int(notename) - 1].name
-            else:
-                msg.reply_text("The note to clear couldn't be found.")
+        elif name := sql.get_note_name_by_id(chat.id, int(notename)):
+            notename = name
 
     if sql.rm_note(chat.id, notename):
         msg.reply_text(
@@ -300,18 +290,18 @@ def clearall(update: Update, context: CallbackContext):
 def list_notes(update: Update, context: CallbackContext):
     chat = update.effective_chat  # type: Optional[Chat]
     msg = update.effective_message  # type: Optional[Message]
-    note_list = sql.get_all_chat_notes(chat.id)
+    note_list = sql.get_note_names(chat.id)
     reply = "*Get notes* available in here\n" + "by adding the *ID* or *Name*\n"
     reply += "after doing `#` or `/get `\n\n"
     reply += "*ID*     *Name*\n"
     del_reply = reply
-    for count, note in enumerate(note_list, start=1):
+    for count, name in enumerate(note_list, start=1):
         if count < 10:
-            note_name = "`{}`\.      ".format(count) + "`{}`\n".format(note.name)
+            note_name = "`{}`\.      ".format(count) + "`{}`\n".format(name)
         if count >= 10 and count < 100:
-            note_name = "`{}`\.    ".format(count) + "`{}`\n".format(note.name)
+            note_name = "`{}`\.    ".format(count) + "`{}`\n".format(name)
         if count >= 100:
-            note_name = "`{}`\.  ".format(count) + "`{}`\n".format(note.name)
+            note_name = "`{}`\.  ".format(count) + "`{}`\n".format(name)
         if len(reply) + len(note_name) > MAX_MESSAGE_LENGTH:
             msg.reply_text(reply, parse_mode=ParseMode.MARKDOWN_V2)
             reply = ""
@@ -332,7 +322,7 @@ def __migrate__(old_chat_id, new_chat_id):
 
 
 def __chat_settings__(chat_id, user_id):
-    notes = sql.get_all_chat_notes(chat_id)
+    notes = sql.get_note_names(chat_id)
     return "There are `{}` notes in this chat".format(len(notes))
 
 
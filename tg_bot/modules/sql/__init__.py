@@ -1,16 +1,202 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from tg_bot import (
+    DB_URI,
+    DB_REPLICA_URI,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_TIMEOUT,
+)
+
+
+class PoolMetrics:
+    """Checkouts of a pool, and how long they waited for a connection."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        # Checkouts which got an already open connection.
+        return max(self.checkouts - self.connects, 0)
+
+    def connected(self):
+        with self._lock:
+            self.connects += 1
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+class MeteredPool:
+    """Mixed into a pool class to time its checkouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            self.metrics.record(time.monotonic() - started, timed_out=True)
+            raise
+        self.metrics.record(time.monotonic() - started)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
 
-from tg_bot import DB_URI
+
+class MeteredQueuePool(MeteredPool, QueuePool):
+    pass
+
+
+class MeteredStaticPool(MeteredPool, StaticPool):
+    pass
+
+
+def make_engine(uri):
+    """
+    An engine for postgres, or for SQLite: sqlite:///path/to/file.db runs in
+    WAL mode, and sqlite:// keeps the whole database in memory. The latter
+    is a single connection shared by every thread, so their transactions
+    mix; only use it from one thread at a time.
+    """
+    url = make_url(uri)
+    kwargs = {"pool_pre_ping": True}
+    queue_pool = {
+        "poolclass": MeteredQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    sqlite = url.get_backend_name() == "sqlite"
+    in_memory = sqlite and url.database in (None, "", ":memory:")
+    if sqlite:
+        # The connections are shared by all the worker threads.
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": DB_POOL_TIMEOUT,
+        }
+    if in_memory:
+        # Every new connection would get its own empty database.
+        kwargs["poolclass"] = MeteredStaticPool
+    else:
+        kwargs.update(queue_pool)
+    if url.get_backend_name() == "postgresql":
+        kwargs["client_encoding"] = "utf8"
+
+    engine = create_engine(url, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, _):
+        engine.pool.metrics.connected()
+        if sqlite:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            if not in_memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+    return engine
 
 
 def start() -> scoped_session:
-    engine = create_engine(DB_URI, client_encoding="utf8")
-    BASE.metadata.bind = engine
-    BASE.metadata.create_all(engine)
-    return scoped_session(sessionmaker(bind=engine, autoflush=False))
+    BASE.metadata.bind = ENGINE
+    BASE.metadata.create_all(ENGINE)
+    return scoped_session(sessionmaker(bind=ENGINE, autoflush=False))
+
+
+def migrate_primary_key(table, engine=None):
+    """
+    Move an existing postgres `table` onto the primary key of its model, and
+    add the indexes of the model it lacks. create(checkfirst=True) leaves
+    tables which already exist alone, so ones created before a key changed
+    keep the old key otherwise. SQLite tables are left as they are.
+    """
+    engine = engine or ENGINE
+    if engine.dialect.name != "postgresql":
+        return
+    inspector = inspect(engine)
+    key = inspector.get_pk_constraint(table.name)
+    wanted = [column.name for column in table.primary_key.columns]
+    indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as conn:
+        if key["name"] and set(key["constrained_columns"]) != set(wanted):
+            conn.execute(
+                "ALTER TABLE {} DROP CONSTRAINT {}, ADD PRIMARY KEY ({})".format(
+                    quote(table.name),
+                    quote(key["name"]),
+                    ", ".join(map(quote, wanted)),
+                )
+            )
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(conn)
+
+
+def pool_status() -> dict:
+    """Pool usage of the primary, and of the replica if there is one."""
+    status = {}
+    for name, engine in (("primary", ENGINE), ("replica", READ_ENGINE)):
+        if name == "replica" and engine is ENGINE:
+            continue
+        pool, metrics = engine.pool, engine.pool.metrics
+        queue = isinstance(pool, QueuePool)
+        status[name] = {
+            "size": pool.size() if queue else 1,
+            "checked_out": pool.checkedout() if queue else 0,
+            "overflow": max(pool.overflow(), 0) if queue else 0,
+            "checkouts": metrics.checkouts,
+            "hits": metrics.hits,
+            "connects": metrics.connects,
+            "timeouts": metrics.timeouts,
+            "wait_avg": (
+                metrics.wait_total / metrics.checkouts if metrics.checkouts else 0.0
+            ),
+            "wait_max": metrics.wait_max,
+        }
+    return status
 
 
 BASE = declarative_base()
+ENGINE = make_engine(DB_URI)
 SESSION = start()
+
+# Stats, listings and cache warm-up read from the replica when there is one,
+# except for the caches kept in the snapshot, which are stamped with the
+# primary's versions.
+# Anything that is read to be written back, or right after a write, must
+# stay on SESSION.
+READ_ENGINE = make_engine(DB_REPLICA_URI) if DB_REPLICA_URI else ENGINE
+READ_SESSION = (
+    scoped_session(sessionmaker(bind=READ_ENGINE, autoflush=False))
+    if DB_REPLICA_URI
+    else SESSION
+)
@@ -1,12 +1,17 @@
 import threading
+import time
+from collections import OrderedDict, deque
 
 from sqlalchemy import Column, BigInteger, Integer, String, Boolean
 
 from tg_bot.modules.sql import BASE, SESSION
+from tg_bot.modules.sql import snapshot
 
 DEF_COUNT = 0
 DEF_LIMIT = 0
-DEF_OBJ = (None, DEF_COUNT, DEF_LIMIT)
+DEF_TIME = 10
+# How many users per chat we keep recent message times for.
+MAX_TRACKED_USERS = 1000
 
 
 class FloodControl(BASE):
@@ -25,14 +30,70 @@ class FloodControl(BASE):
         return "<flood control for %s>" % self.chat_id
 
 
+class FloodTime(BASE):
+    __tablename__ = "antiflood_time"
+    chat_id = Column(String(14), primary_key=True)
+    seconds = Column(Integer, default=DEF_TIME)
+
+    def __init__(self, chat_id, seconds=DEF_TIME):
+        self.chat_id = str(chat_id)  # ensure string
+        self.seconds = seconds
+
+    def __repr__(self):
+        return "<flood time for %s>" % self.chat_id
+
+
 FloodControl.__table__.create(checkfirst=True)
+FloodTime.__table__.create(checkfirst=True)
 
 INSERTION_LOCK = threading.RLock()
 
+
+class FloodTracker:
+    """
+    Flood state of one chat: the times of each user's last `limit` + 1
+    messages, for the most recently active users.
+    """
+
+    __slots__ = ("limit", "seconds", "users", "lock")
+
+    def __init__(self, limit, seconds=DEF_TIME):
+        self.limit = limit
+        self.seconds = seconds
+        self.users = OrderedDict()
+        # Each chat has its own lock, so busy chats don't wait on each other.
+        self.lock = threading.Lock()
+
+    # Only the settings are kept in the cache snapshot.
+    def __getstate__(self):
+        return self.limit, self.seconds
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def hit(self, user_id) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            times = self.users.get(user_id)
+            if times is None:
+                times = self.users[user_id] = deque(maxlen=self.limit + 1)
+                if len(self.users) > MAX_TRACKED_USERS:
+                    self.users.popitem(last=False)
+            else:
+                self.users.move_to_end(user_id)
+
+            times.append(now)
+            if len(times) > self.limit and now - times[0] <= self.seconds:
+                del self.users[user_id]
+                return True
+            return False
+
+
+# chat_id -> FloodTracker, for chats with antiflood set
 CHAT_FLOOD = {}
 
 
-def set_flood(chat_id, amount):
+def set_flood(chat_id, amount, seconds=None):
     with INSERTION_LOCK:
         flood = SESSION.query(FloodControl).get(str(chat_id))
         if not flood:
@@ -41,10 +102,18 @@ def set_flood(chat_id, amount):
         flood.user_id = None
         flood.limit = amount
 
-        CHAT_FLOOD[str(chat_id)] = (None, DEF_COUNT, amount)
+        if seconds is not None:
+            flood_time = SESSION.query(FloodTime).get(str(chat_id))
+            if not flood_time:
+                flood_time = FloodTime(chat_id)
+            flood_time.seconds = seconds
+            SESSION.add(flood_time)
+        else:
+            seconds = get_flood_time(chat_id)
 
         SESSION.add(flood)
         SESSION.commit()
+        CHAT_FLOOD[str(chat_id)] = FloodTracker(amount, seconds)
 
 
 def set_flood_strength(chat_id, soft_flood):
@@ -60,29 +129,21 @@ def set_flood_strength(chat_id, soft_flood):
 
 
 def update_flood(chat_id: str, user_id) -> bool:
-    if str(chat_id) not in CHAT_FLOOD:
-        return
-    curr_user_id, count, limit = CHAT_FLOOD.get(str(chat_id), DEF_OBJ)
-
-    if limit == 0:  # no antiflood
-        return False
-
-    if user_id != curr_user_id or user_id is None:  # other user
-        CHAT_FLOOD[str(chat_id)] = (user_id, DEF_COUNT + 1, limit)
+    """Count a message from user_id; True if they now sent too many too fast."""
+    tracker = CHAT_FLOOD.get(str(chat_id))
+    if tracker is None or tracker.limit == 0 or user_id is None:  # no antiflood
         return False
+    return tracker.hit(user_id)
 
-    count += 1
-    if count > limit:  # too many msgs, kick
-        CHAT_FLOOD[str(chat_id)] = (None, DEF_COUNT, limit)
-        return True
 
-    # default -> update
-    CHAT_FLOOD[str(chat_id)] = (user_id, count, limit)
-    return False
+def get_flood_limit(chat_id):
+    tracker = CHAT_FLOOD.get(str(chat_id))
+    return tracker.limit if tracker else DEF_LIMIT
 
 
-def get_flood_limit(chat_id):
-    return CHAT_FLOOD.get(str(chat_id), DEF_OBJ)[2]
+def get_flood_time(chat_id):
+    tracker = CHAT_FLOOD.get(str(chat_id))
+    return tracker.seconds if tracker else DEF_TIME
 
 
 def get_flood_strength(chat_id):
@@ -98,8 +159,11 @@ def get_flood_strength(chat_id):
 def migrate_chat(old_chat_id, new_chat_id):
     with INSERTION_LOCK:
         if flood := SESSION.query(FloodControl).get(str(old_chat_id)):
-            CHAT_FLOOD[str(new_chat_id)] = CHAT_FLOOD.get(str(old_chat_id), DEF_OBJ)
+            if tracker := CHAT_FLOOD.pop(str(old_chat_id), None):
+                CHAT_FLOOD[str(new_chat_id)] = tracker
             flood.chat_id = str(new_chat_id)
+            if flood_time := SESSION.query(FloodTime).get(str(old_chat_id)):
+                flood_time.chat_id = str(new_chat_id)
             SESSION.commit()
 
         SESSION.close()
@@ -108,10 +172,21 @@ def migrate_chat(old_chat_id, new_chat_id):
 def __load_flood_settings():
     global CHAT_FLOOD
     try:
+        times = {
+            chat.chat_id: chat.seconds for chat in SESSION.query(FloodTime).all()
+        }
         all_chats = SESSION.query(FloodControl).all()
-        CHAT_FLOOD = {chat.chat_id: (None, DEF_COUNT, chat.limit) for chat in all_chats}
+        CHAT_FLOOD = {
+            chat.chat_id: FloodTracker(
+                chat.limit or DEF_LIMIT, times.get(chat.chat_id, DEF_TIME)
+            )
+            for chat in all_chats
+        }
     finally:
         SESSION.close()
 
 
-__load_flood_settings()
+if not snapshot.restore(
+    __name__, "CHAT_FLOOD", INSERTION_LOCK, FloodControl, FloodTime
+):
+    __load_flood_settings()
@@ -2,7 +2,8 @@ import threading
 
 from sqlalchemy import func, distinct, Column, String, UnicodeText
 
-from tg_bot.modules.sql import SESSION, BASE
+from tg_bot.modules.sql import SESSION, BASE, READ_SESSION
+from tg_bot.modules.sql.chat_cache import ChatCache
 
 
 class BlackListFilters(BASE):
@@ -29,7 +30,21 @@ BlackListFilters.__table__.create(checkfirst=True)
 
 BLACKLIST_FILTER_INSERTION_LOCK = threading.RLock()
 
-CHAT_BLACKLISTS = {}
+
+def __load_chat_blacklist(chat_id):
+    try:
+        triggers = (
+            SESSION.query(BlackListFilters.trigger)
+            .filter(BlackListFilters.chat_id == chat_id)
+            .all()
+        )
+        return {trigger for (trigger,) in triggers}
+    finally:
+        SESSION.close()
+
+
+# chat_id -> its blacklisted triggers
+CHAT_BLACKLISTS = ChatCache("blacklists", __load_chat_blacklist)
 
 
 def add_to_blacklist(chat_id, trigger):
@@ -38,7 +53,7 @@ def add_to_blacklist(chat_id, trigger):
 
         SESSION.merge(blacklist_filt)  # merge to avoid duplicate key issues
         SESSION.commit()
-        CHAT_BLACKLISTS.setdefault(str(chat_id), set()).add(trigger)
+        CHAT_BLACKLISTS.invalidate(chat_id)
 
 
 def rm_from_blacklist(chat_id, trigger):
@@ -46,11 +61,9 @@ def rm_from_blacklist(chat_id, trigger):
         if blacklist_filt := SESSION.query(BlackListFilters).get(
             (str(chat_id), trigger)
         ):
-            if trigger in CHAT_BLACKLISTS.get(str(chat_id), set()):  # sanity check
-                CHAT_BLACKLISTS.get(str(chat_id), set()).remove(trigger)
-
             SESSION.delete(blacklist_filt)
             SESSION.commit()
+            CHAT_BLACKLISTS.invalidate(chat_id)
             return True
 
         SESSION.close()
@@ -58,14 +71,14 @@ def rm_from_blacklist(chat_id, trigger):
 
 
 def get_chat_blacklist(chat_id):
-    return CHAT_BLACKLISTS.get(str(chat_id), set())
+    return CHAT_BLACKLISTS.get(chat_id)
 
 
 def num_blacklist_filters():
     try:
-        return SESSION.query(BlackListFilters).count()
+        return READ_SESSION.query(BlackListFilters).count()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_blacklist_chat_filters(chat_id):
@@ -81,26 +94,11 @@ def num_blacklist_chat_filters(chat_id):
 
 def num_blacklist_filter_chats():
     try:
-        return SESSION.query(func.count(distinct(BlackListFilters.chat_id))).scalar()
+        return READ_SESSION.query(
+            func.count(distinct(BlackListFilters.chat_id))
+        ).scalar()
     finally:
-        SESSION.close()
-
-
-def __load_chat_blacklists():
-    global CHAT_BLACKLISTS
-    try:
-        chats = SESSION.query(BlackListFilters.chat_id).distinct().all()
-        for (chat_id,) in chats:  # remove tuple by ( ,)
-            CHAT_BLACKLISTS[chat_id] = []
-
-        all_filters = SESSION.query(BlackListFilters).all()
-        for x in all_filters:
-            CHAT_BLACKLISTS[x.chat_id] += [x.trigger]
-
-        CHAT_BLACKLISTS = {x: set(y) for x, y in CHAT_BLACKLISTS.items()}
-
-    finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def migrate_chat(old_chat_id, new_chat_id):
@@ -113,6 +111,4 @@ def migrate_chat(old_chat_id, new_chat_id):
         for filt in chat_filters:
             filt.chat_id = str(new_chat_id)
         SESSION.commit()
-
-
-__load_chat_blacklists()
+        CHAT_BLACKLISTS.invalidate(old_chat_id, new_chat_id)
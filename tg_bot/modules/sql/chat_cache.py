@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+
+from tg_bot import CHAT_CACHE_IDLE, CHAT_CACHE_SIZE
+
+# Every ChatCache, for /status and the metrics.
+CHAT_CACHES = []
+
+
+class ChatCache:
+    """
+    Per chat data, loaded on first use by `load(chat_id)` and kept for the
+    `size` most recently used chats which were used in the last `idle`
+    seconds. Writers call invalidate() once they have committed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        load: Callable,
+        size: int = CHAT_CACHE_SIZE,
+        idle: float = CHAT_CACHE_IDLE,
+    ):
+        self.name = name
+        self.load = load
+        self.size = size
+        self.idle = idle
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # chat_id -> [value, last used], least recently used first
+        self._chats = OrderedDict()
+        # chat_id -> [loads in flight, generation] of chats being loaded. The
+        # generation is bumped when the chat is invalidated, so a load which
+        # raced with a write to that chat isn't cached.
+        self._loading = {}
+        self._lock = threading.Lock()
+        CHAT_CACHES.append(self)
+
+    def __len__(self):
+        return len(self._chats)
+
+    def _evict_idle(self, now: float):
+        chats = self._chats
+        while chats and now - next(iter(chats.values()))[1] > self.idle:
+            chats.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, chat_id):
+        chat_id = str(chat_id)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            if (entry := self._chats.get(chat_id)) is not None:
+                entry[1] = now
+                self._chats.move_to_end(chat_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            loading = self._loading.setdefault(chat_id, [0, 0])
+            loading[0] += 1
+            generation = loading[1]
+
+        value = None
+        loaded = False
+        try:
+            value = self.load(chat_id)
+            loaded = True
+        finally:
+            with self._lock:
+                loading[0] -= 1
+                if loading[0] == 0:
+                    del self._loading[chat_id]
+                if loaded and generation == loading[1]:
+                    self._chats[chat_id] = [value, now]
+                    if len(self._chats) > self.size:
+                        self._chats.popitem(last=False)
+                        self.evictions += 1
+        return value
+
+    def invalidate(self, *chat_ids):
+        with self._lock:
+            for chat_id in map(str, chat_ids):
+                self._chats.pop(chat_id, None)
+                if loading := self._loading.get(chat_id):
+                    loading[1] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chats": len(self._chats),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
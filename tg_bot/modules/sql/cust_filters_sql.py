@@ -1,8 +1,22 @@
 import threading
-
-from sqlalchemy import Column, String, UnicodeText, Boolean, Integer, distinct, func
-
-from tg_bot.modules.sql import BASE, SESSION
+from collections import OrderedDict
+
+from sqlalchemy import (
+    Column,
+    String,
+    UnicodeText,
+    Boolean,
+    Integer,
+    Index,
+    distinct,
+    func,
+)
+from telegram import InlineKeyboardMarkup
+
+from tg_bot.modules.helper_funcs.misc import build_keyboard
+from tg_bot.modules.helper_funcs.triggers import TriggerMatcher
+from tg_bot.modules.sql import BASE, SESSION, READ_SESSION, migrate_primary_key
+from tg_bot.modules.sql.chat_cache import ChatCache
 
 
 class CustomFilters(BASE):
@@ -59,9 +73,13 @@ class CustomFilters(BASE):
 
 class Buttons(BASE):
     __tablename__ = "cust_filter_urls"
+    # id alone is unique, and SQLite can only autoincrement a single column
+    # key. Postgres tables from before keep their (id, chat_id, keyword) key
+    # until migrate_primary_key moves them over.
     id = Column(Integer, primary_key=True, autoincrement=True)
-    chat_id = Column(String(14), primary_key=True)
-    keyword = Column(UnicodeText, primary_key=True)
+    chat_id = Column(String(14), nullable=False)
+    keyword = Column(UnicodeText, nullable=False)
+    __table_args__ = (Index("cust_filter_urls_chat_keyword", "chat_id", "keyword"),)
     name = Column(UnicodeText, nullable=False)
     url = Column(UnicodeText, nullable=False)
     same_line = Column(Boolean, default=False)
@@ -76,10 +94,73 @@ class Buttons(BASE):
 
 CustomFilters.__table__.create(checkfirst=True)
 Buttons.__table__.create(checkfirst=True)
+migrate_primary_key(Buttons.__table__)
 
 CUST_FILT_LOCK = threading.RLock()
 BUTTON_LOCK = threading.RLock()
-CHAT_FILTERS = {}
+
+
+def __load_chat_filters(chat_id):
+    try:
+        keywords = (
+            SESSION.query(CustomFilters.keyword)
+            .filter(CustomFilters.chat_id == chat_id)
+            .all()
+        )
+        return sorted({keyword for (keyword,) in keywords}, key=lambda i: (-len(i), i))
+    finally:
+        SESSION.close()
+
+
+# chat_id -> its triggers, longest first
+CHAT_FILTERS = ChatCache("filters", __load_chat_filters)
+# chat_id -> TriggerMatcher of its triggers
+CHAT_MATCHERS = ChatCache(
+    "filter matchers", lambda chat_id: TriggerMatcher(CHAT_FILTERS.get(chat_id))
+)
+
+FILTER_CACHE_SIZE = 1000
+FILTER_CACHE_LOCK = threading.Lock()
+# (chat_id, keyword) -> FilterReply, least recently used first
+FILTER_CACHE = OrderedDict()
+# (chat_id, keyword) -> [loads in flight, generation] of filters being loaded.
+# Writes bump the generation, so a load which raced with them isn't cached.
+FILTER_LOADING = {}
+
+
+class FilterReply:
+    """A filter and its keyboard, ready to be sent."""
+
+    __slots__ = (
+        "keyword",
+        "reply",
+        "is_sticker",
+        "is_document",
+        "is_image",
+        "is_audio",
+        "is_voice",
+        "is_video",
+        "has_markdown",
+        "keyboard",
+    )
+
+    def __init__(self, filt, buttons):
+        for attr in self.__slots__[:-1]:
+            setattr(self, attr, getattr(filt, attr))
+        self.keyboard = InlineKeyboardMarkup(build_keyboard(buttons))
+
+
+def _uncache_triggers(*chat_ids):
+    CHAT_FILTERS.invalidate(*chat_ids)
+    CHAT_MATCHERS.invalidate(*chat_ids)
+
+
+def _uncache_filter(chat_id, keyword):
+    key = (str(chat_id), keyword)
+    with FILTER_CACHE_LOCK:
+        FILTER_CACHE.pop(key, None)
+        if loading := FILTER_LOADING.get(key):
+            loading[1] += 1
 
 
 def get_all_filters():
@@ -101,8 +182,6 @@ def add_filter(
     is_video=False,
     buttons=None,
 ):
-    global CHAT_FILTERS
-
     if buttons is None:
         buttons = []
 
@@ -131,26 +210,18 @@ def add_filter(
             bool(buttons),
         )
 
-        if keyword not in CHAT_FILTERS.get(str(chat_id), []):
-            CHAT_FILTERS[str(chat_id)] = sorted(
-                CHAT_FILTERS.get(str(chat_id), []) + [keyword],
-                key=lambda x: (-len(x), x),
-            )
-
         SESSION.add(filt)
         SESSION.commit()
+        _uncache_triggers(chat_id)
 
-    for b_name, url, same_line in buttons:
-        add_note_button_to_db(chat_id, keyword, b_name, url, same_line)
+        for b_name, url, same_line in buttons:
+            add_note_button_to_db(chat_id, keyword, b_name, url, same_line)
+        _uncache_filter(chat_id, keyword)
 
 
 def remove_filter(chat_id, keyword):
-    global CHAT_FILTERS
     with CUST_FILT_LOCK:
         if filt := SESSION.query(CustomFilters).get((str(chat_id), keyword)):
-            if keyword in CHAT_FILTERS.get(str(chat_id), []):  # Sanity check
-                CHAT_FILTERS.get(str(chat_id), []).remove(keyword)
-
             with BUTTON_LOCK:
                 prev_buttons = (
                     SESSION.query(Buttons)
@@ -162,6 +233,8 @@ def remove_filter(chat_id, keyword):
 
             SESSION.delete(filt)
             SESSION.commit()
+            _uncache_triggers(chat_id)
+            _uncache_filter(chat_id, keyword)
             return True
 
         SESSION.close()
@@ -169,7 +242,11 @@ def remove_filter(chat_id, keyword):
 
 
 def get_chat_triggers(chat_id):
-    return CHAT_FILTERS.get(str(chat_id), set())
+    return CHAT_FILTERS.get(chat_id)
+
+
+def get_chat_matcher(chat_id):
+    return CHAT_MATCHERS.get(chat_id)
 
 
 def get_chat_filters(chat_id):
@@ -192,6 +269,36 @@ def get_filter(chat_id, keyword):
         SESSION.close()
 
 
+def get_filter_reply(chat_id, keyword):
+    """
+    Cached get_filter plus its keyboard. A load which raced with a write to
+    the filter is returned but not cached, see FILTER_LOADING.
+    """
+    key = (str(chat_id), keyword)
+    with FILTER_CACHE_LOCK:
+        if (cached := FILTER_CACHE.get(key)) is not None:
+            FILTER_CACHE.move_to_end(key)
+            return cached
+        loading = FILTER_LOADING.setdefault(key, [0, 0])
+        loading[0] += 1
+        generation = loading[1]
+
+    try:
+        if filt := SESSION.query(CustomFilters).get(key):
+            cached = FilterReply(filt, get_buttons(chat_id, keyword))
+    finally:
+        SESSION.close()
+        with FILTER_CACHE_LOCK:
+            loading[0] -= 1
+            if loading[0] == 0:
+                del FILTER_LOADING[key]
+            if cached is not None and generation == loading[1]:
+                FILTER_CACHE[key] = cached
+                if len(FILTER_CACHE) > FILTER_CACHE_SIZE:
+                    FILTER_CACHE.popitem(last=False)
+    return cached
+
+
 def add_note_button_to_db(chat_id, keyword, b_name, url, same_line):
     with BUTTON_LOCK:
         button = Buttons(chat_id, keyword, b_name, url, same_line)
@@ -213,36 +320,16 @@ def get_buttons(chat_id, keyword):
 
 def num_filters():
     try:
-        return SESSION.query(CustomFilters).count()
+        return READ_SESSION.query(CustomFilters).count()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_chats():
     try:
-        return SESSION.query(func.count(distinct(CustomFilters.chat_id))).scalar()
+        return READ_SESSION.query(func.count(distinct(CustomFilters.chat_id))).scalar()
     finally:
-        SESSION.close()
-
-
-def __load_chat_filters():
-    global CHAT_FILTERS
-    try:
-        chats = SESSION.query(CustomFilters.chat_id).distinct().all()
-        for (chat_id,) in chats:  # remove tuple by ( ,)
-            CHAT_FILTERS[chat_id] = []
-
-        all_filters = SESSION.query(CustomFilters).all()
-        for x in all_filters:
-            CHAT_FILTERS[x.chat_id] += [x.keyword]
-
-        CHAT_FILTERS = {
-            x: sorted(set(y), key=lambda i: (-len(i), i))
-            for x, y in CHAT_FILTERS.items()
-        }
-
-    finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def migrate_chat(old_chat_id, new_chat_id):
@@ -255,11 +342,13 @@ def migrate_chat(old_chat_id, new_chat_id):
         for filt in chat_filters:
             filt.chat_id = str(new_chat_id)
         SESSION.commit()
-        try:
-            CHAT_FILTERS[str(new_chat_id)] = CHAT_FILTERS[str(old_chat_id)]
-            del CHAT_FILTERS[str(old_chat_id)]
-        except KeyError:
-            pass
+        _uncache_triggers(old_chat_id, new_chat_id)
+        with FILTER_CACHE_LOCK:
+            for key in [key for key in FILTER_CACHE if key[0] == str(old_chat_id)]:
+                del FILTER_CACHE[key]
+            for key, loading in FILTER_LOADING.items():
+                if key[0] == str(old_chat_id):
+                    loading[1] += 1
 
         with BUTTON_LOCK:
             chat_buttons = (
@@ -268,6 +357,3 @@ def migrate_chat(old_chat_id, new_chat_id):
             for btn in chat_buttons:
                 btn.chat_id = str(new_chat_id)
             SESSION.commit()
-
-
-__load_chat_filters()
@@ -2,7 +2,8 @@ import threading
 
 from sqlalchemy import Column, String, UnicodeText, func, distinct
 
-from tg_bot.modules.sql import SESSION, BASE
+from tg_bot.modules.sql import SESSION, BASE, READ_SESSION
+from tg_bot.modules.sql.chat_cache import ChatCache
 
 
 class Disable(BASE):
@@ -21,7 +22,19 @@ class Disable(BASE):
 Disable.__table__.create(checkfirst=True)
 DISABLE_INSERTION_LOCK = threading.RLock()
 
-DISABLED = {}
+
+def __load_disabled_commands(chat_id):
+    try:
+        commands = (
+            SESSION.query(Disable.command).filter(Disable.chat_id == chat_id).all()
+        )
+        return {command for (command,) in commands}
+    finally:
+        SESSION.close()
+
+
+# chat_id -> its disabled commands
+DISABLED = ChatCache("disabled commands", __load_disabled_commands)
 
 
 def disable_command(chat_id, disable):
@@ -29,11 +42,10 @@ def disable_command(chat_id, disable):
         disabled = SESSION.query(Disable).get((str(chat_id), disable))
 
         if not disabled:
-            DISABLED.setdefault(str(chat_id), set()).add(disable)
-
             disabled = Disable(str(chat_id), disable)
             SESSION.add(disabled)
             SESSION.commit()
+            DISABLED.invalidate(chat_id)
             return True
 
         SESSION.close()
@@ -43,11 +55,9 @@ def disable_command(chat_id, disable):
 def enable_command(chat_id, enable):
     with DISABLE_INSERTION_LOCK:
         if disabled := SESSION.query(Disable).get((str(chat_id), enable)):
-            if enable in DISABLED.get(str(chat_id)):  # sanity check
-                DISABLED.setdefault(str(chat_id), set()).remove(enable)
-
             SESSION.delete(disabled)
             SESSION.commit()
+            DISABLED.invalidate(chat_id)
             return True
 
         SESSION.close()
@@ -55,25 +65,25 @@ def enable_command(chat_id, enable):
 
 
 def is_command_disabled(chat_id, cmd):
-    return cmd in DISABLED.get(str(chat_id), set())
+    return cmd in DISABLED.get(chat_id)
 
 
 def get_all_disabled(chat_id):
-    return DISABLED.get(str(chat_id), set())
+    return DISABLED.get(chat_id)
 
 
 def num_chats():
     try:
-        return SESSION.query(func.count(distinct(Disable.chat_id))).scalar()
+        return READ_SESSION.query(func.count(distinct(Disable.chat_id))).scalar()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_disabled():
     try:
-        return SESSION.query(Disable).count()
+        return READ_SESSION.query(Disable).count()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def migrate_chat(old_chat_id, new_chat_id):
@@ -83,21 +93,5 @@ def migrate_chat(old_chat_id, new_chat_id):
             chat.chat_id = str(new_chat_id)
             SESSION.add(chat)
 
-        if str(old_chat_id) in DISABLED:
-            DISABLED[str(new_chat_id)] = DISABLED.get(str(old_chat_id), set())
-
         SESSION.commit()
-
-
-def __load_disabled_commands():
-    global DISABLED
-    try:
-        all_chats = SESSION.query(Disable).all()
-        for chat in all_chats:
-            DISABLED.setdefault(chat.chat_id, set()).add(chat.command)
-
-    finally:
-        SESSION.close()
-
-
-__load_disabled_commands()
+        DISABLED.invalidate(old_chat_id, new_chat_id)
@@ -1,8 +1,10 @@
 import threading
+from collections import namedtuple
 
 from sqlalchemy import Column, String, UnicodeText, Integer
 
 from tg_bot.modules.sql import SESSION, BASE
+from tg_bot.modules.sql.chat_cache import ChatCache
 
 
 class GitHub(BASE):
@@ -28,6 +30,22 @@ GitHub.__table__.create(checkfirst=True)
 
 GIT_LOCK = threading.RLock()
 
+RepoShortcut = namedtuple("RepoShortcut", "name value backoffset")
+
+
+def __load_chat_repos(chat_id):
+    try:
+        return {
+            repo.name: RepoShortcut(repo.name, repo.value, repo.backoffset)
+            for repo in SESSION.query(GitHub).filter(GitHub.chat_id == chat_id)
+        }
+    finally:
+        SESSION.close()
+
+
+# chat_id -> {name: RepoShortcut}
+CHAT_REPOS = ChatCache("github repos", __load_chat_repos)
+
 
 def add_repo_to_db(chat_id, name, value, backoffset):
     with GIT_LOCK:
@@ -36,13 +54,11 @@ def add_repo_to_db(chat_id, name, value, backoffset):
         repo = GitHub(str(chat_id), name, value, backoffset)
         SESSION.add(repo)
         SESSION.commit()
+        CHAT_REPOS.invalidate(chat_id)
 
 
 def get_repo(chat_id, name):
-    try:
-        return SESSION.query(GitHub).get((str(chat_id), name))
-    finally:
-        SESSION.close()
+    return CHAT_REPOS.get(chat_id).get(name)
 
 
 def rm_repo(chat_id, name):
@@ -50,18 +66,22 @@ def rm_repo(chat_id, name):
         if repo := SESSION.query(GitHub).get((str(chat_id), name)):
             SESSION.delete(repo)
             SESSION.commit()
+            CHAT_REPOS.invalidate(chat_id)
             return True
         SESSION.close()
         return False
 
 
 def get_all_repos(chat_id):
-    try:
-        return (
-            SESSION.query(GitHub)
-            .filter(GitHub.chat_id == str(chat_id))
-            .order_by(GitHub.name.asc())
-            .all()
-        )
-    finally:
-        SESSION.close()
+    return sorted(CHAT_REPOS.get(chat_id).values())
+
+
+def migrate_chat(old_chat_id, new_chat_id):
+    with GIT_LOCK:
+        repos = SESSION.query(GitHub).filter(GitHub.chat_id == str(old_chat_id)).all()
+        for repo in repos:
+            repo.chat_id = str(new_chat_id)
+            SESSION.add(repo)
+
+        SESSION.commit()
+        CHAT_REPOS.invalidate(old_chat_id, new_chat_id)
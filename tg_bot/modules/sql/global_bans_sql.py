@@ -3,6 +3,7 @@ import threading
 from sqlalchemy import Column, UnicodeText, BigInteger, String, Boolean
 
 from tg_bot.modules.sql import BASE, SESSION
+from tg_bot.modules.sql import snapshot
 
 
 class GloballyBannedUsers(BASE):
@@ -136,7 +137,9 @@ def num_gbanned_users():
 def __load_gbanned_userid_list():
     global GBANNED_LIST
     try:
-        GBANNED_LIST = {x.user_id for x in SESSION.query(GloballyBannedUsers).all()}
+        GBANNED_LIST = {
+            x.user_id for x in SESSION.query(GloballyBannedUsers).all()
+        }
     finally:
         SESSION.close()
 
@@ -161,5 +164,9 @@ def migrate_chat(old_chat_id, new_chat_id):
 
 
 # Create in memory userid to avoid disk access
-__load_gbanned_userid_list()
-__load_gban_stat_list()
+if not snapshot.restore(
+    __name__, "GBANNED_LIST", GBANNED_USERS_LOCK, GloballyBannedUsers
+):
+    __load_gbanned_userid_list()
+if not snapshot.restore(__name__, "GBANSTAT_LIST", GBAN_SETTING_LOCK, GbanSettings):
+    __load_gban_stat_list()
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, UnicodeText, BigInteger, Integer
 
-from tg_bot.modules.sql import BASE, SESSION
+from tg_bot.modules.sql import BASE, SESSION, READ_SESSION
 
 
 class GloballyKickedUsers(BASE):
@@ -62,6 +62,6 @@ def get_times(user_id):
 def __load_gkick_userid_list():
     global GKICK_LIST
     try:
-        GKICK_LIST = {x.user_id for x in SESSION.query(GloballyKickedUsers).all()}
+        GKICK_LIST = {x.user_id for x in READ_SESSION.query(GloballyKickedUsers).all()}
     finally:
-        SESSION.close()
+        READ_SESSION.close()
@@ -3,7 +3,7 @@ import threading
 
 from sqlalchemy import Column, String, Boolean
 
-from tg_bot.modules.sql import SESSION, BASE
+from tg_bot.modules.sql import SESSION, BASE, READ_SESSION
 
 
 class Permissions(BASE):
@@ -78,6 +78,63 @@ Restrictions.__table__.create(checkfirst=True)
 PERM_LOCK = threading.RLock()
 RESTR_LOCK = threading.RLock()
 
+# Each lock and restriction type is one bit of its chat's mask.
+LOCK_BITS = {
+    lock_type: 1 << bit
+    for bit, lock_type in enumerate(
+        (
+            "audio",
+            "voice",
+            "contact",
+            "video",
+            "videonote",
+            "document",
+            "photo",
+            "sticker",
+            "gif",
+            "url",
+            "bots",
+            "forward",
+            "game",
+            "location",
+            "emoji",
+            "bigemoji",
+            "anonchannel",
+        )
+    )
+}
+RESTR_BITS = {"messages": 1, "media": 2, "other": 4, "previews": 8}
+RESTR_BITS["all"] = sum(RESTR_BITS.values())
+
+# chat_id -> mask of the locked types, for chats with any lock
+CHAT_LOCKS = {}
+# chat_id -> mask of the restricted types, for chats with any restriction
+CHAT_RESTR = {}
+
+
+def _lock_mask(perm):
+    return sum(bit for lock_type, bit in LOCK_BITS.items() if getattr(perm, lock_type))
+
+
+def _restr_mask(restr):
+    mask = 0
+    if restr.messages:
+        mask |= RESTR_BITS["messages"]
+    if restr.media:
+        mask |= RESTR_BITS["media"]
+    if restr.other:
+        mask |= RESTR_BITS["other"]
+    if restr.preview:
+        mask |= RESTR_BITS["previews"]
+    return mask
+
+
+def _set_mask(masks, chat_id, mask):
+    if mask:
+        masks[str(chat_id)] = mask
+    else:
+        masks.pop(str(chat_id), None)
+
 
 def init_permissions(chat_id, reset=False):
     curr_perm = SESSION.query(Permissions).get(str(chat_id))
@@ -107,43 +164,13 @@ def update_lock(chat_id, lock_type, locked):
         if not curr_perm:
             curr_perm = init_permissions(chat_id)
 
-        if lock_type == "audio":
-            curr_perm.audio = locked
-        elif lock_type == "voice":
-            curr_perm.voice = locked
-        elif lock_type == "contact":
-            curr_perm.contact = locked
-        elif lock_type == "video":
-            curr_perm.video = locked
-        elif lock_type == "videonote":
-            curr_perm.videonote = locked
-        elif lock_type == "document":
-            curr_perm.document = locked
-        elif lock_type == "photo":
-            curr_perm.photo = locked
-        elif lock_type == "sticker":
-            curr_perm.sticker = locked
-        elif lock_type == "gif":
-            curr_perm.gif = locked
-        elif lock_type == "url":
-            curr_perm.url = locked
-        elif lock_type == "bots":
-            curr_perm.bots = locked
-        elif lock_type == "forward":
-            curr_perm.forward = locked
-        elif lock_type == "game":
-            curr_perm.game = locked
-        elif lock_type == "location":
-            curr_perm.location = locked
-        elif lock_type == "emoji":
-            curr_perm.emoji = locked
-        elif lock_type == "bigemoji":
-            curr_perm.bigemoji = locked
-        elif lock_type == "anonchannel":
-            curr_perm.anonchannel = locked
+        if lock_type in LOCK_BITS:
+            setattr(curr_perm, lock_type, locked)
 
+        mask = _lock_mask(curr_perm)
         SESSION.add(curr_perm)
         SESSION.commit()
+        _set_mask(CHAT_LOCKS, chat_id, mask)
 
 
 def update_restriction(chat_id, restr_type, locked):
@@ -165,75 +192,29 @@ def update_restriction(chat_id, restr_type, locked):
             curr_restr.media = locked
             curr_restr.other = locked
             curr_restr.preview = locked
+
+        mask = _restr_mask(curr_restr)
         SESSION.add(curr_restr)
         SESSION.commit()
+        _set_mask(CHAT_RESTR, chat_id, mask)
+
+
+def get_lock_mask(chat_id):
+    return CHAT_LOCKS.get(str(chat_id), 0)
+
+
+def get_restr_mask(chat_id):
+    return CHAT_RESTR.get(str(chat_id), 0)
 
 
 def is_locked(chat_id, lock_type):
-    curr_perm = SESSION.query(Permissions).get(str(chat_id))
-    SESSION.close()
-
-    if not curr_perm:
-        return False
-
-    if lock_type == "sticker":
-        return curr_perm.sticker
-    if lock_type == "photo":
-        return curr_perm.photo
-    if lock_type == "audio":
-        return curr_perm.audio
-    if lock_type == "voice":
-        return curr_perm.voice
-    if lock_type == "contact":
-        return curr_perm.contact
-    if lock_type == "video":
-        return curr_perm.video
-    if lock_type == "videonote":
-        return curr_perm.videonote
-    if lock_type == "document":
-        return curr_perm.document
-    if lock_type == "gif":
-        return curr_perm.gif
-    if lock_type == "url":
-        return curr_perm.url
-    if lock_type == "bots":
-        return curr_perm.bots
-    if lock_type == "forward":
-        return curr_perm.forward
-    if lock_type == "game":
-        return curr_perm.game
-    if lock_type == "location":
-        return curr_perm.location
-    if lock_type == "emoji":
-        return curr_perm.emoji
-    if lock_type == "bigemoji":
-        return curr_perm.bigemoji
-    if lock_type == "anonchannel":
-        return curr_perm.anonchannel
+    bit = LOCK_BITS.get(lock_type, 0)
+    return bool(bit and CHAT_LOCKS.get(str(chat_id), 0) & bit)
 
 
 def is_restr_locked(chat_id, lock_type):
-    curr_restr = SESSION.query(Restrictions).get(str(chat_id))
-    SESSION.close()
-
-    if not curr_restr:
-        return False
-
-    if lock_type == "messages":
-        return curr_restr.messages
-    if lock_type == "media":
-        return curr_restr.media
-    if lock_type == "other":
-        return curr_restr.other
-    if lock_type == "previews":
-        return curr_restr.preview
-    if lock_type == "all":
-        return (
-            curr_restr.messages
-            and curr_restr.media
-            and curr_restr.other
-            and curr_restr.preview
-        )
+    bits = RESTR_BITS.get(lock_type, 0)
+    return bool(bits and CHAT_RESTR.get(str(chat_id), 0) & bits == bits)
 
 
 def get_locks(chat_id):
@@ -255,8 +236,23 @@ def migrate_chat(old_chat_id, new_chat_id):
         if perms := SESSION.query(Permissions).get(str(old_chat_id)):
             perms.chat_id = str(new_chat_id)
         SESSION.commit()
+        _set_mask(CHAT_LOCKS, new_chat_id, CHAT_LOCKS.pop(str(old_chat_id), 0))
 
     with RESTR_LOCK:
         if rest := SESSION.query(Restrictions).get(str(old_chat_id)):
             rest.chat_id = str(new_chat_id)
         SESSION.commit()
+        _set_mask(CHAT_RESTR, new_chat_id, CHAT_RESTR.pop(str(old_chat_id), 0))
+
+
+def __load_chat_locks():
+    try:
+        for perm in READ_SESSION.query(Permissions).all():
+            _set_mask(CHAT_LOCKS, perm.chat_id, _lock_mask(perm))
+        for restr in READ_SESSION.query(Restrictions).all():
+            _set_mask(CHAT_RESTR, restr.chat_id, _restr_mask(restr))
+    finally:
+        READ_SESSION.close()
+
+
+__load_chat_locks()
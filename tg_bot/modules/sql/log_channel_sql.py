@@ -2,7 +2,8 @@ import threading
 
 from sqlalchemy import Column, String, func, distinct
 
-from tg_bot.modules.sql import BASE, SESSION
+from tg_bot.modules.sql import BASE, SESSION, READ_SESSION
+from tg_bot.modules.sql import snapshot
 
 
 class GroupLogs(BASE):
@@ -52,9 +53,9 @@ def stop_chat_logging(chat_id):
 
 def num_logchannels():
     try:
-        return SESSION.query(func.count(distinct(GroupLogs.chat_id))).scalar()
+        return READ_SESSION.query(func.count(distinct(GroupLogs.chat_id))).scalar()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def migrate_chat(old_chat_id, new_chat_id):
@@ -77,4 +78,5 @@ def __load_log_channels():
         SESSION.close()
 
 
-__load_log_channels()
+if not snapshot.restore(__name__, "CHANNELS", LOGS_INSERTION_LOCK, GroupLogs):
+    __load_log_channels()
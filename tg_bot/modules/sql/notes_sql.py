@@ -21,11 +21,25 @@
 
 # Note: chat_id's are stored as strings because the int is too large to be stored in a PSQL database.
 import threading
-
-from sqlalchemy import Column, String, Boolean, UnicodeText, Integer, func, distinct
-
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import (
+    Column,
+    String,
+    Boolean,
+    UnicodeText,
+    Integer,
+    Index,
+    func,
+    distinct,
+)
+from telegram import InlineKeyboardMarkup
+
+from tg_bot.modules.helper_funcs.misc import build_keyboard
 from tg_bot.modules.helper_funcs.msg_types import Types
-from tg_bot.modules.sql import SESSION, BASE
+from tg_bot.modules.sql import SESSION, BASE, READ_SESSION, migrate_primary_key
+from tg_bot.modules.sql.chat_cache import ChatCache
 
 
 class Notes(BASE):
@@ -53,9 +67,11 @@ class Notes(BASE):
 
 class Buttons(BASE):
     __tablename__ = "note_urls"
+    # Single column key, see cust_filters_sql.Buttons.
     id = Column(Integer, primary_key=True, autoincrement=True)
-    chat_id = Column(String(14), primary_key=True)
-    note_name = Column(UnicodeText, primary_key=True)
+    chat_id = Column(String(14), nullable=False)
+    note_name = Column(UnicodeText, nullable=False)
+    __table_args__ = (Index("note_urls_chat_note", "chat_id", "note_name"),)
     name = Column(UnicodeText, nullable=False)
     url = Column(UnicodeText, nullable=False)
     same_line = Column(Boolean, default=False)
@@ -70,11 +86,64 @@ class Buttons(BASE):
 
 Notes.__table__.create(checkfirst=True)
 Buttons.__table__.create(checkfirst=True)
+migrate_primary_key(Buttons.__table__)
 
 NOTES_INSERTION_LOCK = threading.RLock()
 BUTTONS_INSERTION_LOCK = threading.RLock()
 
 
+def __load_note_names(chat_id):
+    try:
+        return tuple(
+            sorted(
+                name
+                for (name,) in SESSION.query(Notes.name).filter(
+                    Notes.chat_id == str(chat_id)
+                )
+            )
+        )
+    finally:
+        SESSION.close()
+
+
+# chat_id -> sorted tuple of its note names. A note's ID is its position in
+# it, plus one.
+CHAT_NOTES = ChatCache("notes", __load_note_names)
+
+NOTE_CACHE_SIZE = 1000
+NOTE_CACHE_LOCK = threading.Lock()
+# (chat_id, note_name) -> CachedNote, least recently used first
+NOTE_CACHE = OrderedDict()
+# (chat_id, note_name) -> [loads in flight, generation] of notes being loaded.
+# Writes bump the generation, so a load which raced with them isn't cached.
+NOTE_LOADING = {}
+
+NoteButton = namedtuple("NoteButton", ("name", "url", "same_line"))
+
+
+class CachedNote:
+    """A note with its buttons and keyboard, detached from the session."""
+
+    __slots__ = ("name", "value", "file", "msgtype", "md_ver", "buttons", "keyboard")
+
+    def __init__(self, note, buttons):
+        self.name = note.name
+        self.value = note.value
+        self.file = note.file
+        self.msgtype = note.msgtype
+        self.md_ver = note.md_ver
+        self.buttons = [NoteButton(btn.name, btn.url, btn.same_line) for btn in buttons]
+        self.keyboard = InlineKeyboardMarkup(build_keyboard(self.buttons))
+
+
+def _uncache_note(chat_id, note_name):
+    key = (str(chat_id), note_name)
+    with NOTE_CACHE_LOCK:
+        NOTE_CACHE.pop(key, None)
+        if loading := NOTE_LOADING.get(key):
+            loading[1] += 1
+
+
 def add_note_to_db(chat_id, note_name, note_data, msgtype, buttons=None, file=None):
     if not buttons:
         buttons = []
@@ -97,9 +166,12 @@ def add_note_to_db(chat_id, note_name, note_data, msgtype, buttons=None, file=No
         )
         SESSION.add(note)
         SESSION.commit()
+        if not prev:
+            CHAT_NOTES.invalidate(chat_id)
 
-    for b_name, url, same_line in buttons:
-        add_note_button_to_db(chat_id, note_name, b_name, url, same_line)
+        for b_name, url, same_line in buttons:
+            add_note_button_to_db(chat_id, note_name, b_name, url, same_line)
+        _uncache_note(chat_id, note_name)
 
 
 def get_note(chat_id, note_name):
@@ -125,11 +197,63 @@ def rm_note(chat_id, note_name):
 
             SESSION.delete(note)
             SESSION.commit()
+
+            CHAT_NOTES.invalidate(chat_id)
+            _uncache_note(chat_id, note_name)
             return True
         SESSION.close()
         return False
 
 
+def get_note_names(chat_id):
+    """The chat's note names in ID order."""
+    return CHAT_NOTES.get(chat_id)
+
+
+def get_note_name_by_id(chat_id, note_id):
+    names = get_note_names(chat_id)
+    if 1 <= note_id <= len(names):
+        return names[note_id - 1]
+    return None
+
+
+def get_cached_note(chat_id, note_name):
+    """
+    Cached get_note plus its buttons. Unknown names are answered from the
+    name index, so `#word` messages which aren't notes never reach the database.
+    A load which raced with a write to the note is returned but not cached,
+    see NOTE_LOADING.
+    """
+    names = get_note_names(chat_id)
+    index = bisect_left(names, note_name)
+    if index == len(names) or names[index] != note_name:
+        return None
+
+    key = (str(chat_id), note_name)
+    with NOTE_CACHE_LOCK:
+        if (cached := NOTE_CACHE.get(key)) is not None:
+            NOTE_CACHE.move_to_end(key)
+            return cached
+        loading = NOTE_LOADING.setdefault(key, [0, 0])
+        loading[0] += 1
+        generation = loading[1]
+
+    try:
+        if note := SESSION.query(Notes).get(key):
+            cached = CachedNote(note, get_buttons(chat_id, note_name))
+    finally:
+        SESSION.close()
+        with NOTE_CACHE_LOCK:
+            loading[0] -= 1
+            if loading[0] == 0:
+                del NOTE_LOADING[key]
+            if cached is not None and generation == loading[1]:
+                NOTE_CACHE[key] = cached
+                if len(NOTE_CACHE) > NOTE_CACHE_SIZE:
+                    NOTE_CACHE.popitem(last=False)
+    return cached
+
+
 def get_all_chat_notes(chat_id):
     try:
         return (
@@ -163,16 +287,16 @@ def get_buttons(chat_id, note_name):
 
 def num_notes():
     try:
-        return SESSION.query(Notes).count()
+        return READ_SESSION.query(Notes).count()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_chats():
     try:
-        return SESSION.query(func.count(distinct(Notes.chat_id))).scalar()
+        return READ_SESSION.query(func.count(distinct(Notes.chat_id))).scalar()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def migrate_chat(old_chat_id, new_chat_id):
@@ -191,3 +315,11 @@ def migrate_chat(old_chat_id, new_chat_id):
                 btn.chat_id = str(new_chat_id)
 
         SESSION.commit()
+
+        CHAT_NOTES.invalidate(old_chat_id, new_chat_id)
+        with NOTE_CACHE_LOCK:
+            for key in [key for key in NOTE_CACHE if key[0] == str(old_chat_id)]:
+                del NOTE_CACHE[key]
+            for key, loading in NOTE_LOADING.items():
+                if key[0] == str(old_chat_id):
+                    loading[1] += 1
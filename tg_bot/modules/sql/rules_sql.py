@@ -2,7 +2,7 @@ import threading
 
 from sqlalchemy import Column, String, UnicodeText, func, distinct
 
-from tg_bot.modules.sql import SESSION, BASE
+from tg_bot.modules.sql import SESSION, BASE, READ_SESSION
 
 
 class Rules(BASE):
@@ -41,9 +41,9 @@ def get_rules(chat_id):
 
 def num_chats():
     try:
-        return SESSION.query(func.count(distinct(Rules.chat_id))).scalar()
+        return READ_SESSION.query(func.count(distinct(Rules.chat_id))).scalar()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def migrate_chat(old_chat_id, new_chat_id):
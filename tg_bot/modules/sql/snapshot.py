@@ -0,0 +1,195 @@
+import atexit
+import os
+import pickle
+import random
+import sys
+import threading
+import time
+from itertools import chain
+
+from sqlalchemy import BigInteger, Column, String, event, select
+from sqlalchemy.exc import IntegrityError
+
+from tg_bot import CACHE_SNAPSHOT, LOGGER
+from tg_bot.modules.sql import BASE, ENGINE, SESSION
+
+# Bump whenever the shape of a snapshotted cache changes.
+FORMAT = 1
+# Write the snapshot this often, and trust one at most this old, in seconds.
+SNAPSHOT_INTERVAL = 15 * 60
+SNAPSHOT_MAX_AGE = 24 * 60 * 60
+# The cache_versions row holding a random id of this database.
+EPOCH = ""
+
+
+class CacheVersion(BASE):
+    """How many times each table behind an in-memory cache has been written."""
+
+    __tablename__ = "cache_versions"
+    table_name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+    def __init__(self, table_name, version=0):
+        self.table_name = table_name
+        self.version = version
+
+    def __repr__(self):
+        return "<cache version %s: %s>" % (self.table_name, self.version)
+
+
+CacheVersion.__table__.create(checkfirst=True)
+VERSIONS = CacheVersion.__table__
+
+SNAPSHOT_LOCK = threading.Lock()
+
+# "module.NAME" -> (module, name, lock, table names), of every restored cache
+CACHES = {}
+# tables of the CACHES, whose writes bump their version
+TRACKED = set()
+
+_snapshot = None
+
+
+def __read_snapshot() -> dict:
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = {}
+        if CACHE_SNAPSHOT and os.path.exists(CACHE_SNAPSHOT):
+            try:
+                with open(CACHE_SNAPSHOT, "rb") as f:
+                    snapshot = pickle.load(f)
+                if (
+                    snapshot.get("format") == FORMAT
+                    and time.time() - snapshot["written"] < SNAPSHOT_MAX_AGE
+                ):
+                    _snapshot = snapshot
+            except Exception:
+                LOGGER.exception("Could not read the cache snapshot, ignoring it.")
+    return _snapshot
+
+
+def __versions(tables) -> dict:
+    """The current versions of `tables` and the epoch, from the primary."""
+    wanted = list(tables) + [EPOCH]
+    with ENGINE.connect() as conn:
+        rows = conn.execute(
+            select([VERSIONS.c.table_name, VERSIONS.c.version]).where(
+                VERSIONS.c.table_name.in_(wanted)
+            )
+        )
+        versions = dict(rows.fetchall())
+        for table in wanted:
+            if table not in versions:
+                version = random.getrandbits(62) if table == EPOCH else 0
+                try:
+                    conn.execute(
+                        VERSIONS.insert().values(table_name=table, version=version)
+                    )
+                    versions[table] = version
+                except IntegrityError:
+                    # another instance created it first
+                    versions[table] = conn.execute(
+                        select([VERSIONS.c.version]).where(
+                            VERSIONS.c.table_name == table
+                        )
+                    ).scalar()
+    return versions
+
+
+def restore(module: str, name: str, lock, *models) -> bool:
+    """
+    Set `module`.`name` from the snapshot, if the snapshot has it and none of
+    the tables of `models` were written since. Returns False when the cache
+    has to be loaded from the database instead.
+
+    Either way the cache goes into the next snapshot, and writes through
+    SESSION to those tables make the snapshotted copy stale. The snapshot
+    is stamped with the versions on the primary, so the cache must be
+    loaded through SESSION too, never from a replica which may lag behind.
+    """
+    tables = tuple(model.__tablename__ for model in models)
+    key = f"{module}.{name}"
+    with SNAPSHOT_LOCK:
+        CACHES[key] = (module, name, lock, tables)
+        TRACKED.update(tables)
+
+    if not CACHE_SNAPSHOT:
+        return False
+
+    entry = __read_snapshot().get("caches", {}).get(key)
+    if entry is None:
+        return False
+    versions = __versions(tables)
+    if entry["versions"] != versions:
+        return False
+    try:
+        setattr(sys.modules[module], name, pickle.loads(entry["value"]))
+    except Exception:
+        LOGGER.exception("Could not restore %s from the cache snapshot.", key)
+        return False
+    return True
+
+
+def write_snapshot():
+    if not CACHE_SNAPSHOT:
+        return
+    caches = {}
+    with SNAPSHOT_LOCK:
+        entries = list(CACHES.items())
+    for key, (module, name, lock, tables) in entries:
+        # Under the cache's own lock, so no write is half way between its
+        # commit and the cache update.
+        with lock:
+            versions = __versions(tables)
+            value = pickle.dumps(
+                getattr(sys.modules[module], name), pickle.HIGHEST_PROTOCOL
+            )
+        caches[key] = {"versions": versions, "value": value}
+
+    snapshot = {"format": FORMAT, "written": time.time(), "caches": caches}
+    partial = CACHE_SNAPSHOT + ".tmp"
+    with open(partial, "wb") as f:
+        pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(partial, CACHE_SNAPSHOT)
+
+
+def __bump(connection, tables):
+    tables = tables & TRACKED
+    if tables:
+        connection.execute(
+            VERSIONS.update()
+            .where(VERSIONS.c.table_name.in_(tables))
+            .values(version=VERSIONS.c.version + 1)
+        )
+
+
+@event.listens_for(SESSION, "after_flush")
+def __after_flush(session, _):
+    written = {
+        obj.__table__.name
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if hasattr(obj, "__table__")
+    }
+    __bump(session.connection(), written)
+
+
+@event.listens_for(SESSION, "after_bulk_update")
+@event.listens_for(SESSION, "after_bulk_delete")
+def __after_bulk(context):
+    table = getattr(context, "primary_table", None)
+    if table is not None:
+        __bump(context.session.connection(), {table.name})
+
+
+def __snapshot_loop():
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        try:
+            write_snapshot()
+        except Exception:
+            LOGGER.exception("Could not write the cache snapshot.")
+
+
+if CACHE_SNAPSHOT:
+    threading.Thread(target=__snapshot_loop, daemon=True).start()
+    atexit.register(write_snapshot)
@@ -1,17 +1,21 @@
+import atexit
 import threading
+import time
 
 from sqlalchemy import (
     Column,
     BigInteger,
+    Integer,
     UnicodeText,
     String,
     ForeignKey,
     UniqueConstraint,
     func,
 )
+from sqlalchemy.exc import DataError, IntegrityError
 
-from tg_bot import dispatcher
-from tg_bot.modules.sql import BASE, SESSION
+from tg_bot import dispatcher, LOGGER
+from tg_bot.modules.sql import BASE, SESSION, READ_SESSION
 
 
 class Users(BASE):
@@ -42,7 +46,10 @@ class Chats(BASE):
 
 class ChatMembers(BASE):
     __tablename__ = "chat_members"
-    priv_chat_id = Column(BigInteger, primary_key=True)
+    # SQLite only autoincrements a column declared INTEGER.
+    priv_chat_id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
     # NOTE: Use dual primary key instead of private primary key?
     chat = Column(
         String(14),
@@ -75,6 +82,31 @@ ChatMembers.__table__.create(checkfirst=True)
 
 INSERTION_LOCK = threading.RLock()
 
+# Write-behind buffer for update_user calls coming from the message path.
+# Pending rows are flushed in bulk every FLUSH_INTERVAL seconds, or as soon as
+# FLUSH_SIZE of them are queued, by the flush thread. Rows which could not be
+# written while the database was unreachable stay pending for the next flush,
+# up to PENDING_LIMIT of each kind, oldest first out; rows the database refused
+# are dropped. Rows we already wrote are remembered in the SEEN_* sets (bounded
+# by SEEN_LIMIT) so unchanged ones never reach the db.
+FLUSH_INTERVAL = 5
+FLUSH_SIZE = 500
+PENDING_LIMIT = 50000
+SEEN_LIMIT = 200000
+
+BUFFER_LOCK = threading.Lock()
+# Set to wake the flush thread before FLUSH_INTERVAL is up.
+FLUSH_EVENT = threading.Event()
+# Oldest first. PENDING_MEMBERS maps (chat_id, user_id) to None.
+PENDING_USERS = {}
+PENDING_CHATS = {}
+PENDING_MEMBERS = {}
+# Pending rows dropped past PENDING_LIMIT, logged by the next flush.
+PENDING_DROPPED = 0
+SEEN_USERS = {}
+SEEN_CHATS = {}
+SEEN_MEMBERS = set()
+
 
 def ensure_bot_in_db():
     with INSERTION_LOCK:
@@ -118,6 +150,154 @@ def update_user(user_id, username, chat_id=None, chat_name=None):
         SESSION.commit()
 
 
+def queue_update_user(user_id, username, chat_id=None, chat_name=None):
+    with BUFFER_LOCK:
+        if SEEN_USERS.get(user_id, False) != username:
+            PENDING_USERS[user_id] = username
+
+        if chat_id and chat_name:
+            chat_id = str(chat_id)
+            if SEEN_CHATS.get(chat_id) != chat_name:
+                PENDING_CHATS[chat_id] = chat_name
+            if (chat_id, user_id) not in SEEN_MEMBERS:
+                PENDING_MEMBERS[(chat_id, user_id)] = None
+
+        _trim_pending()
+        pending = len(PENDING_USERS) + len(PENDING_CHATS) + len(PENDING_MEMBERS)
+
+    if pending >= FLUSH_SIZE:
+        FLUSH_EVENT.set()
+
+
+def _trim_pending():
+    global PENDING_DROPPED
+    for pending in (PENDING_USERS, PENDING_CHATS, PENDING_MEMBERS):
+        while len(pending) > PENDING_LIMIT:
+            del pending[next(iter(pending))]
+            PENDING_DROPPED += 1
+
+
+def _chunks(items, size=500):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _write_users(users, chats, members):
+    """Upsert the rows in one transaction."""
+    for chunk in _chunks(users):
+        existing = {
+            user.user_id: user
+            for user in SESSION.query(Users).filter(Users.user_id.in_(chunk))
+        }
+        for user_id in chunk:
+            if user_id in existing:
+                existing[user_id].username = users[user_id]
+            else:
+                SESSION.add(Users(user_id, users[user_id]))
+
+    for chunk in _chunks(chats):
+        existing = {
+            chat.chat_id: chat
+            for chat in SESSION.query(Chats).filter(Chats.chat_id.in_(chunk))
+        }
+        for chat_id in chunk:
+            if chat_id in existing:
+                existing[chat_id].chat_name = chats[chat_id]
+            else:
+                SESSION.add(Chats(chat_id, chats[chat_id]))
+
+    SESSION.flush()
+
+    for chunk in _chunks(members):
+        existing = {
+            tuple(row)
+            for row in SESSION.query(ChatMembers.chat, ChatMembers.user).filter(
+                ChatMembers.chat.in_({chat_id for chat_id, _ in chunk}),
+                ChatMembers.user.in_({user_id for _, user_id in chunk}),
+            )
+        }
+        for chat_id, user_id in chunk:
+            if (chat_id, user_id) not in existing:
+                SESSION.add(ChatMembers(chat_id, user_id))
+
+    SESSION.commit()
+
+
+def _write_users_one_by_one(users, chats, members):
+    """
+    Upsert the rows one transaction each, dropping the ones the database
+    refuses, eg a member of a chat rem_chat just removed.
+    """
+    rows = [({user_id: username}, {}, {}) for user_id, username in users.items()]
+    rows += [({}, {chat_id: chat_name}, {}) for chat_id, chat_name in chats.items()]
+    rows += [({}, {}, {member: None}) for member in members]
+    for row in rows:
+        try:
+            _write_users(*row)
+        except (IntegrityError, DataError):
+            SESSION.rollback()
+            LOGGER.warning("Dropped a queued user row the database refused: %s", row)
+
+
+def flush_users() -> bool:
+    """
+    Write the pending rows. Returns False if the database could not be
+    reached, in which case they are pending again.
+    """
+    global PENDING_USERS, PENDING_CHATS, PENDING_MEMBERS, PENDING_DROPPED
+
+    with INSERTION_LOCK:
+        with BUFFER_LOCK:
+            users, PENDING_USERS = PENDING_USERS, {}
+            chats, PENDING_CHATS = PENDING_CHATS, {}
+            members, PENDING_MEMBERS = PENDING_MEMBERS, {}
+            dropped, PENDING_DROPPED = PENDING_DROPPED, 0
+
+        if dropped:
+            LOGGER.warning("Dropped %s queued user rows past PENDING_LIMIT.", dropped)
+        if not (users or chats or members):
+            return True
+
+        try:
+            try:
+                _write_users(users, chats, members)
+            except (IntegrityError, DataError):
+                SESSION.rollback()
+                _write_users_one_by_one(users, chats, members)
+        except Exception:
+            SESSION.rollback()
+            LOGGER.exception("Could not flush queued users to the database.")
+            with BUFFER_LOCK:
+                # anything queued since is newer
+                PENDING_USERS = {**users, **PENDING_USERS}
+                PENDING_CHATS = {**chats, **PENDING_CHATS}
+                PENDING_MEMBERS = {**members, **PENDING_MEMBERS}
+                _trim_pending()
+            return False
+        finally:
+            SESSION.close()
+
+        with BUFFER_LOCK:
+            if len(SEEN_USERS) + len(SEEN_CHATS) + len(SEEN_MEMBERS) > SEEN_LIMIT:
+                SEEN_USERS.clear()
+                SEEN_CHATS.clear()
+                SEEN_MEMBERS.clear()
+            SEEN_USERS.update(users)
+            SEEN_CHATS.update(chats)
+            SEEN_MEMBERS.update(members)
+        return True
+
+
+def __flush_users_loop():
+    while True:
+        FLUSH_EVENT.wait(FLUSH_INTERVAL)
+        FLUSH_EVENT.clear()
+        if not flush_users():
+            # don't hammer a database which is down
+            time.sleep(FLUSH_INTERVAL)
+
+
 def get_userid_by_name(username):
     try:
         return (
@@ -138,39 +318,45 @@ def get_name_by_userid(user_id):
 
 def get_chat_members(chat_id):
     try:
-        return SESSION.query(ChatMembers).filter(ChatMembers.chat == str(chat_id)).all()
+        return (
+            READ_SESSION.query(ChatMembers)
+            .filter(ChatMembers.chat == str(chat_id))
+            .all()
+        )
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def get_all_chats():
     try:
-        return SESSION.query(Chats).all()
+        return READ_SESSION.query(Chats).all()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def get_user_num_chats(user_id):
     try:
         return (
-            SESSION.query(ChatMembers).filter(ChatMembers.user == int(user_id)).count()
+            READ_SESSION.query(ChatMembers)
+            .filter(ChatMembers.user == int(user_id))
+            .count()
         )
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_chats():
     try:
-        return SESSION.query(Chats).count()
+        return READ_SESSION.query(Chats).count()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_users():
     try:
-        return SESSION.query(Users).count()
+        return READ_SESSION.query(Users).count()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def get_chat_name(chat_id):
@@ -182,6 +368,13 @@ def get_chat_name(chat_id):
 
 def migrate_chat(old_chat_id, new_chat_id):
     with INSERTION_LOCK:
+        flush_users()
+        with BUFFER_LOCK:
+            SEEN_CHATS.pop(str(old_chat_id), None)
+            SEEN_MEMBERS.difference_update(
+                {member for member in SEEN_MEMBERS if member[0] == str(old_chat_id)}
+            )
+
         if chat := SESSION.query(Chats).get(str(old_chat_id)):
             chat.chat_id = str(new_chat_id)
             SESSION.add(chat)
@@ -200,11 +393,30 @@ def migrate_chat(old_chat_id, new_chat_id):
         SESSION.commit()
 
 
-ensure_bot_in_db()
+def rem_chat(chat_id):
+    with INSERTION_LOCK:
+        flush_users()
+        with BUFFER_LOCK:
+            SEEN_CHATS.pop(str(chat_id), None)
+            SEEN_MEMBERS.difference_update(
+                {member for member in SEEN_MEMBERS if member[0] == str(chat_id)}
+            )
+
+        SESSION.query(ChatMembers).filter(ChatMembers.chat == str(chat_id)).delete()
+        if chat := SESSION.query(Chats).get(str(chat_id)):
+            SESSION.delete(chat)
+        SESSION.commit()
 
 
 def del_user(user_id):
     with INSERTION_LOCK:
+        flush_users()
+        with BUFFER_LOCK:
+            SEEN_USERS.pop(user_id, None)
+            SEEN_MEMBERS.difference_update(
+                {member for member in SEEN_MEMBERS if member[1] == user_id}
+            )
+
         if curr := SESSION.query(Users).get(user_id):
             SESSION.delete(curr)
             SESSION.commit()
@@ -214,3 +426,8 @@ def del_user(user_id):
         SESSION.commit()
         SESSION.close()
     return False
+
+
+ensure_bot_in_db()
+threading.Thread(target=__flush_users_loop, daemon=True).start()
+atexit.register(flush_users)
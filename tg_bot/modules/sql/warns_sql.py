@@ -9,10 +9,12 @@ from sqlalchemy import (
     func,
     distinct,
     Boolean,
+    JSON,
 )
 from sqlalchemy.dialects import postgresql
 
-from tg_bot.modules.sql import SESSION, BASE
+from tg_bot.modules.sql import SESSION, BASE, READ_SESSION
+from tg_bot.modules.sql.chat_cache import ChatCache
 
 
 class Warns(BASE):
@@ -21,7 +23,8 @@ class Warns(BASE):
     user_id = Column(BigInteger, primary_key=True)
     chat_id = Column(String(14), primary_key=True)
     num_warns = Column(Integer, default=0)
-    reasons = Column(postgresql.ARRAY(UnicodeText))
+    # A text[] on postgres as it always was, a JSON list anywhere else.
+    reasons = Column(JSON().with_variant(postgresql.ARRAY(UnicodeText), "postgresql"))
 
     def __init__(self, user_id, chat_id):
         self.user_id = user_id
@@ -80,7 +83,21 @@ WARN_INSERTION_LOCK = threading.RLock()
 WARN_FILTER_INSERTION_LOCK = threading.RLock()
 WARN_SETTINGS_LOCK = threading.RLock()
 
-WARN_FILTERS = {}
+
+def __load_chat_warn_filters(chat_id):
+    try:
+        keywords = (
+            SESSION.query(WarnFilters.keyword)
+            .filter(WarnFilters.chat_id == chat_id)
+            .all()
+        )
+        return sorted({keyword for (keyword,) in keywords}, key=lambda i: (-len(i), i))
+    finally:
+        SESSION.close()
+
+
+# chat_id -> its warn filter keywords, longest first
+WARN_FILTERS = ChatCache("warn filters", __load_chat_warn_filters)
 
 
 def warn_user(user_id, chat_id, reason=None):
@@ -147,33 +164,24 @@ def add_warn_filter(chat_id, keyword, reply):
     with WARN_FILTER_INSERTION_LOCK:
         warn_filt = WarnFilters(str(chat_id), keyword, reply)
 
-        if keyword not in WARN_FILTERS.get(str(chat_id), []):
-            WARN_FILTERS[str(chat_id)] = sorted(
-                WARN_FILTERS.get(str(chat_id), []) + [keyword],
-                key=lambda x: (-len(x), x),
-            )
-
         SESSION.merge(warn_filt)  # merge to avoid duplicate key issues
         SESSION.commit()
+        WARN_FILTERS.invalidate(chat_id)
 
 
 def remove_warn_filter(chat_id, keyword):
     with WARN_FILTER_INSERTION_LOCK:
-        if warn_filt := SESSION.query(WarnFilters).get(
-            (str(chat_id), keyword)
-        ):
-            if keyword in WARN_FILTERS.get(str(chat_id), []):  # sanity check
-                WARN_FILTERS.get(str(chat_id), []).remove(keyword)
-
+        if warn_filt := SESSION.query(WarnFilters).get((str(chat_id), keyword)):
             SESSION.delete(warn_filt)
             SESSION.commit()
+            WARN_FILTERS.invalidate(chat_id)
             return True
         SESSION.close()
         return False
 
 
 def get_chat_warn_triggers(chat_id):
-    return WARN_FILTERS.get(str(chat_id), set())
+    return WARN_FILTERS.get(chat_id)
 
 
 def get_chat_warn_filters(chat_id):
@@ -228,23 +236,23 @@ def get_warn_setting(chat_id):
 
 def num_warns():
     try:
-        return SESSION.query(func.sum(Warns.num_warns)).scalar() or 0
+        return READ_SESSION.query(func.sum(Warns.num_warns)).scalar() or 0
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_warn_chats():
     try:
-        return SESSION.query(func.count(distinct(Warns.chat_id))).scalar()
+        return READ_SESSION.query(func.count(distinct(Warns.chat_id))).scalar()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_warn_filters():
     try:
-        return SESSION.query(WarnFilters).count()
+        return READ_SESSION.query(WarnFilters).count()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def num_warn_chat_filters(chat_id):
@@ -260,29 +268,9 @@ def num_warn_chat_filters(chat_id):
 
 def num_warn_filter_chats():
     try:
-        return SESSION.query(func.count(distinct(WarnFilters.chat_id))).scalar()
-    finally:
-        SESSION.close()
-
-
-def __load_chat_warn_filters():
-    global WARN_FILTERS
-    try:
-        chats = SESSION.query(WarnFilters.chat_id).distinct().all()
-        for (chat_id,) in chats:  # remove tuple by ( ,)
-            WARN_FILTERS[chat_id] = []
-
-        all_filters = SESSION.query(WarnFilters).all()
-        for x in all_filters:
-            WARN_FILTERS[x.chat_id] += [x.keyword]
-
-        WARN_FILTERS = {
-            x: sorted(set(y), key=lambda i: (-len(i), i))
-            for x, y in WARN_FILTERS.items()
-        }
-
+        return READ_SESSION.query(func.count(distinct(WarnFilters.chat_id))).scalar()
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def migrate_chat(old_chat_id, new_chat_id):
@@ -303,8 +291,7 @@ def migrate_chat(old_chat_id, new_chat_id):
         for filt in chat_filters:
             filt.chat_id = str(new_chat_id)
         SESSION.commit()
-        WARN_FILTERS[str(new_chat_id)] = WARN_FILTERS[str(old_chat_id)]
-        del WARN_FILTERS[str(old_chat_id)]
+        WARN_FILTERS.invalidate(old_chat_id, new_chat_id)
 
     with WARN_SETTINGS_LOCK:
         chat_settings = (
@@ -315,6 +302,3 @@ def migrate_chat(old_chat_id, new_chat_id):
         for setting in chat_settings:
             setting.chat_id = str(new_chat_id)
         SESSION.commit()
-
-
-__load_chat_warn_filters()
@@ -1,9 +1,20 @@
 import threading
-
-from sqlalchemy import Column, String, Boolean, UnicodeText, Integer, BigInteger
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import (
+    Column,
+    String,
+    Boolean,
+    UnicodeText,
+    Integer,
+    BigInteger,
+    literal,
+    select,
+    union_all,
+)
 
 from tg_bot.modules.helper_funcs.msg_types import Types
-from tg_bot.modules.sql import SESSION, BASE
+from tg_bot.modules.sql import SESSION, BASE, READ_SESSION, migrate_primary_key
 
 DEFAULT_WELCOME = "Hey {first}, how are you?"
 DEFAULT_GOODBYE = "Nice knowing ya!"
@@ -39,8 +50,9 @@ class Welcome(BASE):
 
 class WelcomeButtons(BASE):
     __tablename__ = "welcome_urls"
+    # Single column key, see cust_filters_sql.Buttons.
     id = Column(Integer, primary_key=True, autoincrement=True)
-    chat_id = Column(String(14), primary_key=True)
+    chat_id = Column(String(14), nullable=False, index=True)
     name = Column(UnicodeText, nullable=False)
     url = Column(UnicodeText, nullable=False)
     same_line = Column(Boolean, default=False)
@@ -55,7 +67,7 @@ class WelcomeButtons(BASE):
 class GoodbyeButtons(BASE):
     __tablename__ = "leave_urls"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    chat_id = Column(String(14), primary_key=True)
+    chat_id = Column(String(14), nullable=False, index=True)
     name = Column(UnicodeText, nullable=False)
     url = Column(UnicodeText, nullable=False)
     same_line = Column(Boolean, default=False)
@@ -125,6 +137,8 @@ CombotCASStatus.__table__.create(checkfirst=True)
 BannedChat.__table__.create(checkfirst=True)
 DefenseMode.__table__.create(checkfirst=True)
 AutoKickSafeMode.__table__.create(checkfirst=True)
+migrate_primary_key(WelcomeButtons.__table__)
+migrate_primary_key(GoodbyeButtons.__table__)
 
 INSERTION_LOCK = threading.RLock()
 WELC_BTN_LOCK = threading.RLock()
@@ -137,15 +151,142 @@ AUTOKICK_LOCK = threading.RLock()
 
 BLACKLIST = set()
 
-
-def welcome_mutes(chat_id):
+WELCOME_CACHE_SIZE = 1000
+WELCOME_CACHE_LOCK = threading.Lock()
+# chat_id -> WelcomeConfig, least recently used first
+WELCOME_CONFIGS = OrderedDict()
+# Bumped on every invalidation, so a load which raced with a write isn't cached.
+_CONFIG_GENERATION = 0
+
+WelcomeButton = namedtuple("WelcomeButton", ("name", "url", "same_line"))
+
+
+class WelcomeConfig:
+    """Every welcome_sql setting of a chat, with the defaults filled in."""
+
+    __slots__ = (
+        "should_welcome",
+        "custom_welcome",
+        "welcome_media",
+        "welcome_type",
+        "should_goodbye",
+        "custom_leave",
+        "goodbye_media",
+        "leave_type",
+        "clean_welcome",
+        "del_joined",
+        "welc_buttons",
+        "gdbye_buttons",
+        "welcome_mutes",
+        "cas_status",
+        "cas_autoban",
+        "defense",
+        "kick_time",
+    )
+
+    def __init__(self, welc, mutes, cas, defense, autokick, buttons):
+        if welc:
+            self.should_welcome = welc.should_welcome
+            self.custom_welcome = welc.custom_welcome
+            self.welcome_media = welc.welcome_media
+            self.welcome_type = welc.welcome_type
+            self.should_goodbye = welc.should_goodbye
+            self.custom_leave = welc.custom_leave
+            self.goodbye_media = welc.goodbye_media
+            self.leave_type = welc.leave_type
+            self.clean_welcome = welc.clean_welcome
+            self.del_joined = welc.del_joined
+        else:
+            # Welcome by default.
+            self.should_welcome = self.should_goodbye = True
+            self.custom_welcome = DEFAULT_WELCOME
+            self.custom_leave = DEFAULT_GOODBYE
+            self.welcome_media = self.goodbye_media = ""
+            self.welcome_type = self.leave_type = Types.TEXT
+            self.clean_welcome = self.del_joined = False
+
+        self.welc_buttons = buttons.get("welcome", [])
+        self.gdbye_buttons = buttons.get("goodbye", [])
+        self.welcome_mutes = mutes.welcomemutes if mutes else False
+        self.cas_status = cas.status if cas else True
+        self.cas_autoban = cas.autoban if cas and cas.autoban else False
+        self.defense = defense.status if defense else False
+        self.kick_time = autokick.timeK if autokick else 90  # 90 seconds
+
+
+def _load_welcome_config(chat_id):
+    chat = select([literal(str(chat_id)).label("chat_id")]).alias("chat")
     try:
-        if welcomemutes := SESSION.query(WelcomeMute).get(str(chat_id)):
-            return welcomemutes.welcomemutes
-        return False
+        settings = (
+            SESSION.query(
+                Welcome, WelcomeMute, CombotCASStatus, DefenseMode, AutoKickSafeMode
+            )
+            .select_from(chat)
+            .outerjoin(Welcome, Welcome.chat_id == chat.c.chat_id)
+            .outerjoin(WelcomeMute, WelcomeMute.chat_id == chat.c.chat_id)
+            .outerjoin(CombotCASStatus, CombotCASStatus.chat_id == chat.c.chat_id)
+            .outerjoin(DefenseMode, DefenseMode.chat_id == chat.c.chat_id)
+            .outerjoin(AutoKickSafeMode, AutoKickSafeMode.chat_id == chat.c.chat_id)
+            .one()
+        )
+
+        rows = SESSION.execute(
+            union_all(
+                *(
+                    select(
+                        [
+                            literal(kind).label("kind"),
+                            table.id,
+                            table.name,
+                            table.url,
+                            table.same_line,
+                        ]
+                    ).where(table.chat_id == str(chat_id))
+                    for kind, table in (
+                        ("welcome", WelcomeButtons),
+                        ("goodbye", GoodbyeButtons),
+                    )
+                )
+            )
+        ).fetchall()
     finally:
         SESSION.close()
 
+    buttons = {}
+    for row in sorted(rows, key=lambda row: row.id):
+        buttons.setdefault(row.kind, []).append(
+            WelcomeButton(row.name, row.url, row.same_line)
+        )
+    return WelcomeConfig(*settings, buttons)
+
+
+def get_welcome_config(chat_id):
+    with WELCOME_CACHE_LOCK:
+        if (config := WELCOME_CONFIGS.get(str(chat_id))) is not None:
+            WELCOME_CONFIGS.move_to_end(str(chat_id))
+            return config
+        generation = _CONFIG_GENERATION
+
+    config = _load_welcome_config(chat_id)
+    with WELCOME_CACHE_LOCK:
+        if generation == _CONFIG_GENERATION:
+            WELCOME_CONFIGS[str(chat_id)] = config
+            if len(WELCOME_CONFIGS) > WELCOME_CACHE_SIZE:
+                WELCOME_CONFIGS.popitem(last=False)
+    return config
+
+
+def _invalidate_config(*chat_ids):
+    global _CONFIG_GENERATION
+    with WELCOME_CACHE_LOCK:
+        _CONFIG_GENERATION += 1
+        for chat_id in chat_ids:
+            WELCOME_CONFIGS.pop(str(chat_id), None)
+
+
+def welcome_mutes(chat_id):
+    return get_welcome_config(chat_id).welcome_mutes
+
 
 def set_welcome_mutes(chat_id, welcomemutes):
     with WM_LOCK:
@@ -154,37 +295,31 @@ def set_welcome_mutes(chat_id, welcomemutes):
         welcome_m = WelcomeMute(str(chat_id), welcomemutes)
         SESSION.add(welcome_m)
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def get_welc_pref(chat_id):
-    welc = SESSION.query(Welcome).get(str(chat_id))
-    SESSION.close()
-    if welc:
-        return (
-            welc.should_welcome,
-            welc.custom_welcome,
-            welc.welcome_media,
-            welc.welcome_type,
-        )
-    # Welcome by default.
-    return True, DEFAULT_WELCOME, "", Types.TEXT
+    config = get_welcome_config(chat_id)
+    return (
+        config.should_welcome,
+        config.custom_welcome,
+        config.welcome_media,
+        config.welcome_type,
+    )
 
 
 def get_gdbye_pref(chat_id):
-    welc = SESSION.query(Welcome).get(str(chat_id))
-    SESSION.close()
-    if welc:
-        return (
-            welc.should_goodbye,
-            welc.custom_leave,
-            welc.goodbye_media,
-            welc.leave_type,
-        )
-    # Welcome by default.
-    return True, DEFAULT_GOODBYE, "", Types.TEXT
+    config = get_welcome_config(chat_id)
+    return (
+        config.should_goodbye,
+        config.custom_leave,
+        config.goodbye_media,
+        config.leave_type,
+    )
 
 
 def set_clean_welcome(chat_id, clean_welcome):
+    global _CONFIG_GENERATION
     with INSERTION_LOCK:
         curr = SESSION.query(Welcome).get(str(chat_id))
         if not curr:
@@ -195,15 +330,17 @@ def set_clean_welcome(chat_id, clean_welcome):
         SESSION.add(curr)
         SESSION.commit()
 
+        # Runs on every join when clean welcome is on, so update the cached
+        # config in place rather than reloading it. The generation still moves
+        # on, so a load which read the row before this commit isn't cached.
+        with WELCOME_CACHE_LOCK:
+            _CONFIG_GENERATION += 1
+            if config := WELCOME_CONFIGS.get(str(chat_id)):
+                config.clean_welcome = int(clean_welcome)
 
-def get_clean_pref(chat_id):
-    welc = SESSION.query(Welcome).get(str(chat_id))
-    SESSION.close()
-
-    if welc:
-        return welc.clean_welcome
 
-    return False
+def get_clean_pref(chat_id):
+    return get_welcome_config(chat_id).clean_welcome
 
 
 def set_del_joined(chat_id, del_joined):
@@ -216,16 +353,11 @@ def set_del_joined(chat_id, del_joined):
 
         SESSION.add(curr)
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def get_del_pref(chat_id):
-    welc = SESSION.query(Welcome).get(str(chat_id))
-    SESSION.close()
-
-    if welc:
-        return welc.del_joined
-
-    return False
+    return get_welcome_config(chat_id).del_joined
 
 
 def set_welc_preference(chat_id, should_welcome):
@@ -238,6 +370,7 @@ def set_welc_preference(chat_id, should_welcome):
 
         SESSION.add(curr)
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def set_gdbye_preference(chat_id, should_goodbye):
@@ -250,6 +383,7 @@ def set_gdbye_preference(chat_id, should_goodbye):
 
         SESSION.add(curr)
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def set_custom_welcome(
@@ -289,16 +423,11 @@ def set_custom_welcome(
                 SESSION.add(button)
 
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def get_custom_welcome(chat_id):
-    welcome_settings = SESSION.query(Welcome).get(str(chat_id))
-    ret = DEFAULT_WELCOME
-    if welcome_settings and welcome_settings.custom_welcome:
-        ret = welcome_settings.custom_welcome
-
-    SESSION.close()
-    return ret
+    return get_welcome_config(chat_id).custom_welcome or DEFAULT_WELCOME
 
 
 def set_custom_gdbye(
@@ -338,49 +467,23 @@ def set_custom_gdbye(
                 SESSION.add(button)
 
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def get_custom_gdbye(chat_id):
-    welcome_settings = SESSION.query(Welcome).get(str(chat_id))
-    ret = DEFAULT_GOODBYE
-    if welcome_settings and welcome_settings.custom_leave:
-        ret = welcome_settings.custom_leave
-
-    SESSION.close()
-    return ret
+    return get_welcome_config(chat_id).custom_leave or DEFAULT_GOODBYE
 
 
 def get_welc_buttons(chat_id):
-    try:
-        return (
-            SESSION.query(WelcomeButtons)
-            .filter(WelcomeButtons.chat_id == str(chat_id))
-            .order_by(WelcomeButtons.id)
-            .all()
-        )
-    finally:
-        SESSION.close()
+    return get_welcome_config(chat_id).welc_buttons
 
 
 def get_gdbye_buttons(chat_id):
-    try:
-        return (
-            SESSION.query(GoodbyeButtons)
-            .filter(GoodbyeButtons.chat_id == str(chat_id))
-            .order_by(GoodbyeButtons.id)
-            .all()
-        )
-    finally:
-        SESSION.close()
+    return get_welcome_config(chat_id).gdbye_buttons
 
 
 def get_cas_status(chat_id):
-    try:
-        if resultObj := SESSION.query(CombotCASStatus).get(str(chat_id)):
-            return resultObj.status
-        return True
-    finally:
-        SESSION.close()
+    return get_welcome_config(chat_id).cas_status
 
 
 def set_cas_status(chat_id, status):
@@ -392,16 +495,11 @@ def set_cas_status(chat_id, status):
         newObj = CombotCASStatus(str(chat_id), status, ban)
         SESSION.add(newObj)
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def get_cas_autoban(chat_id):
-    try:
-        resultObj = SESSION.query(CombotCASStatus).get(str(chat_id))
-        if resultObj and resultObj.autoban:
-            return resultObj.autoban
-        return False
-    finally:
-        SESSION.close()
+    return get_welcome_config(chat_id).cas_autoban
 
 
 def set_cas_autoban(chat_id, autoban):
@@ -413,6 +511,7 @@ def set_cas_autoban(chat_id, autoban):
         newObj = CombotCASStatus(str(chat_id), status, autoban)
         SESSION.add(newObj)
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def migrate_chat(old_chat_id, new_chat_id):
@@ -439,14 +538,15 @@ def migrate_chat(old_chat_id, new_chat_id):
                 btn.chat_id = str(new_chat_id)
 
         SESSION.commit()
+        _invalidate_config(old_chat_id, new_chat_id)
 
 
 def __load_blacklisted_chats_list():  # load shit to memory to be faster, and reduce disk access
     global BLACKLIST
     try:
-        BLACKLIST = {x.chat_id for x in SESSION.query(BannedChat).all()}
+        BLACKLIST = {x.chat_id for x in READ_SESSION.query(BannedChat).all()}
     finally:
-        SESSION.close()
+        READ_SESSION.close()
 
 
 def blacklistChat(chat_id):
@@ -472,12 +572,7 @@ def isBanned(chat_id):
 
 
 def getDefenseStatus(chat_id):
-    try:
-        if resultObj := SESSION.query(DefenseMode).get(str(chat_id)):
-            return resultObj.status
-        return False  # default
-    finally:
-        SESSION.close()
+    return get_welcome_config(chat_id).defense
 
 
 def setDefenseStatus(chat_id, status):
@@ -487,15 +582,11 @@ def setDefenseStatus(chat_id, status):
         newObj = DefenseMode(str(chat_id), status)
         SESSION.add(newObj)
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 def getKickTime(chat_id):
-    try:
-        if resultObj := SESSION.query(AutoKickSafeMode).get(str(chat_id)):
-            return resultObj.timeK
-        return 90  # 90 seconds
-    finally:
-        SESSION.close()
+    return get_welcome_config(chat_id).kick_time
 
 
 def setKickTime(chat_id, value):
@@ -505,6 +596,7 @@ def setKickTime(chat_id, value):
         newObj = AutoKickSafeMode(str(chat_id), int(value))
         SESSION.add(newObj)
         SESSION.commit()
+        _invalidate_config(chat_id)
 
 
 __load_blacklisted_chats_list()
@@ -1,4 +1,6 @@
 import subprocess
+import threading
+from io import BytesIO
 
 import tg_bot.modules.helper_funcs.cas_api as cas
 import tg_bot.modules.helper_funcs.git_api as git
@@ -9,6 +11,9 @@ from telegram.ext import CommandHandler
 
 from tg_bot import dispatcher, CallbackContext
 from tg_bot.modules.helper_funcs.filters import CustomFilters
+from tg_bot.modules.helper_funcs.profiler import sample
+from tg_bot.modules.sql import pool_status
+from tg_bot.modules.sql.chat_cache import CHAT_CACHES
 
 
 def status(update: Update, context: CallbackContext):
@@ -26,11 +31,79 @@ def status(update: Update, context: CallbackContext):
     )
     reply += f"*CAS API version:* `{str(cas.vercheck())}" + "`\n"
     reply += f"*GitHub API version:* `{str(git.vercheck())}" + "`\n"
+    for name, pool in pool_status().items():
+        hits = pool["hits"] * 100 // pool["checkouts"] if pool["checkouts"] else 100
+        reply += (
+            f"*DB pool ({name}):* `{pool['checked_out']}/{pool['size']} in use, "
+            f"{hits}% reused, {pool['wait_avg'] * 1000:.1f}ms avg wait, "
+            f"{pool['timeouts']} timeouts`\n"
+        )
+    for cache in CHAT_CACHES:
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hits = stats["hits"] * 100 // lookups if lookups else 100
+        reply += (
+            f"*Chat cache ({cache.name}):* `{stats['chats']}/{stats['size']} chats, "
+            f"{hits}% hits, {stats['evictions']} evicted`\n"
+        )
     update.effective_message.reply_text(reply, parse_mode=ParseMode.MARKDOWN)
 
 
+PROFILE_DEFAULT = 10
+PROFILE_MAX = 120
+PROFILE_LOCK = threading.Lock()
+
+
+def profile(update: Update, context: CallbackContext):
+    msg = update.effective_message
+    args = context.args
+    if args and not args[0].isdigit():
+        msg.reply_text("Usage: /profile <seconds>")
+        return
+    seconds = min(int(args[0]) if args else PROFILE_DEFAULT, PROFILE_MAX)
+
+    if not PROFILE_LOCK.acquire(blocking=False):
+        msg.reply_text("A profile is already running.")
+        return
+    try:
+        msg.reply_text(f"Profiling the workers for {seconds}s...")
+        result = sample(dispatcher, seconds)
+    finally:
+        PROFILE_LOCK.release()
+
+    if not result.busy:
+        msg.reply_text("The workers were idle the whole time.")
+        return
+
+    busy = result.busy * 100 // result.samples if result.samples else 0
+    reply = (
+        f"*Profile:* `{result.seconds:.1f}s, {result.samples} samples, "
+        f"{busy}% busy`\n\n*Handlers:*\n"
+    )
+    for handler, count in result.handlers().most_common(10):
+        reply += f"`{count * 100 / result.busy:5.1f}% {handler}`\n"
+    reply += "\n*Hottest functions (self / total):*\n"
+    for function, own, total in result.top():
+        reply += (
+            f"`{own * 100 / result.busy:5.1f}% {total * 100 / result.busy:5.1f}% "
+            f"{function}`\n"
+        )
+    with BytesIO(str.encode(result.collapsed())) as output:
+        output.name = "profile.collapsed"
+        msg.reply_document(
+            document=output,
+            filename="profile.collapsed",
+            caption="Collapsed stacks, for flamegraph.pl or speedscope.app",
+        )
+    msg.reply_text(reply, parse_mode=ParseMode.MARKDOWN)
+
+
 STATUS_HANDLER = CommandHandler(
     "status", status, filters=CustomFilters.sudo_filter, run_async=True
 )
+PROFILE_HANDLER = CommandHandler(
+    "profile", profile, filters=CustomFilters.sudo_filter, run_async=True
+)
 
 dispatcher.add_handler(STATUS_HANDLER)
+dispatcher.add_handler(PROFILE_HANDLER)
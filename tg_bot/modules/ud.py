@@ -1,20 +1,26 @@
-from requests import get
-
+from requests import RequestException
 from telegram import Update
 
 from tg_bot.modules.disable import DisableAbleCommandHandler
+from tg_bot.modules.helper_funcs.http_client import get_json
 from tg_bot import dispatcher, CallbackContext
 
+UD_URL = "http://api.urbandictionary.com/v0/define"
+# How long to cache a definition, in seconds.
+UD_TTL = 24 * 60 * 60
+
 
 def ud(update: Update, context: CallbackContext):
     bot = context.bot
     try:
         message = update.effective_message
         text = message.text[len("/ud ") :]
-        results = get(f"http://api.urbandictionary.com/v0/define?term={text}").json()
+        results = get_json(UD_URL, UD_TTL, params={"term": text})
         reply_text = f'Word: {text}\nDefinition: {results["list"][0]["definition"]}'
     except IndexError:
         reply_text = f"Word: {text}\nDefinition: 404 definition not found"
+    except (RequestException, ValueError):
+        reply_text = "Urban Dictionary isn't answering, try again later."
     return message.reply_text(reply_text)
 
 
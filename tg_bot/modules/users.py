@@ -1,13 +1,14 @@
+import hashlib
 from io import BytesIO
-from time import sleep
 from typing import Optional
 
-from telegram import TelegramError, Chat, Message, Update
-from telegram.error import BadRequest
+from telegram import Chat, Message, Update
+from telegram.error import BadRequest, Unauthorized
 from telegram.ext import MessageHandler, Filters, CommandHandler
 
 import tg_bot.modules.sql.users_sql as sql
 from tg_bot import dispatcher, CallbackContext, OWNER_ID, LOGGER
+from tg_bot.modules.helper_funcs.fanout import fan_out
 from tg_bot.modules.helper_funcs.filters import CustomFilters
 
 USERS_GROUP = 4
@@ -43,25 +44,46 @@ def get_user_id(username):
 
 def broadcast(update: Update, context: CallbackContext):
     bot = context.bot
-    to_send = update.effective_message.text.split(None, 1)
+    message = update.effective_message
+    to_send = message.text.split(None, 1)
     if len(to_send) >= 2:
+        text = to_send[1]
         chats = sql.get_all_chats() or []
-        failed = 0
-        for chat in chats:
+        gone = []
+
+        def send(chat_id):
             try:
-                bot.sendMessage(int(chat.chat_id), to_send[1])
-                sleep(0.1)
-            except TelegramError:
-                failed += 1
-                LOGGER.warning(
-                    "Couldn't send broadcast to %s, group name %s",
-                    str(chat.chat_id),
-                    str(chat.chat_name),
-                )
-
-        update.effective_message.reply_text(
-            "Broadcast complete. {} groups failed to receive the message, probably "
-            "due to being kicked.".format(failed)
+                bot.send_message(int(chat_id), text)
+            except Unauthorized:
+                gone.append(chat_id)
+                raise
+            except BadRequest as excp:
+                if excp.message == "Chat not found":
+                    gone.append(chat_id)
+                raise
+
+        # Sending the same text again resumes an interrupted broadcast. It is
+        # only remembered by a digest, not in full.
+        broadcast_id = hashlib.sha1(text.encode()).hexdigest()[:16]
+        status = message.reply_text("Broadcasting to {} chats.".format(len(chats)))
+        result = fan_out(
+            [chat.chat_id for chat in chats],
+            send,
+            None,
+            key=("broadcast", broadcast_id),
+            status=status,
+            status_text="Broadcasting.",
+        )
+
+        for chat_id in gone:
+            sql.rem_chat(chat_id)
+
+        message.reply_text(
+            "Broadcast complete. {} groups failed to receive the message, {} of them "
+            "were removed from the chat list as I'm no longer there.".format(
+                sum(len(failed) for failed in result.errors.values()), len(gone)
+            )
+            + result.summary()
         )
 
 
@@ -70,10 +92,10 @@ def log_user(update: Update, context: CallbackContext):
     chat = update.effective_chat  # type: Optional[Chat]
     msg = update.effective_message  # type: Optional[Message]
 
-    sql.update_user(msg.from_user.id, msg.from_user.username, chat.id, chat.title)
+    sql.queue_update_user(msg.from_user.id, msg.from_user.username, chat.id, chat.title)
 
     if msg.reply_to_message:
-        sql.update_user(
+        sql.queue_update_user(
             msg.reply_to_message.from_user.id,
             msg.reply_to_message.from_user.username,
             chat.id,
@@ -81,7 +103,7 @@ def log_user(update: Update, context: CallbackContext):
         )
 
     if msg.forward_from:
-        sql.update_user(msg.forward_from.id, msg.forward_from.username)
+        sql.queue_update_user(msg.forward_from.id, msg.forward_from.username)
 
 
 def chats(update: Update, context: CallbackContext):
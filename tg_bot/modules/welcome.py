@@ -162,19 +162,26 @@ def new_member(update: Update, context: CallbackContext):
     user = update.effective_user  # type: Optional[User]
     msg = update.effective_message  # type: Optional[Message]
     chat_name = chat.title or chat.first or chat.username  # type: Optional[chat_name]
-    should_welc, cust_welcome, cust_media, welc_type = sql.get_welc_pref(chat.id)
-    welc_mutes = sql.welcome_mutes(chat.id)
-    casPrefs = sql.get_cas_status(str(chat.id))  # check if enabled, obviously
-    autoban = sql.get_cas_autoban(str(chat.id))
+    config = sql.get_welcome_config(chat.id)
+    should_welc, cust_welcome, cust_media, welc_type = (
+        config.should_welcome,
+        config.custom_welcome,
+        config.welcome_media,
+        config.welcome_type,
+    )
+    welc_mutes = config.welcome_mutes
+    casPrefs = config.cas_status  # check if enabled, obviously
+    autoban = config.cas_autoban
     chatbanned = sql.isBanned(str(chat.id))
-    defense = sql.getDefenseStatus(str(chat.id))
-    time_value = sql.getKickTime(str(chat.id))
+    defense = config.defense
+    time_value = config.kick_time
     isUserGbanned = gbansql.is_user_gbanned(user.id)
     if isUserGbanned:
         return
+    cas_banned = casPrefs and not chatbanned and cas.banchecker(user.id)
     if chatbanned:
         bot.leave_chat(int(chat.id))
-    elif casPrefs and not autoban and cas.banchecker(user.id):
+    elif cas_banned and not autoban:
         bot.restrict_chat_member(
             chat.id,
             user.id,
@@ -194,7 +201,7 @@ def new_member(update: Update, context: CallbackContext):
         if defense:
             bantime = int(time.time()) + 60
             chat.ban_member(user.id, until_date=bantime)
-    elif casPrefs and autoban and cas.banchecker(user.id):
+    elif cas_banned and autoban:
         chat.ban_member(user.id)
         msg.reply_text("CAS banned user detected! User has been automatically banned!")
         isUserGbanned = gbansql.is_user_gbanned(user.id)
@@ -260,8 +267,7 @@ def new_member(update: Update, context: CallbackContext):
                         chatname=escape_markdown(chat.title),
                         id=new_mem.id,
                     )
-                    buttons = sql.get_welc_buttons(chat.id)
-                    keyb = build_keyboard(buttons)
+                    keyb = build_keyboard(config.welc_buttons)
                 else:
                     res = sql.DEFAULT_WELCOME.format(first=first_name)
                     keyb = []
@@ -325,22 +331,24 @@ def new_member(update: Update, context: CallbackContext):
                         ),
                     )
                     if time_value:
-                        time.sleep(time_value)
-                        member = chat.get_member(int(new_mem.id))
-                        if not (member.can_send_messages or member.status == "left"):
-                            print("kicking user..")
-                            bantime = int(time.time()) + 60
-                            try:
-                                chat.ban_member(new_mem.id, until_date=bantime)
-                            except:
-                                pass
-                            buttonMsg.delete()
-                            sent.delete()
-                            update.message.delete()
+                        context.job_queue.run_once(
+                            kick_unverified,
+                            time_value,
+                            context=(
+                                chat.id,
+                                new_mem.id,
+                                [
+                                    sent_msg.message_id
+                                    for sent_msg in (buttonMsg, sent, update.message)
+                                    if sent_msg
+                                ],
+                            ),
+                            name=verify_job_name(chat.id, new_mem.id),
+                        )
 
             delete_join(bot, update)
 
-        prev_welc = sql.get_clean_pref(chat.id)
+        prev_welc = config.clean_welcome
         if prev_welc:
             try:
                 bot.delete_message(chat.id, prev_welc)
@@ -351,6 +359,33 @@ def new_member(update: Update, context: CallbackContext):
                 sql.set_clean_welcome(chat.id, sent.message_id)
 
 
+def verify_job_name(chat_id, user_id):
+    return "welcome_verify_{}_{}".format(chat_id, user_id)
+
+
+def kick_unverified(context: CallbackContext):
+    bot = context.bot
+    chat_id, user_id, message_ids = context.job.context
+    try:
+        member = bot.get_chat_member(chat_id, user_id)
+    except BadRequest:
+        return
+
+    if member.can_send_messages or member.status == "left":
+        return
+
+    try:
+        bot.ban_chat_member(chat_id, user_id, until_date=int(time.time()) + 60)
+    except BadRequest:
+        pass
+
+    for message_id in message_ids:
+        try:
+            bot.delete_message(chat_id, message_id)
+        except BadRequest:
+            pass
+
+
 def left_member(update: Update, context: CallbackContext):
     bot = context.bot
     chat = update.effective_chat  # type: Optional[Chat]
@@ -812,6 +847,10 @@ def user_button(update: Update, context: CallbackContext):
             ),
             until_date=(int(time.time() + 24 * 60 * 60)),
         )
+        for job in context.job_queue.get_jobs_by_name(
+            verify_job_name(chat.id, join_user)
+        ):
+            job.schedule_removal()
         try:
             bot.deleteMessage(chat.id, message.message_id)
         except:
@@ -1195,9 +1234,7 @@ Commands:
  - /getdefense: gets the current defense setting
  - /kicktime: gets the auto-kick time setting
  - /setkicktime: sets new auto-kick time value (between 30 and 900 seconds)
-""".format(
-    WELC_HELP_TXT
-)
+""".format(WELC_HELP_TXT)
 
 __mod_name__ = "Greetings"
 
@@ -1296,3 +1333,5 @@ dispatcher.add_handler(DEFENSE_HANDLER)
 dispatcher.add_handler(GETDEF_HANDLER)
 dispatcher.add_handler(GETTIMESET_HANDLER)
 dispatcher.add_handler(SETTIMER_HANDLER)
+
+cas.start_export_download()
@@ -0,0 +1,405 @@
+"""
+Replay recorded or generated updates through the real dispatcher, against a
+local stand-in for the Bot API, and report throughput and latency.
+
+    python3 -m tg_bot.replay generate updates.jsonl.gz --updates 20000
+    python3 -m tg_bot.replay run updates.jsonl.gz --latency 0.05 --retry-after 0.01
+
+Updates are recorded from a live bot by setting UPDATE_LOG. The bot config
+is read as usual, so point DATABASE_URL at a scratch database (a SQLite
+file, as sqlite:// shares one connection between all the workers) and use
+any well-formed TOKEN; nothing is sent to Telegram. Joins are
+checked against an empty CAS export instead of the CAS api, but other
+modules which fetch from the web when loaded still do so, skip them with
+NO_LOAD if that matters.
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import random
+import statistics
+import threading
+import time
+from array import array
+from collections import Counter
+
+from telegram import Update
+from telegram.error import RetryAfter
+from telegram.ext import Dispatcher
+
+from tg_bot import dispatcher, LOGGER
+from tg_bot.modules.helper_funcs.update_log import read_updates
+
+BOT_ID = 1000
+BOT_USERNAME = "replay_bot"
+WORDS = (
+    "hello there anyone know how to fix this my phone keeps rebooting after the "
+    "update thanks lol same here try clearing cache which version are you on"
+).split()
+COMMANDS = ("/notes", "/get note1", "#note2", "/filters", "/rules", "/id", "/warns")
+
+
+class FakeBotApi:
+    """
+    Stands in for the bot's telegram.utils.request.Request: answers Bot API
+    calls locally and counts them. Every call waits `latency` seconds (plus
+    up to `jitter`), and a `retry_after` fraction of them fail with a 429.
+    """
+
+    con_pool_size = 1
+
+    def __init__(self, latency=0.0, jitter=0.0, retry_after=0.0, admins=()):
+        self.latency = latency
+        self.jitter = jitter
+        self.retry_after = retry_after
+        self.admins = set(admins) | {BOT_ID}
+        self.calls = Counter()
+        self.throttled = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def post(self, url, data=None, timeout=None):
+        method = url.rsplit("/", 1)[-1]
+        with self._lock:
+            self.calls[method] += 1
+            delay = self.latency + self._random.random() * self.jitter
+            throttled = self._random.random() < self.retry_after
+            if throttled:
+                self.throttled += 1
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            raise RetryAfter(1)
+        return self.answer(method, data or {})
+
+    def retrieve(self, url, timeout=None):
+        self.calls["file"] += 1
+        return b""
+
+    def stop(self):
+        pass
+
+    def _member(self, user_id):
+        user = {"id": user_id, "is_bot": user_id == BOT_ID, "first_name": "User"}
+        if user_id not in self.admins:
+            return {"user": user, "status": "member"}
+        rights = (
+            "can_manage_chat",
+            "can_delete_messages",
+            "can_manage_voice_chats",
+            "can_restrict_members",
+            "can_promote_members",
+            "can_change_info",
+            "can_invite_users",
+            "can_pin_messages",
+        )
+        member = dict.fromkeys(rights, True)
+        member.update(
+            user=user, status="administrator", can_be_edited=False, is_anonymous=False
+        )
+        return member
+
+    def _message(self, data):
+        chat_id = int(data.get("chat_id", 0))
+        return {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {
+                "id": chat_id,
+                "type": "supergroup" if chat_id < 0 else "private",
+                "title": "Chat",
+            },
+            "from": self.answer("getMe", data),
+            "text": data.get("text") or data.get("caption") or "",
+        }
+
+    def answer(self, method, data):
+        if method == "getMe":
+            return {
+                "id": BOT_ID,
+                "is_bot": True,
+                "first_name": "Replay",
+                "username": BOT_USERNAME,
+                "can_join_groups": True,
+            }
+        if method == "getChatMember":
+            return self._member(int(data["user_id"]))
+        if method == "getChatAdministrators":
+            return [self._member(user_id) for user_id in sorted(self.admins)]
+        if method == "getChat":
+            return self._message(data)["chat"]
+        if method in ("getChatMemberCount", "getChatMembersCount"):
+            return 100
+        if method == "getUserProfilePhotos":
+            return {"total_count": 0, "photos": []}
+        if method == "copyMessage":
+            return {"message_id": next(self._ids)}
+        if method.startswith("send") or (
+            method.startswith("edit") and "inline_message_id" not in data
+        ):
+            return self._message(data)
+        return True
+
+
+def _user(user_id):
+    return {
+        "id": user_id,
+        "is_bot": False,
+        "first_name": f"User{user_id}",
+        "username": f"user{user_id}",
+    }
+
+
+def generate(count, chats=50, users=2000, seed=0):
+    """
+    Synthetic group traffic: mostly chatter, with commands, joins and
+    bursts of spam from a single user.
+    """
+    rand = random.Random(seed)
+    update_ids = itertools.count(1)
+    now = int(time.time())
+
+    def message(chat_id, user_id, **fields):
+        update_id = next(update_ids)
+        msg = {
+            "message_id": update_id,
+            "date": now + update_id // 100,
+            "chat": {"id": chat_id, "type": "supergroup", "title": f"Chat {chat_id}"},
+            "from": _user(user_id),
+        }
+        msg.update(fields)
+        return {"update_id": update_id, "message": msg}
+
+    def text(chat_id, user_id, body):
+        fields = {"text": body}
+        if body.startswith("/"):
+            command = body.split()[0]
+            fields["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(command)}
+            ]
+        return message(chat_id, user_id, **fields)
+
+    produced = 0
+    while produced < count:
+        chat_id = -1001000000000 - rand.randrange(chats)
+        user_id = 10000 + rand.randrange(users)
+        kind = rand.random()
+        if kind < 0.85:
+            batch = [text(chat_id, user_id, " ".join(rand.choices(WORDS, k=8)))]
+        elif kind < 0.93:
+            batch = [text(chat_id, user_id, rand.choice(COMMANDS))]
+        elif kind < 0.98:
+            batch = [message(chat_id, user_id, new_chat_members=[_user(user_id)])]
+        else:
+            spam = " ".join(rand.choices(WORDS, k=4))
+            batch = [text(chat_id, user_id, spam) for _ in range(20)]
+
+        for update in batch[: count - produced]:
+            yield update
+        produced += len(batch)
+
+
+def seed_chats(chat_ids):
+    """Give the replayed chats some notes, filters, blacklists and rules."""
+    from tg_bot.modules.helper_funcs.msg_types import Types
+    from tg_bot.modules.sql import (
+        blacklist_sql,
+        cust_filters_sql,
+        notes_sql,
+        rules_sql,
+    )
+
+    for chat_id in chat_ids:
+        for i in range(1, 6):
+            notes_sql.add_note_to_db(chat_id, f"note{i}", f"Note {i}", Types.TEXT)
+        for word in ("fix", "version", "thanks"):
+            cust_filters_sql.add_filter(chat_id, word, f"Filter for {word}")
+        blacklist_sql.add_to_blacklist(chat_id, "spamlink")
+        rules_sql.set_rules(chat_id, "Be nice.")
+
+
+class Replay:
+    """
+    Feeds updates to a running dispatcher and times each of them, from
+    process_update starting until it and every run_async callback it
+    scheduled have returned. Updates dropped by the chat limiter are only
+    counted.
+    """
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.dropped = 0
+        self.latencies = []
+        self._pending = {}  # id(update) -> [started, async callbacks left, processed]
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def _finish(self, key):
+        started, left, processed = self._pending[key]
+        if left == 0 and processed:
+            del self._pending[key]
+            self.latencies.append(time.perf_counter() - started)
+            self._idle.notify_all()
+
+    def instrument(self):
+        process_update = Dispatcher.process_update
+        run_async = Dispatcher.run_async
+
+        def timed_process_update(disp, update):
+            key = id(update)
+            with self._lock:
+                self._pending[key] = [time.perf_counter(), 0, False]
+            # Only the dispatcher thread runs process_update.
+            dropped = self.limiter.total_dropped
+            try:
+                process_update(disp, update)
+            finally:
+                with self._lock:
+                    if self.limiter.total_dropped != dropped:
+                        del self._pending[key]
+                        self.dropped += 1
+                        self._idle.notify_all()
+                    else:
+                        self._pending[key][2] = True
+                        self._finish(key)
+
+        def timed_run_async(disp, func, *args, update=None, **kwargs):
+            key = id(update)
+            with self._lock:
+                tracked = key in self._pending
+                if tracked:
+                    self._pending[key][1] += 1
+
+            def run(*a, **kw):
+                try:
+                    return func(*a, **kw)
+                finally:
+                    if tracked:
+                        with self._lock:
+                            self._pending[key][1] -= 1
+                            self._finish(key)
+
+            run.__name__ = getattr(func, "__name__", "run")
+            return run_async(disp, run, *args, update=update, **kwargs)
+
+        Dispatcher.process_update = timed_process_update
+        Dispatcher.run_async = timed_run_async
+
+    def feed(self, updates, rate=0.0):
+        interval = 1 / rate if rate else 0
+        started = time.perf_counter()
+        for count, update in enumerate(updates):
+            if interval:
+                wait = started + count * interval - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            dispatcher.update_queue.put(update)
+
+    def wait(self, expected):
+        with self._idle:
+            while len(self.latencies) + self.dropped < expected or self._pending:
+                self._idle.wait(1)
+
+
+def _percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(args):
+    api = FakeBotApi(args.latency, args.jitter, args.retry_after)
+    dispatcher.bot._request = api
+
+    # Loads every module, like the real start up.
+    from tg_bot.__main__ import setup_dispatcher
+    from tg_bot.modules.helper_funcs import cas_api
+    from tg_bot.modules.helper_funcs.chat_limiter import CHAT_LIMITER
+
+    setup_dispatcher()
+    if cas_api.BANNED_IDS is None:
+        cas_api.BANNED_IDS = array("q")
+    if args.no_limiter:
+        CHAT_LIMITER.allow = lambda chat_id: True
+
+    raw = list(read_updates(args.updates))
+    if args.seed_chats:
+        seed_chats(
+            {update["message"]["chat"]["id"] for update in raw if "message" in update}
+        )
+    updates = [Update.de_json(update, dispatcher.bot) for update in raw]
+    api.calls.clear()
+
+    replay = Replay(CHAT_LIMITER)
+    replay.instrument()
+    thread = threading.Thread(target=dispatcher.start, daemon=True)
+    thread.start()
+
+    started = time.perf_counter()
+    replay.feed(updates, args.rate)
+    replay.wait(len(updates))
+    elapsed = time.perf_counter() - started
+    dispatcher.stop()
+
+    latencies = sorted(replay.latencies)
+    print(f"updates:          {len(updates)}")
+    print(f"dropped by limit: {replay.dropped}")
+    print(f"elapsed:          {elapsed:.2f}s")
+    print(f"updates/sec:      {len(updates) / elapsed:.1f}")
+    if latencies:
+        print(f"latency p50:      {_percentile(latencies, 0.5) * 1000:.2f}ms")
+        print(f"latency p99:      {_percentile(latencies, 0.99) * 1000:.2f}ms")
+        print(f"latency mean:     {statistics.mean(latencies) * 1000:.2f}ms")
+    print(f"api calls/update: {api.total_calls / len(updates):.3f}")
+    print(f"api 429s:         {api.throttled}")
+    for method, calls in api.calls.most_common(10):
+        print(f"  {method}: {calls}")
+
+
+def write_generated(args):
+    with gzip.open(args.output, "wt", encoding="utf-8") as output:
+        for update in generate(args.updates, args.chats, args.users, args.seed):
+            output.write(json.dumps(update, separators=(",", ":")) + "\n")
+    LOGGER.info("Wrote %s updates to %s", args.updates, args.output)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m tg_bot.replay")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="write synthetic updates")
+    gen.add_argument("output")
+    gen.add_argument("--updates", type=int, default=10000)
+    gen.add_argument("--chats", type=int, default=50)
+    gen.add_argument("--users", type=int, default=2000)
+    gen.add_argument("--seed", type=int, default=0)
+
+    rep = commands.add_parser("run", help="replay updates and report")
+    rep.add_argument("updates", help="a .jsonl.gz of recorded or generated updates")
+    rep.add_argument("--latency", type=float, default=0.0, help="seconds per api call")
+    rep.add_argument("--jitter", type=float, default=0.0, help="extra random latency")
+    rep.add_argument(
+        "--retry-after", type=float, default=0.0, help="fraction of calls to 429"
+    )
+    rep.add_argument(
+        "--rate", type=float, default=0.0, help="updates/sec to feed, 0 for max"
+    )
+    rep.add_argument("--no-limiter", action="store_true", help="don't drop floods")
+    rep.add_argument(
+        "--seed-chats", action="store_true", help="add notes, filters, etc first"
+    )
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        write_generated(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
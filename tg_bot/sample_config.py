@@ -43,9 +43,29 @@ class Config:
     PORT = 5000
     DEL_CMDS = False  # Whether or not you should delete "blue text must click" commands
     STRICT_GBAN = False
+    # Read-only replica for stats, listings and cache loading
+    SQLALCHEMY_REPLICA_URI = None
+    DB_POOL_SIZE = 10  # Open database connections to keep, should be about WORKERS
+    DB_MAX_OVERFLOW = 10  # Extra connections allowed under load
+    DB_POOL_RECYCLE = 1800  # Reopen connections older than this many seconds
+    DB_POOL_TIMEOUT = 30  # Seconds to wait for a free connection
     WORKERS = 8  # Number of subthreads to use. This is the recommended amount - see for yourself what works best!
     BAN_STICKER = "CAACAgEAAxkBAAEB0r1gErzeIbolC_dIrDPLKAPqSU1duAACLwADnjOcH-wxu-ehy6NRHgQ"  # ban sticker
     ALLOW_EXCL = False  # Allow ! commands as well as /
+    # Path of a .jsonl.gz file to record every update to, for python3 -m tg_bot.replay
+    UPDATE_LOG = None
+    METRICS_PORT = None  # Serve prometheus metrics on http://127.0.0.1:<port>/metrics
+    # File to keep the sql caches in between restarts, eg "cacheSnapshot.pickle"
+    CACHE_SNAPSHOT = None
+    # Chats whose filters, notes, blacklists, disabled commands, warn filters and
+    # GitHub repo shortcuts are kept in memory
+    CHAT_CACHE_SIZE = 5000
+    # Drop those of chats which have been quiet for this many seconds
+    CHAT_CACHE_IDLE = 6 * 60 * 60
+    # Sent to web APIs, defaults to "tg_bot (https://t.me/<bot username>)"
+    HTTP_USER_AGENT = None
+    CHAT_BURST = 10  # How many updates a chat may send at once before they are dropped
+    CHAT_RATE = 5  # How many a second it may send after that
 
 
 class Production(Config):